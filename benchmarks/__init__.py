@@ -0,0 +1,3 @@
+"""
+Throughput and latency benchmarks of the neural pipeline, see run.py
+"""
@@ -0,0 +1,59 @@
+"""
+Compare two result files of benchmarks/run.py, e.g. of a base commit and of a change.
+
+Exits with status 1 if the throughput of any case dropped, or its p99 latency grew, by more than the
+threshold.
+
+Example:
+    python -m benchmarks.compare base.json new.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('base', type=str, help='Results to compare against.')
+    parser.add_argument('new', type=str, help='Results to check.')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative change that counts as a regression.')
+    args = parser.parse_args()
+    return args
+
+
+def change(base, new):
+    return (new - base) / base if base > 0 else 0.0
+
+
+def main():
+    args = parse_args()
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print("base: {} ({})".format(base['meta']['commit'], base['meta']['time']))
+    print("new:  {} ({})".format(new['meta']['commit'], new['meta']['time']))
+
+    regressions = []
+    print("{:<10}{:>14}{:>14}{:>10}{:>12}{:>12}{:>10}{:>12}".format('case', 'base tok/s', 'new tok/s', 'change',
+          'base p99', 'new p99', 'change', 'RSS change'))
+    for case, res in new['results'].items():
+        if case not in base['results']:
+            continue
+        old = base['results'][case]
+        throughput = change(old['tokens_per_sec'], res['tokens_per_sec'])
+        latency = change(old['latency_p99'], res['latency_p99'])
+        rss = change(old['peak_rss'], res['peak_rss'])
+        print("{:<10}{:>14.1f}{:>14.1f}{:>+10.1%}{:>12.4f}{:>12.4f}{:>+10.1%}{:>+12.1%}".format(case, old['tokens_per_sec'],
+              res['tokens_per_sec'], throughput, old['latency_p99'], res['latency_p99'], latency, rss))
+        if throughput < -args.threshold or latency > args.threshold:
+            regressions.append(case)
+
+    if len(regressions) > 0:
+        print("Regressions in: {}".format(', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
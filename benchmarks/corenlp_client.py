@@ -0,0 +1,130 @@
+"""
+Throughput of CoreNLPClient against a stub of the CoreNLP server, so that no Java server is needed.
+
+The stub answers /ping and annotation requests after a fixed delay, which stands for the time the server
+spends annotating, with a small JSON document, and handles up to --threads requests at the same time like
+the -threads option of the real server. It counts the connections opened, to check that the client reuses
+them. Each case sends the same documents, one by one with annotate, and with annotate_many at increasing
+concurrency.
+
+Example:
+    python -m benchmarks.corenlp_client --docs 200 --delay 0.005 --threads 5
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+from stanfordnlp.server.annotator import ThreadingHTTPServer
+from stanfordnlp.server.client import CoreNLPClient
+
+
+class StubCoreNLPServer:
+    """ Answers CoreNLP requests with a fixed JSON document after `delay` seconds, `threads` at a time. """
+
+    def __init__(self, delay=0.005, threads=5, host='localhost', port=0):
+        self.delay = delay
+        self.slots = threading.Semaphore(threads)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        handler = type('Handler', (StubHandler,), {'stub': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+
+    @property
+    def endpoint(self):
+        host, port = self.httpd.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+    def reset(self):
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    stub = None
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.stub.lock:
+            self.stub.connections += 1
+
+    def send_message(self, msg, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', len(msg))
+        self.end_headers()
+        self.wfile.write(msg)
+
+    def do_GET(self):
+        self.send_message(b'pong', 'text/plain')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        text = self.rfile.read(length).decode('utf-8')
+        with self.stub.lock:
+            self.stub.requests += 1
+        with self.stub.slots:
+            time.sleep(self.stub.delay)
+        tokens = [{'index': i + 1, 'word': word} for i, word in enumerate(text.split())]
+        self.send_message(json.dumps({'sentences': [{'index': 0, 'tokens': tokens}]}).encode('utf-8'), 'application/json')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=200, help='Documents sent in each case.')
+    parser.add_argument('--doc_words', type=int, default=50, help='Words per document.')
+    parser.add_argument('--delay', type=float, default=0.005, help='Time (in seconds) the stub server takes per document.')
+    parser.add_argument('--threads', type=int, default=5, help='Requests the stub server handles at the same time.')
+    parser.add_argument('--concurrency', type=str, default='1,2,5,10', help='Comma-separated concurrency levels of annotate_many.')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    texts = [' '.join('word{}'.format((i * args.doc_words + j) % 1000) for j in range(args.doc_words)) + ' .'
+             for i in range(args.docs)]
+    stub = StubCoreNLPServer(args.delay, args.threads).start()
+    client = CoreNLPClient(start_server=False, endpoint=stub.endpoint, threads=args.threads, output_format='json')
+    try:
+        cases = [('annotate', None)] + [('annotate_many', int(c)) for c in args.concurrency.split(',')]
+        print("{:<20}{:>12}{:>14}{:>14}".format('case', 'docs/s', 'ms/doc', 'connections'))
+        for name, concurrency in cases:
+            stub.reset()
+            start = time.perf_counter()
+            if concurrency is None:
+                results = [client.annotate(text) for text in texts]
+            else:
+                results = client.annotate_many(texts, max_concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            assert len(results) == len(texts)
+            label = name if concurrency is None else "{} x{}".format(name, concurrency)
+            print("{:<20}{:>12.1f}{:>14.2f}{:>14}".format(label, len(texts) / elapsed, elapsed / len(texts) * 1000,
+                  stub.connections))
+    finally:
+        client.session.close()
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Load generator for the pipeline server of stanfordnlp/server/pipeline_server.py.
+
+Sends documents from a number of concurrent clients, each one sending its next request as soon as the
+previous one is answered, and reports the throughput, the latency percentiles, and the batching metrics
+of the server. Documents are synthetic (see benchmarks/synthetic.py), or the paragraphs of a text file.
+
+Example:
+    python -m stanfordnlp.server.pipeline_server --lang en --workers 2 &
+    python -m benchmarks.load_generator --concurrency 16 --requests 500
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+
+from benchmarks import synthetic
+from stanfordnlp.server.batcher import Metrics
+from stanfordnlp.server.pipeline_client import PipelineClient
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--endpoint', type=str, default='http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients.')
+    parser.add_argument('--requests', type=int, default=200, help='Requests to send in total.')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed requests sent first.')
+    parser.add_argument('--text_file', type=str, default=None, help='Send the paragraphs of this file instead of synthetic documents.')
+    parser.add_argument('--doc_tokens', type=int, default=50, help='Tokens per synthetic document.')
+    parser.add_argument('--num_docs', type=int, default=100, help='Distinct synthetic documents.')
+    parser.add_argument('--processors', type=str, default=None, help='Processors to run, by default all of those of the server.')
+    parser.add_argument('--output', type=str, default=None, help='JSON file to write the results to.')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    return args
+
+
+def load_docs(args):
+    if args.text_file is not None:
+        with open(args.text_file) as f:
+            docs = [para.strip() for para in f.read().split('\n\n') if len(para.strip()) > 0]
+        return [(doc, len(doc.split())) for doc in docs]
+    language = synthetic.SyntheticLanguage(seed=args.seed)
+    docs = []
+    for i in range(args.num_docs):
+        sentences = language.document(args.doc_tokens, seed=args.seed + i + 1)
+        docs.append((synthetic.to_text(sentences), synthetic.count_tokens(sentences)))
+    return docs
+
+
+def run(client, docs, num_requests, concurrency, processors=None, seed=0):
+    """ Send num_requests documents from concurrency threads, and return the latencies, tokens and errors. """
+    lock = threading.Lock()
+    remaining = [num_requests]
+    latencies = []
+    counts = {'tokens': 0, 'errors': 0}
+
+    def work(worker_id):
+        rng = random.Random(seed + worker_id)
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            text, num_tokens = rng.choice(docs)
+            start = time.perf_counter()
+            try:
+                client.annotate(text, processors=processors)
+                error = False
+            except Exception as e:
+                print("Request failed: {}".format(e))
+                error = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if error:
+                    counts['errors'] += 1
+                else:
+                    counts['tokens'] += num_tokens
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, counts['tokens'], counts['errors']
+
+
+def main():
+    args = parse_args()
+    docs = load_docs(args)
+    client = PipelineClient(args.endpoint, pool_size=args.concurrency)
+    if not client.ping():
+        raise RuntimeError("The pipeline server at {} is not running".format(args.endpoint))
+
+    if args.warmup > 0:
+        run(client, docs, args.warmup, args.concurrency, processors=args.processors, seed=args.seed)
+    start = time.perf_counter()
+    latencies, tokens, errors = run(client, docs, args.requests, args.concurrency, processors=args.processors,
+                                    seed=args.seed + args.concurrency)
+    total = time.perf_counter() - start
+    server_metrics = client.metrics()
+    client.close()
+
+    results = {'config': vars(args), 'time': total, 'requests': len(latencies), 'errors': errors, 'tokens': tokens,
+               'requests_per_sec': len(latencies) / total, 'tokens_per_sec': tokens / total,
+               'latency': Metrics.summarize(latencies), 'server': server_metrics}
+    print("{} requests ({} errors) in {:.2f}s: {:.1f} requests/s, {:.1f} tokens/s".format(len(latencies), errors,
+          total, results['requests_per_sec'], results['tokens_per_sec']))
+    print("latency (ms): mean {mean:.1f}, p50 {p50:.1f}, p90 {p90:.1f}, p99 {p99:.1f}, max {max:.1f}".format(
+          **{k: v * 1000 for k, v in results['latency'].items()}))
+    print("server: {} batches, mean batch size {:.2f}".format(server_metrics['batches'], server_metrics['mean_batch_size']))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print("Results written to {}".format(args.output))
+
+
+if __name__ == '__main__':
+    main()
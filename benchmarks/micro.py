@@ -0,0 +1,403 @@
+"""
+Microbenchmarks of the decoding, training and data-path hot spots, each timed in isolation on generated
+inputs at several scales.
+
+Each benchmark is a setup function that builds its inputs for a scale, outside of the timed region, and
+returns the function to time along with the number of items (tokens, sentences, arcs...) it processes per
+call, from which the throughput is derived. Timing follows timeit: calls are repeated until each
+measurement takes at least --min_time seconds, with garbage collection disabled, and the best and median
+of --repeat measurements are reported. The results are written as JSON.
+
+Example:
+    python -m benchmarks.micro --benchmarks chuliu_edmonds,seq2seq_greedy --scales small,medium
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import tempfile
+import timeit
+import numpy as np
+import torch
+
+from collections import OrderedDict
+from datetime import datetime
+
+from benchmarks import synthetic
+from benchmarks.models import set_seed
+from benchmarks.run import git_commit
+
+SCALES = ['small', 'medium', 'large']
+
+# name -> (setup function, parameters of each scale)
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name, **scales):
+    def register(setup):
+        BENCHMARKS[name] = (setup, scales)
+        return setup
+    return register
+
+
+def synthetic_sentences(num_tokens, seed=1234):
+    language = synthetic.SyntheticLanguage(2000, seed=seed)
+    return language.document(num_tokens, seed=seed)
+
+
+@benchmark('chuliu_edmonds', small={'n': 10}, medium={'n': 40}, large={'n': 120})
+def setup_chuliu_edmonds(params, workdir):
+    """ Maximum spanning tree decoding of the parser, on random score matrices of sentences of n words. """
+    from stanfordnlp.models.common.chuliu_edmonds import chuliu_edmonds_one_root
+    rng = np.random.RandomState(0)
+    n = params['n']
+    # log-probabilities of the heads of each word, as the parser produces them
+    scores = [rng.normal(size=(n + 1, n + 1)) for _ in range(20)]
+    scores = [s - np.log(np.exp(s).sum(1, keepdims=True)) for s in scores]
+    def run():
+        for s in scores:
+            chuliu_edmonds_one_root(s)
+    return run, len(scores) * n
+
+
+class OracleTrainer:
+    """ Stands in for the tokenizer network, and predicts the gold labels, so that only the decoding of the predictions is timed. """
+    def __init__(self, shorthand, batch_size=32):
+        self.args = {'shorthand': shorthand, 'batch_size': batch_size}
+
+    def predict(self, inputs):
+        labels = inputs[1].numpy()
+        scores = np.zeros(labels.shape + (5,), dtype=np.float32)
+        np.put_along_axis(scores, np.maximum(labels, 0)[..., None], 1, axis=2)
+        return scores
+
+
+@benchmark('output_predictions', small={'tokens': 1000}, medium={'tokens': 10000}, large={'tokens': 50000})
+def setup_output_predictions(params, workdir):
+    """ Turning the character-level predictions of the tokenizer into CoNLL-U, with an oracle in place of the network. """
+    from stanfordnlp.models.tokenize.data import DataLoader
+    from stanfordnlp.models.tokenize.utils import output_predictions
+    sentences = synthetic_sentences(params['tokens'])
+    args = {'lang': 'fr', 'feat_funcs': ['space_before', 'capitalized', 'all_caps', 'numeric'], 'max_seqlen': 300}
+    batches = DataLoader(args, input_data=synthetic.to_tokenizer_data(sentences), evaluation=True)
+    trainer = OracleTrainer('fr_gsd')
+    def run():
+        with io.StringIO() as f:
+            output_predictions(f, trainer, batches, batches.vocab, None, args['max_seqlen'])
+    return run, synthetic.count_tokens(sentences)
+
+
+@benchmark('load_conll', small={'tokens': 1000}, medium={'tokens': 20000}, large={'tokens': 200000})
+def setup_load_conll(params, workdir):
+    """ Parsing CoNLL-U text into a CoNLLFile. """
+    from stanfordnlp.models.common.conll import CoNLLFile
+    sentences = synthetic_sentences(params['tokens'])
+    text = synthetic.to_conllu(sentences)
+    def run():
+        CoNLLFile(input_str=text).load_conll()
+    return run, synthetic.count_tokens(sentences)
+
+
+@benchmark('conll_as_string', small={'tokens': 1000}, medium={'tokens': 20000}, large={'tokens': 200000})
+def setup_conll_as_string(params, workdir):
+    """ Writing a loaded CoNLLFile back to a string. """
+    from stanfordnlp.models.common.conll import CoNLLFile
+    sentences = synthetic_sentences(params['tokens'])
+    conll_file = CoNLLFile(input_str=synthetic.to_conllu(sentences))
+    conll_file.load_all()
+    def run():
+        conll_file.conll_as_string()
+    return run, synthetic.count_tokens(sentences)
+
+
+@benchmark('get_long_tensor', small={'batch': 50, 'length': 20}, medium={'batch': 500, 'length': 40},
+           large={'batch': 5000, 'length': 60})
+def setup_get_long_tensor(params, workdir):
+    """ Padding a batch of word id sequences of random lengths into a tensor. """
+    from stanfordnlp.models.common.data import get_long_tensor
+    rng = random.Random(0)
+    batch = params['batch']
+    tokens = [[rng.randrange(100) for _ in range(rng.randint(1, params['length']))] for _ in range(batch)]
+    def run():
+        get_long_tensor(tokens, batch)
+    return run, sum(len(x) for x in tokens)
+
+
+@benchmark('get_long_tensor_chars', small={'batch': 50, 'length': 20}, medium={'batch': 500, 'length': 40},
+           large={'batch': 2000, 'length': 60})
+def setup_get_long_tensor_chars(params, workdir):
+    """ Padding the character id sequences of all words of a batch of sentences, as for the char models. """
+    from stanfordnlp.models.common.data import get_long_tensor
+    rng = random.Random(0)
+    sentences = [[[rng.randrange(100) for _ in range(rng.randint(1, 12))] for _ in range(rng.randint(1, params['length']))]
+                 for _ in range(params['batch'])]
+    # the char models take the words of all sentences as one batch, as in pos/data.py
+    batch_words = [w for sent in sentences for w in sent]
+    def run():
+        get_long_tensor(batch_words, len(batch_words))
+    return run, len(batch_words)
+
+
+def setup_seq2seq(params, beam_size):
+    from stanfordnlp.models.common.seq2seq_model import Seq2SeqModel
+    import stanfordnlp.models.common.seq2seq_constant as constant
+    set_seed(0)
+    args = {'vocab_size': 100, 'emb_dim': 50, 'hidden_dim': 200, 'num_layers': 1, 'emb_dropout': 0.5,
+            'dropout': 0.5, 'max_dec_len': params['max_dec_len'], 'attn_type': 'soft'}
+    model = Seq2SeqModel(args)
+    model.eval()
+    # character id sequences of random word lengths, sorted by length as the DataLoaders do
+    rng = random.Random(0)
+    lens = sorted([rng.randint(2, 15) for _ in range(params['batch'])], reverse=True)
+    src = torch.full((len(lens), lens[0]), constant.PAD_ID, dtype=torch.long)
+    for i, l in enumerate(lens):
+        src[i, :l] = torch.randint(4, args['vocab_size'], (l,))
+    src_mask = src.eq(constant.PAD_ID)
+    def run():
+        model.predict(src, src_mask, beam_size=beam_size)
+    return run, len(lens)
+
+
+SEQ2SEQ_SCALES = {'small': {'batch': 50, 'max_dec_len': 20}, 'medium': {'batch': 500, 'max_dec_len': 20},
+                  'large': {'batch': 500, 'max_dec_len': 50}}
+
+
+@benchmark('seq2seq_greedy', **SEQ2SEQ_SCALES)
+def setup_seq2seq_greedy(params, workdir):
+    """ Seq2SeqModel.predict with greedy decoding (beam size 1), as the lemmatizer and MWT expander run by default. """
+    return setup_seq2seq(params, 1)
+
+
+@benchmark('seq2seq_beam', **SEQ2SEQ_SCALES)
+def setup_seq2seq_beam(params, workdir):
+    """ Seq2SeqModel.predict with batched beam search of size 5. """
+    return setup_seq2seq(params, 5)
+
+
+@benchmark('load_annotations', small={'tokens': 1000}, medium={'tokens': 20000}, large={'tokens': 100000})
+def setup_load_annotations(params, workdir):
+    """ Building the sentences, tokens and words of a Document from its CoNLL-U annotations, and reading them. """
+    from stanfordnlp.models.common.conll import CoNLLFile
+    from stanfordnlp.pipeline.doc import Document
+    sentences = synthetic_sentences(params['tokens'])
+    doc = Document(synthetic.to_text(sentences))
+    doc.conll_file = CoNLLFile(input_str=synthetic.to_conllu(sentences))
+    doc.conll_file.load_all()
+    def run():
+        doc.load_annotations()
+        # sentences and words are only built when accessed
+        for sentence in doc.sentences:
+            for word in sentence.words:
+                word.text
+    return run, synthetic.count_tokens(sentences)
+
+
+@benchmark('read_pretrain', small={'words': 10000, 'dim': 100}, medium={'words': 100000, 'dim': 100},
+           large={'words': 500000, 'dim': 100})
+def setup_read_pretrain(params, workdir):
+    """ Reading word vectors in the text format with Pretrain.read_from_file. """
+    from stanfordnlp.models.common.pretrain import Pretrain
+    vec_file = os.path.join(workdir, 'vectors_{}_{}.vec'.format(params['words'], params['dim']))
+    synthetic.write_vectors(vec_file, ['w{}'.format(i) for i in range(params['words'])], params['dim'])
+    pretrain = Pretrain(os.path.join(workdir, 'unused.pretrain.pt'))
+    def run():
+        pretrain.read_from_file(vec_file)
+    return run, params['words']
+
+
+def setup_highway_lstm(params, fused):
+    from stanfordnlp.models.common.hlstm import HighwayLSTM
+    set_seed(0)
+    dim = params['dim']
+    lstm = HighwayLSTM(dim, dim, num_layers=3, batch_first=True, bidirectional=True, dropout=0.0, rec_dropout=0.0,
+                       highway_func=torch.tanh)
+    # in training mode (without dropout) forward() takes the unfused path
+    lstm.train(not fused)
+    rng = random.Random(0)
+    seqlens = sorted([rng.randint(3, params['length']) for _ in range(params['batch'])], reverse=True)
+    inputs = torch.randn(len(seqlens), seqlens[0], dim)
+    def run():
+        with torch.no_grad():
+            lstm(inputs, seqlens)
+    return run, sum(seqlens)
+
+
+HLSTM_SCALES = {'small': {'batch': 32, 'length': 20, 'dim': 64}, 'medium': {'batch': 128, 'length': 40, 'dim': 200},
+                'large': {'batch': 256, 'length': 60, 'dim': 400}}
+
+
+@benchmark('highway_lstm', **HLSTM_SCALES)
+def setup_highway_lstm_fused(params, workdir):
+    """ The 3-layer bidirectional HighwayLSTM of the tagger and parser, on the fused inference path. """
+    return setup_highway_lstm(params, True)
+
+
+@benchmark('highway_lstm_unfused', **HLSTM_SCALES)
+def setup_highway_lstm_unfused(params, workdir):
+    """ The same HighwayLSTM on the layer-by-layer path used in training, as a baseline for the fused one. """
+    return setup_highway_lstm(params, False)
+
+
+@benchmark('lstm_rec_dropout', small={'batch': 32, 'length': 20, 'dim': 64}, medium={'batch': 128, 'length': 40, 'dim': 200},
+           large={'batch': 256, 'length': 60, 'dim': 400})
+def setup_lstm_rec_dropout(params, workdir):
+    """ The step-by-step LSTM with recurrent dropout (rnn_loop), on packed sequences. """
+    from torch.nn.utils.rnn import pack_padded_sequence
+    from stanfordnlp.models.common.packed_lstm import LSTMwRecDropout
+    set_seed(0)
+    dim = params['dim']
+    lstm = LSTMwRecDropout(dim, dim, 1, batch_first=True, bidirectional=True, rec_dropout=0.33)
+    lstm.train()
+    rng = random.Random(0)
+    seqlens = sorted([rng.randint(3, params['length']) for _ in range(params['batch'])], reverse=True)
+    inputs = pack_padded_sequence(torch.randn(len(seqlens), seqlens[0], dim), seqlens, batch_first=True)
+    def run():
+        with torch.no_grad():
+            lstm(inputs)
+    return run, sum(seqlens)
+
+
+def setup_training_step(params, workdir, processor, rec_dropout=0):
+    from stanfordnlp.models import tagger, parser
+    from stanfordnlp.models.common.pretrain import Pretrain
+    from benchmarks.models import cli_args
+    set_seed(0)
+    language = synthetic.SyntheticLanguage(2000, seed=1234)
+    sentences = language.document(params['tokens'], seed=1234)
+    train_file = os.path.join(workdir, '{}_train_{}.conllu'.format(processor, params['tokens']))
+    with open(train_file, 'w') as f:
+        f.write(synthetic.to_conllu(sentences))
+    vec_file = os.path.join(workdir, '{}_{}.vec'.format(processor, params['tokens']))
+    synthetic.write_vectors(vec_file, sorted(set(entry[0].lower() for entry in language.entries)), 32)
+    pretrain = Pretrain(os.path.join(workdir, '{}_{}.pretrain.pt'.format(processor, params['tokens'])), vec_file)
+    # with recurrent dropout, the LSTMs run step by step in LSTMwRecDropout instead of the native LSTM
+    dropout = ['--rec_dropout', str(rec_dropout), '--char_rec_dropout', str(rec_dropout)]
+    if processor == 'pos':
+        from stanfordnlp.models.pos.data import DataLoader
+        from stanfordnlp.models.pos.trainer import Trainer
+        args = cli_args(tagger, 'pos', ['--lang', 'fr', '--shorthand', 'fr_gsd'] + dropout, 'small')
+        batches = DataLoader(train_file, params['tokens'], args, pretrain, evaluation=False)
+        trainer = Trainer(args=args, vocab=batches.vocab, pretrain=pretrain, use_cuda=False)
+    else:
+        from stanfordnlp.models.depparse.data import DataLoader
+        from stanfordnlp.models.depparse.trainer import Trainer
+        args = cli_args(parser, 'depparse', ['--lang', 'fr', '--shorthand', 'fr_gsd'] + dropout, 'small')
+        batches = DataLoader(train_file, params['tokens'], args, pretrain, evaluation=False, cutoff=args['vocab_cutoff'])
+        trainer = Trainer(args=args, vocab=batches.vocab, pretrain=pretrain, use_cuda=False, weight_decay=args['wdecay'])
+    # the DataLoader chunks the corpus into batches of about params['tokens'] words, the first one is timed
+    batch = batches[0]
+    sentlens = batch[-2]
+    def run():
+        trainer.update(batch)
+    return run, sum(sentlens)
+
+
+TRAINING_SCALES = {'small': {'tokens': 500}, 'medium': {'tokens': 2000}, 'large': {'tokens': 5000}}
+
+
+@benchmark('tagger_train', **TRAINING_SCALES)
+def setup_tagger_train(params, workdir):
+    """ One forward, backward and optimizer step of a small tagger on a batch of the given size. """
+    return setup_training_step(params, workdir, 'pos')
+
+
+@benchmark('parser_train', **TRAINING_SCALES)
+def setup_parser_train(params, workdir):
+    """ One forward, backward and optimizer step of a small parser on a batch of the given size. """
+    return setup_training_step(params, workdir, 'depparse')
+
+
+@benchmark('tagger_train_recdrop', **TRAINING_SCALES)
+def setup_tagger_train_rec_dropout(params, workdir):
+    """ The same tagger training step with recurrent dropout in all LSTMs. """
+    return setup_training_step(params, workdir, 'pos', rec_dropout=0.33)
+
+
+@benchmark('parser_train_recdrop', **TRAINING_SCALES)
+def setup_parser_train_rec_dropout(params, workdir):
+    """ The same parser training step with recurrent dropout in all LSTMs. """
+    return setup_training_step(params, workdir, 'depparse', rec_dropout=0.33)
+
+
+def measure(func, min_time, repeat):
+    """ Per-call times of repeat measurements, each of enough calls to take at least min_time seconds. """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 10 ** 6:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+    return [t / number for t in timer.repeat(repeat, number)], number
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--benchmarks', type=str, default=None, help='Comma-separated benchmarks to run, by default all of them.')
+    parser.add_argument('--filter', type=str, default=None, help='Only run the benchmarks whose name matches this regex.')
+    parser.add_argument('--scales', type=str, default=','.join(SCALES), help='Comma-separated scales to run.')
+    parser.add_argument('--min_time', type=float, default=0.2, help='Minimum duration of each measurement in seconds.')
+    parser.add_argument('--repeat', type=int, default=5, help='Measurements per benchmark and scale.')
+    parser.add_argument('--threads', type=int, default=1, help='Torch threads.')
+    parser.add_argument('--list', action='store_true', help='List the benchmarks and exit.')
+    parser.add_argument('--output', type=str, default=None, help='JSON file to write the results to.')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.list:
+        for name, (setup, scales) in BENCHMARKS.items():
+            print("{:<24}{}".format(name, setup.__doc__.strip()))
+        return
+
+    names = args.benchmarks.split(',') if args.benchmarks is not None else list(BENCHMARKS.keys())
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if len(unknown) > 0:
+        raise ValueError("Unknown benchmarks: {}".format(','.join(unknown)))
+    if args.filter is not None:
+        names = [name for name in names if re.search(args.filter, name)]
+    scales = args.scales.split(',')
+    torch.set_num_threads(args.threads)
+
+    results = OrderedDict()
+    workdir = tempfile.mkdtemp(prefix='stanfordnlp_micro_')
+    try:
+        print("{:<24}{:<8}{:>14}{:>14}{:>16}".format('benchmark', 'scale', 'best (ms)', 'median (ms)', 'items/s'))
+        for name in names:
+            setup, scale_params = BENCHMARKS[name]
+            results[name] = OrderedDict()
+            for scale in scales:
+                if scale not in scale_params:
+                    continue
+                func, items = setup(scale_params[scale], workdir)
+                times, number = measure(func, args.min_time, args.repeat)
+                best, median = min(times), float(np.median(times))
+                results[name][scale] = {'params': scale_params[scale], 'items': items, 'calls': number,
+                                        'times': times, 'best': best, 'median': median,
+                                        'items_per_sec': items / median if median > 0 else 0.0}
+                print("{:<24}{:<8}{:>14.3f}{:>14.3f}{:>16.1f}".format(name, scale, best * 1000, median * 1000,
+                      results[name][scale]['items_per_sec']))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = {
+        'meta': {'commit': git_commit(), 'time': datetime.now().isoformat(), 'python': platform.python_version(),
+                 'torch': torch.__version__, 'numpy': np.__version__, 'platform': platform.platform(),
+                 'threads': args.threads},
+        'results': results,
+    }
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print("Results written to {}".format(args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Randomly initialized models for the benchmarks.
+
+The models are built with the training code of each processor from a synthetic training corpus, which
+gives them vocabularies (and, for the lemmatizer and the MWT expander, dictionaries) of realistic size, and
+are saved where Pipeline expects them under models_dir. The networks keep their random weights, except for
+the tokenizer, which is fit for a few hundred steps: a random tokenizer hardly ever predicts a token
+boundary, which would leave nothing for the downstream processors to do.
+"""
+
+import math
+import os
+import random
+import numpy as np
+import torch
+
+from stanfordnlp.models import tokenizer, mwt_expander, tagger, lemmatizer, parser
+from stanfordnlp.models.common.pretrain import Pretrain
+from stanfordnlp.utils.resources import build_default_config, mwt_languages
+
+from benchmarks import synthetic
+
+# dimensions of the small models, the default ones are those of the training scripts
+SMALL_DIMS = {
+    'tokenize': ['--emb_dim', '16', '--hidden_dim', '32'],
+    'mwt': ['--emb_dim', '16', '--hidden_dim', '32'],
+    'pos': ['--word_emb_dim', '32', '--char_emb_dim', '16', '--char_hidden_dim', '32', '--tag_emb_dim', '16',
+            '--transformed_dim', '32', '--hidden_dim', '64', '--deep_biaff_hidden_dim', '64',
+            '--composite_deep_biaff_hidden_dim', '32'],
+    'lemma': ['--emb_dim', '16', '--hidden_dim', '32', '--pos_dim', '16'],
+    'depparse': ['--word_emb_dim', '32', '--char_emb_dim', '16', '--char_hidden_dim', '32', '--tag_emb_dim', '16',
+                 '--transformed_dim', '32', '--hidden_dim', '64', '--deep_biaff_hidden_dim', '64',
+                 '--lemma_emb_dim', '16'],
+}
+PRETRAIN_DIMS = {'small': 32, 'default': 100}
+
+
+def set_seed(seed):
+    torch.manual_seed(seed)
+    np.random.seed(seed)
+    random.seed(seed)
+
+
+def cli_args(module, processor, extra, model_size):
+    """ The arguments a training CLI would start from, with cuda disabled. """
+    dims = SMALL_DIMS[processor] if model_size == 'small' else []
+    args = vars(module.parse_args(extra + dims))
+    args['cuda'] = False
+    return args
+
+
+def build_tokenizer(model_file, lang, treebank, sentences, steps, model_size, seed):
+    from stanfordnlp.models.tokenize.data import DataLoader
+    from stanfordnlp.models.tokenize.trainer import Trainer
+    set_seed(seed)
+    data = synthetic.to_tokenizer_data(sentences)
+    # the same rule as the training script: three times the average sentence length, in hundreds of characters
+    avg_len = sum(len(para) for para in data) / len(sentences)
+    max_seqlen = int(math.ceil(avg_len * 3 / 100) * 100)
+    args = cli_args(tokenizer, 'tokenize', ['--lang', lang, '--shorthand', treebank, '--max_seqlen', str(max_seqlen)], model_size)
+    args['feat_funcs'] = ['space_before', 'capitalized', 'all_caps', 'numeric']
+    args['feat_dim'] = len(args['feat_funcs'])
+    batches = DataLoader(args, input_data=data)
+    args['vocab_size'] = len(batches.vocab)
+    trainer = Trainer(args=args, vocab=batches.vocab, use_cuda=False)
+    for step in range(1, steps + 1):
+        loss = trainer.update(batches.next(unit_dropout=args['unit_dropout']))
+        if step % args['report_steps'] == 0:
+            print("Tokenizer step {}/{}: loss = {:.6f}".format(step, steps, loss))
+        if step % args['shuffle_steps'] == 0:
+            batches.shuffle()
+    trainer.save(model_file)
+
+
+def build_mwt(model_file, lang, treebank, train_file, model_size, seed, use_dict):
+    from stanfordnlp.models.mwt.data import DataLoader
+    from stanfordnlp.models.mwt.trainer import Trainer
+    set_seed(seed)
+    args = cli_args(mwt_expander, 'mwt', ['--lang', lang, '--shorthand', treebank], model_size)
+    batch = DataLoader(train_file, args['batch_size'], args, evaluation=False)
+    args['vocab_size'] = batch.vocab.size
+    trainer = Trainer(args=args, vocab=batch.vocab, use_cuda=False)
+    if use_dict:
+        trainer.train_dict(batch.conll.get_mwt_expansions())
+    trainer.save(model_file)
+
+
+def build_tagger(model_file, pretrain, lang, treebank, train_file, model_size, seed):
+    from stanfordnlp.models.pos.data import DataLoader
+    from stanfordnlp.models.pos.trainer import Trainer
+    set_seed(seed)
+    args = cli_args(tagger, 'pos', ['--lang', lang, '--shorthand', treebank], model_size)
+    batch = DataLoader(train_file, args['batch_size'], args, pretrain, evaluation=False)
+    trainer = Trainer(args=args, vocab=batch.vocab, pretrain=pretrain, use_cuda=False)
+    trainer.save(model_file)
+
+
+def build_lemmatizer(model_file, lang, treebank, train_file, model_size, seed, use_dict):
+    from stanfordnlp.models.lemma.data import DataLoader
+    from stanfordnlp.models.lemma.trainer import Trainer
+    set_seed(seed)
+    # the lemmatizer CLI takes the treebank shorthand as its language
+    args = cli_args(lemmatizer, 'lemma', ['--lang', treebank], model_size)
+    batch = DataLoader(train_file, args['batch_size'], args, evaluation=False)
+    args['vocab_size'] = batch.vocab['char'].size
+    args['pos_vocab_size'] = batch.vocab['pos'].size
+    trainer = Trainer(args=args, vocab=batch.vocab, use_cuda=False)
+    if use_dict:
+        trainer.train_dict(batch.conll.get(['word', 'upos', 'lemma']))
+    trainer.save(model_file)
+
+
+def build_parser(model_file, pretrain, lang, treebank, train_file, model_size, seed):
+    from stanfordnlp.models.depparse.data import DataLoader
+    from stanfordnlp.models.depparse.trainer import Trainer
+    set_seed(seed)
+    args = cli_args(parser, 'depparse', ['--lang', lang, '--shorthand', treebank], model_size)
+    batch = DataLoader(train_file, args['batch_size'], args, pretrain, evaluation=False, cutoff=args['vocab_cutoff'])
+    trainer = Trainer(args=args, vocab=batch.vocab, pretrain=pretrain, use_cuda=False, weight_decay=args['wdecay'])
+    trainer.save(model_file)
+
+
+def build_models(models_dir, language, lang='fr', treebank='fr_gsd', train_tokens=40000, tokenizer_steps=300,
+                 model_size='small', use_dict=True, seed=1234):
+    """
+    Build the models of all processors of a treebank under models_dir, and return the default pipeline config
+    pointing at them. Models that already exist are kept.
+    """
+    config = build_default_config(treebank, models_dir)
+    processors = config['processors'].split(',')
+    if all(os.path.exists(config['{}_model_path'.format(p)]) for p in processors):
+        return config
+    os.makedirs(os.path.dirname(config['tokenize_model_path']), exist_ok=True)
+
+    sentences = language.document(train_tokens, seed=seed)
+    train_file = os.path.join(models_dir, '{}.train.conllu'.format(treebank))
+    with open(train_file, 'w') as f:
+        f.write(synthetic.to_conllu(sentences))
+    vec_file = os.path.join(models_dir, '{}.vec'.format(treebank))
+    words = sorted(set(entry[0].lower() for entry in language.entries))
+    synthetic.write_vectors(vec_file, words, PRETRAIN_DIMS[model_size], seed=seed)
+    pretrain = Pretrain(config['pos_pretrain_path'], vec_file)
+    pretrain.emb # read the vectors and save the pretrain file
+
+    build_tokenizer(config['tokenize_model_path'], lang, treebank, sentences, tokenizer_steps, model_size, seed)
+    if treebank in mwt_languages:
+        build_mwt(config['mwt_model_path'], lang, treebank, train_file, model_size, seed, use_dict)
+    build_tagger(config['pos_model_path'], pretrain, lang, treebank, train_file, model_size, seed)
+    build_lemmatizer(config['lemma_model_path'], lang, treebank, train_file, model_size, seed, use_dict)
+    build_parser(config['depparse_model_path'], pretrain, lang, treebank, train_file, model_size, seed)
+    return config
@@ -0,0 +1,169 @@
+"""
+End-to-end benchmarks of the neural pipeline on CPU, with synthetic documents and small randomly initialized
+models, so that no downloads are needed.
+
+Each processor is timed as a stage of a pipeline that runs all processors up to it, and the full pipeline
+is timed end to end. Every case runs in a fresh process, so that the peak RSS it reports is its own.
+Throughput is counted in tokens of the generated documents. The results are written as JSON, and two
+result files can be compared with benchmarks/compare.py.
+
+Example:
+    python -m benchmarks.run --output results.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import torch
+
+from datetime import datetime
+
+from benchmarks import synthetic
+from benchmarks.models import build_models, set_seed
+
+CASES = ['tokenize', 'mwt', 'pos', 'lemma', 'depparse', 'pipeline']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', type=str, default=None, help='JSON file to write the results to.')
+    parser.add_argument('--cases', type=str, default=','.join(CASES), help='Comma-separated processors to time, and "pipeline" for the full pipeline.')
+    parser.add_argument('--models_dir', type=str, default=None, help='Where to build (or reuse) the models, by default a temporary directory.')
+    parser.add_argument('--lang', type=str, default='fr')
+    parser.add_argument('--treebank', type=str, default='fr_gsd', help='Treebank the models are saved as, one with multi-word tokens runs the MWT expander.')
+    parser.add_argument('--model_size', type=str, default='small', choices=['small', 'default'], help='Small dimensions, or those of the training scripts.')
+    parser.add_argument('--no_dict', dest='use_dict', action='store_false', help='Do not build the lemma and MWT dictionaries, so that every word goes through the seq2seq models.')
+    parser.add_argument('--vocab_size', type=int, default=5000, help='Lemmas in the synthetic lexicon.')
+    parser.add_argument('--train_tokens', type=int, default=40000, help='Size of the synthetic training corpus the vocabularies are built from.')
+    parser.add_argument('--tokenizer_steps', type=int, default=300, help='Steps to fit the tokenizer for.')
+    parser.add_argument('--num_docs', type=int, default=20, help='Timed documents per case.')
+    parser.add_argument('--warmup_docs', type=int, default=2, help='Untimed documents run first in each case.')
+    parser.add_argument('--doc_tokens', type=int, default=1000, help='Tokens per document.')
+    parser.add_argument('--sent_len_mean', type=float, default=20, help='Mean sentence length in tokens.')
+    parser.add_argument('--sent_len_std', type=float, default=10, help='Standard deviation of the sentence length, 0 for a fixed length.')
+    parser.add_argument('--threads', type=int, default=1, help='Torch threads.')
+    parser.add_argument('--in_process', action='store_true', help='Run all cases in this process (peak RSS is then cumulative).')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    return args
+
+
+def run_case(case, processors, models_dir, docs, args):
+    """ Time a case on the documents, a list of (text, number of tokens), and return its statistics. """
+    from stanfordnlp.pipeline.core import Pipeline
+    from stanfordnlp.pipeline.doc import Document
+    from stanfordnlp.pipeline.profile import peak_memory
+
+    torch.set_num_threads(args['threads'])
+    set_seed(args['seed'])
+    rss_before_load = peak_memory()
+    start = time.perf_counter()
+    pipeline = Pipeline(processors=processors, lang=args['lang'], treebank=args['treebank'], models_dir=models_dir,
+                        use_gpu=False)
+    load_time = time.perf_counter() - start
+
+    latencies = []
+    tokens = words = sentences = 0
+    for i, (text, num_tokens) in enumerate(docs):
+        doc = Document(text)
+        start = time.perf_counter()
+        pipeline.process(doc)
+        elapsed = time.perf_counter() - start
+        if i < args['warmup_docs']:
+            continue
+        stats = doc.profile.stages['load_annotations' if case == 'pipeline' else case]
+        latencies.append(elapsed if case == 'pipeline' else stats.time)
+        tokens += num_tokens
+        words += stats.tokens
+        sentences += stats.sentences
+
+    total = sum(latencies)
+    return {'processors': processors, 'load_time': load_time, 'docs': len(latencies), 'tokens': tokens,
+            'words': words, 'sentences': sentences, 'time': total,
+            'tokens_per_sec': tokens / total if total > 0 else 0.0,
+            'sentences_per_sec': sentences / total if total > 0 else 0.0,
+            'latency_mean': float(np.mean(latencies)), 'latency_p50': float(np.percentile(latencies, 50)),
+            'latency_p99': float(np.percentile(latencies, 99)), 'peak_rss_before_load': rss_before_load,
+            'peak_rss': peak_memory()}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = vars(parse_args())
+    cases = args['cases'].split(',')
+    unknown = [case for case in cases if case not in CASES]
+    if len(unknown) > 0:
+        raise ValueError("Unknown benchmark cases: {}".format(','.join(unknown)))
+
+    models_dir = args['models_dir'] if args['models_dir'] is not None else tempfile.mkdtemp(prefix='stanfordnlp_bench_')
+    language = synthetic.SyntheticLanguage(args['vocab_size'], seed=args['seed'])
+    try:
+        config = build_models(models_dir, language, lang=args['lang'], treebank=args['treebank'],
+                              train_tokens=args['train_tokens'], tokenizer_steps=args['tokenizer_steps'],
+                              model_size=args['model_size'], use_dict=args['use_dict'], seed=args['seed'])
+        pipeline_processors = config['processors'].split(',')
+        # the benchmark documents are drawn with other seeds than the training corpus
+        docs = []
+        for i in range(args['warmup_docs'] + args['num_docs']):
+            sentences = language.document(args['doc_tokens'], args['sent_len_mean'], args['sent_len_std'],
+                                          seed=args['seed'] + i + 1)
+            docs.append((synthetic.to_text(sentences), synthetic.count_tokens(sentences)))
+
+        # spawn rather than fork, the models were built with torch in this process
+        context = multiprocessing.get_context('spawn')
+        results = {}
+        for case in cases:
+            if case == 'pipeline':
+                processors = pipeline_processors
+            elif case in pipeline_processors:
+                processors = pipeline_processors[:pipeline_processors.index(case) + 1]
+            else:
+                print("Skipping {}, which is not in the pipeline of {}".format(case, args['treebank']))
+                continue
+            print("Running {}...".format(case))
+            case_args = (case, ','.join(processors), models_dir, docs, args)
+            if args['in_process']:
+                results[case] = run_case(*case_args)
+            else:
+                with context.Pool(1) as pool:
+                    results[case] = pool.apply(run_case, case_args)
+    finally:
+        if args['models_dir'] is None:
+            shutil.rmtree(models_dir, ignore_errors=True)
+
+    output = {
+        'meta': {'commit': git_commit(), 'time': datetime.now().isoformat(), 'python': platform.python_version(),
+                 'torch': torch.__version__, 'platform': platform.platform(), 'cpu_count': os.cpu_count()},
+        'config': args,
+        'results': results,
+    }
+    print("{:<10}{:>12}{:>12}{:>12}{:>14}".format('case', 'tokens/s', 'p50 (ms)', 'p99 (ms)', 'peak RSS (MB)'))
+    for case, res in results.items():
+        print("{:<10}{:>12.1f}{:>12.2f}{:>12.2f}{:>14.1f}".format(case, res['tokens_per_sec'], res['latency_p50'] * 1000,
+              res['latency_p99'] * 1000, res['peak_rss'] / 2**20))
+    if args['output'] is not None:
+        with open(args['output'], 'w') as f:
+            json.dump(output, f, indent=2)
+        print("Results written to {}".format(args['output']))
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
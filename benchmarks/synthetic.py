@@ -0,0 +1,221 @@
+"""
+Synthetic annotated text for the benchmarks.
+
+The text is drawn from a small random language: a Zipfian lexicon of inflected nouns, verbs and adjectives
+and of closed-class words, a few contractions that are split into multi-word tokens, and random dependency
+trees. This gives every processor realistic work to do without any downloaded data. Sentence lengths are
+drawn from a log-normal distribution with a given mean and standard deviation, and everything is
+determined by the seeds.
+
+A sentence is a list of tokens, and a token is a pair (surface form, words), where words is a list of
+(form, lemma, upos, xpos, feats, head, deprel) tuples. Heads are 1-based word indices within the sentence.
+"""
+
+import itertools
+import math
+import random
+
+UPOS_WEIGHTS = [('NOUN', 25), ('VERB', 14), ('ADJ', 8), ('ADV', 5), ('PRON', 6), ('DET', 10), ('ADP', 10),
+                ('PROPN', 5), ('NUM', 3), ('AUX', 4), ('CCONJ', 3), ('SCONJ', 2)]
+CLOSED_CLASSES = ['PRON', 'DET', 'ADP', 'AUX', 'CCONJ', 'SCONJ']
+XPOS = {'NOUN': 'NN', 'VERB': 'VB', 'ADJ': 'JJ', 'ADV': 'RB', 'PRON': 'PRP', 'DET': 'DT', 'ADP': 'IN',
+        'PROPN': 'NNP', 'NUM': 'CD', 'AUX': 'MD', 'CCONJ': 'CC', 'SCONJ': 'CS', 'PUNCT': 'PUNCT'}
+DEPRELS = {'NOUN': ['nsubj', 'obj', 'obl', 'nmod'], 'VERB': ['ccomp', 'advcl', 'xcomp', 'conj'], 'ADJ': ['amod'],
+           'ADV': ['advmod'], 'PRON': ['nsubj', 'obj'], 'DET': ['det'], 'ADP': ['case'],
+           'PROPN': ['nsubj', 'obj', 'flat'], 'NUM': ['nummod'], 'AUX': ['aux'], 'CCONJ': ['cc'],
+           'SCONJ': ['mark'], 'PUNCT': ['punct']}
+# (feats, suffix) of the forms of each inflected class, the lemma is the stem plus the first suffix
+INFLECTIONS = {
+    'NOUN': [('Number=Sing', ''), ('Number=Plur', 's')],
+    'ADJ': [('Gender=Masc|Number=Sing', ''), ('Gender=Fem|Number=Sing', 'e'), ('Gender=Masc|Number=Plur', 's'),
+            ('Gender=Fem|Number=Plur', 'es')],
+    'VERB': [('VerbForm=Inf', 'er'), ('Mood=Ind|Number=Sing|Person=3|Tense=Pres', 'e'),
+             ('Mood=Ind|Number=Plur|Person=3|Tense=Pres', 'ent'), ('Tense=Past|VerbForm=Part', 'ed')],
+}
+ONSETS = ['', 'b', 'c', 'd', 'f', 'g', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'br', 'ch', 'cl', 'pr', 'st', 'tr']
+VOWELS = ['a', 'e', 'i', 'o', 'u', 'ou', 'ai', 'eu']
+CODAS = ['', '', '', 'n', 'r', 'l', 's', 't']
+
+COMMA_RATE = 0.06
+CONTRACTION_RATE = 0.04
+
+
+def sentence_length(rng, mean, std, min_len=2, max_len=200):
+    """ Draw a sentence length (in tokens) from a log-normal distribution with the given mean and std. """
+    if std <= 0:
+        return max(min_len, min(max_len, int(round(mean))))
+    sigma2 = math.log(1 + (std / mean) ** 2)
+    length = rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+    return max(min_len, min(max_len, int(round(length))))
+
+
+class SyntheticLanguage:
+    """ A random lexicon with a word frequency distribution, from which sentences are generated. """
+
+    def __init__(self, vocab_size=5000, num_contractions=4, seed=1234):
+        rng = random.Random(seed)
+        self.entries = [] # (form, lemma, upos, xpos, feats)
+        self.weights = []
+        forms = set()
+        classes, class_weights = zip(*UPOS_WEIGHTS)
+        for rank in range(vocab_size):
+            upos = rng.choices(classes, weights=class_weights)[0]
+            for attempt in itertools.count():
+                stem = self.make_stem(rng, upos, attempt)
+                inflections = INFLECTIONS.get(upos, [('_', '')])
+                new_forms = [stem + suffix for _, suffix in inflections]
+                if not any(form in forms for form in new_forms):
+                    break
+            lemma = stem + inflections[0][1]
+            for (feats, _), form in zip(inflections, new_forms):
+                forms.add(form)
+                self.entries.append((form, lemma, upos, XPOS[upos], feats))
+                # Zipfian frequency of the lemma, split between its forms
+                self.weights.append(1.0 / (rank + 1) / len(inflections))
+        self.cum_weights = list(itertools.accumulate(self.weights))
+
+        # contractions of the most frequent prepositions and determiners, e.g. "de le" -> "du"
+        adps = [e for e in self.entries if e[2] == 'ADP'][:num_contractions]
+        dets = [e for e in self.entries if e[2] == 'DET'][:num_contractions]
+        self.contractions = []
+        for adp, det in zip(adps, dets):
+            surface = adp[0][:2] + det[0][-1]
+            while surface in forms:
+                surface += rng.choice(VOWELS)
+            forms.add(surface)
+            self.contractions.append((surface, adp, det))
+
+    @staticmethod
+    def make_stem(rng, upos, attempt=0):
+        # stems get longer after repeated collisions, so that large lexicons can always be filled
+        if upos == 'NUM':
+            return str(rng.randint(0, 10 ** rng.randint(1, 4 + attempt // 5)))
+        syllables = 1 if upos in CLOSED_CLASSES and attempt < 5 else rng.randint(1, 3 + attempt // 5)
+        stem = ''.join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS) for _ in range(syllables))
+        return stem.capitalize() if upos == 'PROPN' else stem
+
+    def sentence(self, length, rng):
+        """ Generate a sentence of about length tokens, ending with a period. """
+        tokens = []
+        while len(tokens) < length - 1:
+            if len(tokens) > 0 and rng.random() < COMMA_RATE:
+                tokens.append((',', [(',', ',', 'PUNCT', XPOS['PUNCT'], '_')]))
+            elif len(self.contractions) > 0 and rng.random() < CONTRACTION_RATE:
+                surface, adp, det = rng.choice(self.contractions)
+                tokens.append((surface, [adp, det]))
+            else:
+                entry = rng.choices(self.entries, cum_weights=self.cum_weights)[0]
+                tokens.append((entry[0], [entry]))
+        tokens.append(('.', [('.', '.', 'PUNCT', XPOS['PUNCT'], '_')]))
+
+        words = [entry for _, entries in tokens for entry in entries]
+        heads, deprels = self.random_tree(words, rng)
+        res = []
+        i = 0
+        for surface, entries in tokens:
+            res.append((surface, [entry + (heads[i + j], deprels[i + j]) for j, entry in enumerate(entries)]))
+            i += len(entries)
+        return res
+
+    @staticmethod
+    def random_tree(words, rng):
+        """ Attach the words into a random tree, preferring short dependencies. Punctuation is never a head. """
+        n = len(words)
+        content = [i for i, w in enumerate(words) if w[2] != 'PUNCT']
+        verbs = [i for i in content if words[i][2] == 'VERB']
+        root = rng.choice(verbs) if len(verbs) > 0 else rng.choice(content)
+        heads = [0] * n
+        attached = [root]
+        others = [i for i in range(n) if i != root]
+        rng.shuffle(others)
+        # attach content words first, so that every word finds a content head
+        others.sort(key=lambda i: words[i][2] == 'PUNCT')
+        for i in others:
+            weights = [1.0 / abs(i - j) for j in attached]
+            heads[i] = rng.choices(attached, weights=weights)[0] + 1
+            if words[i][2] != 'PUNCT':
+                attached.append(i)
+        deprels = ['root' if i == root else rng.choice(DEPRELS[w[2]]) for i, w in enumerate(words)]
+        return heads, deprels
+
+    def document(self, num_tokens, mean_len=20, std_len=10, seed=0, max_len=200):
+        """ Generate sentences totalling at least num_tokens tokens. """
+        rng = random.Random(seed)
+        sentences = []
+        count = 0
+        while count < num_tokens:
+            sentence = self.sentence(sentence_length(rng, mean_len, std_len, max_len=max_len), rng)
+            sentences.append(sentence)
+            count += len(sentence)
+        return sentences
+
+
+def no_space_before(surface):
+    return surface in [',', '.']
+
+
+def paragraphs(sentences, sents_per_para):
+    return [sentences[i:i + sents_per_para] for i in range(0, len(sentences), sents_per_para)]
+
+
+def to_text(sentences, sents_per_para=5):
+    """ Raw text of the sentences, with paragraphs separated by blank lines. """
+    res = []
+    for para in paragraphs(sentences, sents_per_para):
+        text = ''
+        for sentence in para:
+            for surface, _ in sentence:
+                if len(text) > 0 and not no_space_before(surface):
+                    text += ' '
+                text += surface
+        res.append(text)
+    return '\n\n'.join(res)
+
+
+def to_tokenizer_data(sentences, sents_per_para=5):
+    """
+    Character-level training data of the tokenizer, as a list of paragraphs of (char, label) pairs. The last
+    character of a token is labeled 1, or 3 for a multi-word token, and 2 or 4 when it also ends a sentence.
+    """
+    res = []
+    for para in paragraphs(sentences, sents_per_para):
+        units = []
+        for sentence in para:
+            for i, (surface, words) in enumerate(sentence):
+                if len(units) > 0 and not no_space_before(surface):
+                    units.append((' ', 0))
+                units += [(c, 0) for c in surface[:-1]]
+                label = 3 if len(words) > 1 else 1
+                if i == len(sentence) - 1:
+                    label += 1
+                units.append((surface[-1], label))
+        res.append(units)
+    return res
+
+
+def to_conllu(sentences):
+    """ CoNLL-U annotation of the sentences, with ranges for multi-word tokens. """
+    lines = []
+    for sentence in sentences:
+        idx = 1
+        for surface, words in sentence:
+            if len(words) > 1:
+                lines.append('{}-{}\t{}\t_\t_\t_\t_\t_\t_\t_\t_'.format(idx, idx + len(words) - 1, surface))
+            for form, lemma, upos, xpos, feats, head, deprel in words:
+                lines.append('\t'.join([str(idx), form, lemma, upos, xpos, feats, str(head), deprel, '_', '_']))
+                idx += 1
+        lines.append('')
+    return '\n'.join(lines) + '\n'
+
+
+def count_tokens(sentences):
+    return sum(len(sentence) for sentence in sentences)
+
+
+def write_vectors(filename, words, dim, seed=1234):
+    """ Write random word vectors in the text format read by Pretrain. """
+    rng = random.Random(seed)
+    with open(filename, 'w') as f:
+        f.write('{} {}\n'.format(len(words), dim))
+        for word in words:
+            f.write('{} {}\n'.format(word, ' '.join('{:.4f}'.format(rng.uniform(-1, 1)) for _ in range(dim))))
@@ -60,7 +60,7 @@ setup(
 
     # You can just specify the packages manually here if your project is
     # simple. Or you can use find_packages().
-    packages=find_packages(exclude=['data', 'docs', 'extern_data', 'figures', 'saved_models']),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*', 'data', 'docs', 'extern_data', 'figures', 'saved_models']),
 
     # List run-time dependencies here.  These will be installed by pip when
     # your project is installed. For an analysis of "install_requires" vs pip's
@@ -75,6 +75,7 @@ setup(
     extras_require={
         'dev': ['check-manifest'],
         'test': ['coverage'],
+        'async': ['aiohttp'],
     },
 
     # If there are data files included in your packages that need to be
@@ -1,4 +1,5 @@
 from stanfordnlp.pipeline.core import Pipeline
 from stanfordnlp.pipeline.doc import Document
+from stanfordnlp.pipeline.manager import PipelineManager
 from stanfordnlp.utils.resources import download
 from stanfordnlp._version import __version__
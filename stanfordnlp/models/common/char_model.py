@@ -2,10 +2,20 @@ import torch
 import torch.nn as nn
 from torch.nn.utils.rnn import pack_sequence, pad_packed_sequence, pack_padded_sequence, PackedSequence
 
-from stanfordnlp.models.common.packed_lstm import PackedLSTM
-from stanfordnlp.models.common.utils import tensor_unsort
+from stanfordnlp.models.common.lru_cache import LRUCache
+from stanfordnlp.models.common.packed_lstm import PackedLSTM, native_lstm_weights
+from stanfordnlp.models.common.utils import tensor_unsort, params_version
+
+# default number of word representations kept by the inference cache. Each entry holds a float vector of
+# char_hidden_dim values (400 by default) plus its key, about 2KB, so the default cache takes about 10MB.
+DEFAULT_CACHE_SIZE = 5000
 
 class CharacterModel(nn.Module):
+    """
+    Word representations computed from characters. At inference, the representations of distinct words are
+    kept in an LRU cache of DEFAULT_CACHE_SIZE entries, which the pos and depparse processors resize from
+    their cache_size setting (e.g. pos_cache_size). A size of 0 disables the cache.
+    """
     def __init__(self, args, vocab, pad=False, bidirectional=False, attention=True):
         super().__init__()
         self.args = args
@@ -27,7 +37,21 @@ class CharacterModel(nn.Module):
 
         self.dropout = nn.Dropout(args['dropout'])
 
-    def forward(self, chars, chars_mask, word_orig_idx, sentlens, wordlens):
+        # inference-time cache of word representations, keyed by the char ids of a word
+        self.cache = LRUCache(DEFAULT_CACHE_SIZE)
+        self.cache_version = None
+
+    def set_cache_size(self, size):
+        """ Replace the inference cache with an empty one holding at most size word representations. """
+        self.cache = LRUCache(size)
+
+    def train(self, mode=True):
+        if mode:
+            self.cache.clear()
+        return super().train(mode)
+
+    def encode(self, chars, wordlens):
+        """ Compute the representations of words sorted by length, given their padded char ids. """
         embs = self.dropout(self.char_emb(chars))
         batch_size = embs.size(0)
         embs = pack_padded_sequence(embs, wordlens, batch_first=True)
@@ -45,6 +69,69 @@ class CharacterModel(nn.Module):
         else:
             h, c = output[1]
             res = h[-2:].transpose(0,1).contiguous().view(batch_size, -1)
+        return res
+
+    def encode_cached(self, chars, wordlens):
+        """
+        Inference version of encode(). Each distinct word in the batch is encoded at most once, and its
+        representation is reused across batches until the weights change.
+        """
+        version = params_version(self.parameters())
+        if version != self.cache_version:
+            self.cache.clear()
+            self.cache_version = version
+
+        keys = [tuple(row[:l]) for row, l in zip(chars.tolist(), wordlens)]
+        reps = dict()
+        missing = [] # positions of the first occurrence of each word that is not cached
+        for i, key in enumerate(keys):
+            if key in reps:
+                continue
+            rep = self.cache.get(key)
+            reps[key] = rep
+            if rep is None:
+                missing.append(i)
+
+        if len(missing) > 0:
+            # words are sorted by length, so the selected rows still are
+            idx = torch.tensor(missing, dtype=torch.long, device=chars.device)
+            missing_lens = [wordlens[i] for i in missing]
+            new_reps = self.encode(chars[idx, :missing_lens[0]], missing_lens)
+            for i, rep in zip(missing, new_reps):
+                reps[keys[i]] = rep
+                self.cache.put(keys[i], rep.clone()) # do not keep the whole batch alive
+
+        unique = {key: j for j, key in enumerate(reps)}
+        table = torch.stack(list(reps.values()))
+        return table[torch.tensor([unique[key] for key in keys], dtype=torch.long, device=chars.device)]
+
+    def padded_forward(self, chars):
+        """
+        Inference version of forward() on the char ids of padded sentences (batch x sentlen x wordlen), which
+        returns padded word representations (batch x sentlen x dim). The words are run through the native LSTM
+        kernel without packing, so that the computation can be traced for export. This is exact because the
+        char LSTM is unidirectional and the attention weights of padding chars are masked out.
+        """
+        assert self.attn and self.num_dir == 1, "Only unidirectional character models with attention can run on padded inputs."
+        lstm_weights = native_lstm_weights(self.charlstm.lstm)
+        assert lstm_weights is not None, "The character LSTM does not hold float LSTM weights."
+        batch_size, sentlen, wordlen = chars.size()
+        chars = chars.view(-1, wordlen)
+        embs = self.char_emb(chars)
+        num_layers = self.args['char_num_layers']
+        hx = (self.charlstm_h_init.expand(num_layers, chars.size(0), self.args['char_hidden_dim']).contiguous(), \
+                self.charlstm_c_init.expand(num_layers, chars.size(0), self.args['char_hidden_dim']).contiguous())
+        char_reps = torch.lstm(embs, hx, lstm_weights[0], lstm_weights[1], num_layers, 0.0, False, False, True)[0]
+        weights = torch.sigmoid(self.char_attn(char_reps)) * chars.ne(0).unsqueeze(2).float()
+        res = (char_reps * weights).sum(1)
+        return res.view(batch_size, sentlen, -1)
+
+    def forward(self, chars, chars_mask, word_orig_idx, sentlens, wordlens):
+        if self.training:
+            res = self.encode(chars, wordlens)
+        else:
+            with torch.no_grad():
+                res = self.encode_cached(chars, wordlens)
 
         # recover character order and word separation
         res = tensor_unsort(res, word_orig_idx)
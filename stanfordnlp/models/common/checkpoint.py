@@ -0,0 +1,168 @@
+"""
+A checkpoint format that is fast to load, for model and pretrain files.
+
+A checkpoint is the same nested structure that would be passed to torch.save(). In the file, the tensors
+and numpy arrays of the structure are stored as raw aligned bytes, and are memory-mapped on load instead
+of being unpickled and copied, so that only the pages that are actually used are read. Long lists of
+strings, such as the unit tables of vocabs, are stored as single null-separated strings, and the
+unit-to-id maps of vocabs are rebuilt from them instead of being stored. What remains of the structure
+(configs, small dicts) is pickled in the header.
+
+Layout: magic, format version, header length, pickled header, then the data section, with every block
+aligned to ALIGNMENT bytes.
+"""
+import importlib
+import os
+import pickle
+import struct
+import numpy as np
+import torch
+
+from collections import OrderedDict
+
+from stanfordnlp.models.common.vocab import BaseVocab
+
+MAGIC = b'SNLPCKPT'
+VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct('<8sIQ') # magic, version, header length
+
+# shortest string list that is stored as a table rather than pickled
+MIN_TABLE_SIZE = 16
+
+TORCH_TO_NUMPY_DTYPE = {torch.float16: np.float16, torch.float32: np.float32, torch.float64: np.float64,
+                        torch.uint8: np.uint8, torch.int8: np.int8, torch.int16: np.int16, torch.int32: np.int32,
+                        torch.int64: np.int64, torch.bool: np.bool_}
+
+class ArrayRef:
+    """ Placeholder for a tensor or an array stored in the data section. """
+    def __init__(self, offset, dtype, shape, is_tensor):
+        self.offset = offset
+        self.dtype = dtype
+        self.shape = shape
+        self.is_tensor = is_tensor
+
+class StringTableRef:
+    """ Placeholder for a list of strings stored in the data section. """
+    def __init__(self, offset, nbytes):
+        self.offset = offset
+        self.nbytes = nbytes
+
+class VocabRef:
+    """ Placeholder for a vocab object, stored as its state dict. """
+    def __init__(self, cls, state):
+        self.cls = cls
+        self.state = state
+
+# marks a unit-to-id map that is the inverse of the unit table of the same vocab
+INVERSE_MAP = '<inverse of _id2unit>'
+
+def is_fast_checkpoint(filename):
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def load_checkpoint(filename):
+    """ Load a checkpoint saved either by save_checkpoint() or by torch.save(), with all tensors on CPU. """
+    if is_fast_checkpoint(filename):
+        return load_fast_checkpoint(filename)
+    return torch.load(filename, lambda storage, loc: storage)
+
+def is_inverse(id2unit, unit2id):
+    if isinstance(id2unit, list) and isinstance(unit2id, dict):
+        return len(id2unit) == len(unit2id) and all(unit2id.get(unit) == i for i, unit in enumerate(id2unit))
+    if isinstance(id2unit, dict) and isinstance(unit2id, dict):
+        return list(id2unit.keys()) == list(unit2id.keys()) and all(is_inverse(id2unit[k], unit2id[k]) for k in id2unit)
+    return False
+
+def invert(id2unit):
+    if isinstance(id2unit, list):
+        return dict(zip(id2unit, range(len(id2unit))))
+    return {k: invert(v) for k, v in id2unit.items()}
+
+class Writer:
+    def __init__(self):
+        self.blocks = []
+        self.size = 0
+
+    def add(self, data):
+        """ Add a block of bytes to the data section, returning its offset in the section. """
+        offset = self.size
+        padding = -len(data) % ALIGNMENT
+        self.blocks += [data, b'\0' * padding]
+        self.size += len(data) + padding
+        return offset
+
+    def pack(self, obj):
+        """ Replace the arrays, string tables and vocabs in a structure by placeholders, recursively. """
+        if isinstance(obj, torch.Tensor) and obj.dtype in TORCH_TO_NUMPY_DTYPE and not obj.is_sparse:
+            array = obj.detach().cpu().contiguous().numpy()
+            return ArrayRef(self.add(array.tobytes()), array.dtype.str, array.shape, True)
+        if isinstance(obj, np.ndarray) and obj.dtype.kind in 'biuf':
+            array = np.ascontiguousarray(obj)
+            return ArrayRef(self.add(array.tobytes()), array.dtype.str, array.shape, False)
+        if isinstance(obj, BaseVocab):
+            cls = type(obj)
+            return VocabRef('{}.{}'.format(cls.__module__, cls.__name__), self.pack(obj.state_dict()))
+        if type(obj) is list and len(obj) >= MIN_TABLE_SIZE and all(type(x) is str and '\0' not in x for x in obj):
+            data = '\0'.join(obj).encode('utf-8')
+            return StringTableRef(self.add(data), len(data))
+        if type(obj) in (dict, OrderedDict):
+            packed = type(obj)((k, self.pack(v)) for k, v in obj.items())
+            if '_id2unit' in obj and '_unit2id' in obj and is_inverse(obj['_id2unit'], obj['_unit2id']):
+                packed['_unit2id'] = INVERSE_MAP
+            return packed
+        if type(obj) in (list, tuple):
+            return type(obj)(self.pack(x) for x in obj)
+        return obj
+
+def save_checkpoint(obj, filename):
+    """ Save a structure of tensors, arrays, vocabs and picklable objects in the fast checkpoint format. """
+    writer = Writer()
+    header = pickle.dumps(writer.pack(obj), protocol=pickle.HIGHEST_PROTOCOL)
+    preamble = PREAMBLE.pack(MAGIC, VERSION, len(header))
+    start = len(preamble) + len(header)
+    with open(filename, 'wb') as f:
+        f.write(preamble)
+        f.write(header)
+        f.write(b'\0' * (-start % ALIGNMENT))
+        for block in writer.blocks:
+            f.write(block)
+
+def unpack(obj, data):
+    """ Resolve the placeholders of a structure against the memory-mapped data section. """
+    if isinstance(obj, ArrayRef):
+        dtype = np.dtype(obj.dtype)
+        nbytes = dtype.itemsize * int(np.prod(obj.shape))
+        array = data[obj.offset:obj.offset + nbytes].view(dtype).reshape(obj.shape)
+        return torch.from_numpy(array) if obj.is_tensor else array
+    if isinstance(obj, StringTableRef):
+        return bytes(data[obj.offset:obj.offset + obj.nbytes]).decode('utf-8').split('\0')
+    if isinstance(obj, VocabRef):
+        module, name = obj.cls.rsplit('.', 1)
+        return getattr(importlib.import_module(module), name).load_state_dict(unpack(obj.state, data))
+    if type(obj) in (dict, OrderedDict):
+        res = type(obj)((k, unpack(v, data)) for k, v in obj.items())
+        if isinstance(res.get('_unit2id'), str) and res['_unit2id'] == INVERSE_MAP:
+            res['_unit2id'] = invert(res['_id2unit'])
+        return res
+    if type(obj) in (list, tuple):
+        return type(obj)(unpack(x, data) for x in obj)
+    return obj
+
+def load_fast_checkpoint(filename):
+    with open(filename, 'rb') as f:
+        magic, version, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        assert magic == MAGIC, "{} is not a fast checkpoint.".format(filename)
+        assert version <= VERSION, "Checkpoint {} has format version {}, only up to {} is supported.".format(filename, version, VERSION)
+        header = pickle.loads(f.read(header_len))
+    start = PREAMBLE.size + header_len
+    start += -start % ALIGNMENT
+    # copy-on-write, so that the tensors are writable while their pages are shared with the page cache
+    if start < os.path.getsize(filename):
+        data = np.memmap(filename, dtype=np.uint8, mode='c', offset=start)
+    else:
+        data = np.zeros(0, dtype=np.uint8)
+    return unpack(header, data)
@@ -9,14 +9,19 @@ FIELD_NUM = 10
 FIELD_TO_IDX = {'id': 0, 'word': 1, 'lemma': 2, 'upos': 3, 'xpos': 4, 'feats': 5, 'head': 6, 'deprel': 7, 'deps': 8, 'misc': 9}
 
 class CoNLLFile():
-    def __init__(self, filename=None, input_str=None, ignore_gapping=True):
+    def __init__(self, filename=None, input_str=None, ignore_gapping=True, sents=None):
         # If ignore_gapping is True, all words that are gap fillers (identified with a period in
         # the sentence index) will be ignored.
+        # Sentences that are already split into lines of fields can be given as sents instead.
 
         self.ignore_gapping = ignore_gapping
         if filename is not None and not os.path.exists(filename):
             raise Exception("File not found at: " + filename)
-        if filename is None:
+        if sents is not None:
+            self._file = None
+            self._from_str = True
+            self._sents = sents
+        elif filename is None:
             assert input_str is not None and len(input_str) > 0
             self._file = input_str
             self._from_str = True
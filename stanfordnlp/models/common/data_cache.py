@@ -0,0 +1,85 @@
+"""
+A binary cache for preprocessed (id-mapped) datasets.
+
+Training runs otherwise re-read the source files, rebuild the vocabularies and re-map every sentence
+on each restart. The cache stores the vocab state and the preprocessed data in one versioned file,
+which is reused as long as the checksum of the source files and the loader settings still match.
+"""
+import hashlib
+import os
+import pickle
+
+# bump this whenever the layout of the preprocessed data changes
+CACHE_VERSION = 1
+
+def file_checksum(filename, chunk_size=1 << 20):
+    """ Compute the md5 checksum of a file's contents. """
+    md5 = hashlib.md5()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+def vocab_checksum(vocab):
+    """ Compute a checksum that identifies the units (in order) of a BaseVocab. """
+    md5 = hashlib.md5()
+    for unit in vocab._id2unit:
+        md5.update(unit.encode('utf-8'))
+        md5.update(b'\0')
+    return md5.hexdigest()
+
+class DataCache:
+    """ A loader and saver for preprocessed data and the vocab it was mapped with. """
+
+    def __init__(self, cache_dir, src_files, name, settings=None):
+        if isinstance(src_files, str):
+            src_files = [src_files]
+        self.src_files = list(src_files)
+        self.settings = settings if settings is not None else dict()
+        self.filename = os.path.join(cache_dir, '{}.{}.cache'.format(os.path.basename(self.src_files[0]), name))
+
+    @property
+    def checksum(self):
+        if not hasattr(self, '_checksum'):
+            md5 = hashlib.md5()
+            for filename in self.src_files:
+                md5.update(file_checksum(filename).encode('utf-8'))
+            md5.update(repr(sorted(self.settings.items())).encode('utf-8'))
+            self._checksum = md5.hexdigest()
+        return self._checksum
+
+    def load(self, vocab_class, vocab=None):
+        """
+        Load the cached vocab and data. If a vocab is provided, the cache is only used if it was
+        built with an identical vocab. Returns None if no valid cache exists.
+        """
+        if not os.path.exists(self.filename):
+            return None
+        try:
+            with open(self.filename, 'rb') as f:
+                cached = pickle.load(f)
+        except BaseException as e:
+            print("Data cache exists but cannot be loaded from {}, due to the following exception:".format(self.filename))
+            print("\t{}".format(e))
+            return None
+        if cached.get('version') != CACHE_VERSION or cached.get('checksum') != self.checksum:
+            print("Data cache at {} is out of date, rebuilding...".format(self.filename))
+            return None
+        if vocab is None:
+            vocab = vocab_class.load_state_dict(cached['vocab'])
+        elif vocab.state_dict() != cached['vocab']:
+            print("Data cache at {} was built with a different vocab, rebuilding...".format(self.filename))
+            return None
+        print("Loaded preprocessed data from {}".format(self.filename))
+        return vocab, cached['data']
+
+    def save(self, vocab, data):
+        cached = {'version': CACHE_VERSION, 'checksum': self.checksum, 'vocab': vocab.state_dict(), 'data': data}
+        try:
+            os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+            with open(self.filename, 'wb') as f:
+                pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+            print("Saved preprocessed data to {}".format(self.filename))
+        except BaseException as e:
+            print("Saving data cache failed due to the following exception... continuing anyway")
+            print("\t{}".format(e))
@@ -0,0 +1,80 @@
+"""
+Export of trained networks to TorchScript and ONNX, and loading of the exported TorchScript modules.
+
+An exported module takes padded tensors and returns scores, and is saved together with the config and
+vocab of the model, so that the trainers can load it in place of the eager model.
+"""
+import pickle
+import torch
+import torch.nn as nn
+from torch.nn.utils.rnn import pad_sequence
+
+from stanfordnlp.models.common.utils import tensor_unsort
+
+TORCHSCRIPT_SUFFIX = '.torchscript.pt'
+ONNX_SUFFIX = '.onnx'
+
+# names of the files stored next to the serialized TorchScript code
+CONFIG_FILE = 'config.pkl'
+VOCAB_FILE = 'vocab.pkl'
+
+class ScoresModule(nn.Module):
+    """ Wrap a model so that its inference-only scores() method is the one traced. """
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, *inputs):
+        return self.model.scores(*inputs)
+
+def is_torchscript(filename):
+    return filename is not None and filename.endswith(TORCHSCRIPT_SUFFIX)
+
+def is_scripted(model):
+    return isinstance(model, torch.jit.ScriptModule)
+
+def pad_wordchars(wordchars, word_orig_idx, sentlens):
+    """
+    Rearrange the char ids of words sorted by length (words x wordlen), as built by the data loaders,
+    into the char ids of padded sentences (batch x sentlen x wordlen).
+    """
+    wordchars = tensor_unsort(wordchars, word_orig_idx)
+    return pad_sequence(wordchars.split(sentlens), batch_first=True)
+
+def save_torchscript(module, example_inputs, filename, args, vocab):
+    """ Trace a module in eval mode on example inputs, and save it with the config and vocab of the model. """
+    module.eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(module, example_inputs, check_trace=False)
+    extra_files = {CONFIG_FILE: pickle.dumps(args), VOCAB_FILE: pickle.dumps(vocab.state_dict())}
+    try:
+        torch.jit.save(traced, filename, _extra_files=extra_files)
+        print("TorchScript model saved to {}".format(filename))
+    except BaseException as e:
+        print("Cannot save TorchScript model to {} due to the following exception:".format(filename))
+        print("\t{}".format(e))
+    return traced
+
+def load_torchscript(filename):
+    """
+    Load an exported module on CPU, returning it with the config and vocab state dict it was saved with.
+    Raises an Exception if the file cannot be loaded.
+    """
+    extra_files = {CONFIG_FILE: '', VOCAB_FILE: ''}
+    try:
+        model = torch.jit.load(filename, map_location='cpu', _extra_files=extra_files)
+    except Exception as e:
+        raise Exception("Cannot load TorchScript model from {}".format(filename)) from e
+    return model, pickle.loads(extra_files[CONFIG_FILE]), pickle.loads(extra_files[VOCAB_FILE])
+
+def save_onnx(module, example_inputs, filename, input_names, output_names, dynamic_axes):
+    """ Export a module to ONNX, for use with external runtimes. Failures are reported but not fatal. """
+    module.eval()
+    try:
+        with torch.no_grad():
+            torch.onnx.export(module, example_inputs, filename, input_names=input_names, output_names=output_names,
+                    dynamic_axes=dynamic_axes, opset_version=11)
+        print("ONNX model saved to {}".format(filename))
+    except BaseException as e:
+        print("Cannot export ONNX model to {} due to the following exception:".format(filename))
+        print("\t{}".format(e))
@@ -3,7 +3,8 @@ import torch.nn as nn
 import torch.nn.functional as F
 from torch.nn.utils.rnn import pad_packed_sequence, pack_padded_sequence, pack_sequence, PackedSequence
 
-from stanfordnlp.models.common.packed_lstm import PackedLSTM
+from stanfordnlp.models.common.packed_lstm import PackedLSTM, native_lstm_weights
+from stanfordnlp.models.common.utils import params_version
 
 # Highway LSTM Cell (Zhang et al. (2018) Highway Long Short-Term Memory RNNs for Distant Speech Recognition)
 class HLSTMCell(nn.modules.rnn.RNNCellBase):
@@ -81,7 +82,19 @@ class HighwayLSTM(nn.Module):
             self.gate[-1].bias.data.zero_()
             in_size = hidden_size * self.num_directions
 
+        # fused gate and highway weights for the inference path, keyed by layer
+        self.fused_highway = {}
+
+    def train(self, mode=True):
+        if mode:
+            self.fused_highway = {}
+        return super().train(mode)
+
     def forward(self, input, seqlens, hx=None):
+        if not self.training:
+            with torch.no_grad():
+                return self.inference_forward(input, seqlens, hx)
+
         highway_func = (lambda x: x) if self.highway_func is None else self.highway_func
 
         hs = []
@@ -105,6 +118,58 @@ class HighwayLSTM(nn.Module):
             input = pad_packed_sequence(input, batch_first=self.batch_first)[0]
         return input, (torch.cat(hs, 0), torch.cat(cs, 0))
 
+    def inference_forward(self, input, seqlens, hx=None):
+        """
+        Forward pass for inference, numerically equivalent to forward() in eval mode. Dropout is inactive,
+        so each layer runs the native (bidirectional) LSTM kernel directly on the packed data, even when the
+        layer was trained with recurrent dropout, and the gate and highway linears share one matmul. Layers that
+        were replaced by other implementations (e.g. dynamically quantized ones) are called as they are.
+        """
+        highway_func = (lambda x: x) if self.highway_func is None else self.highway_func
+
+        if not isinstance(input, PackedSequence):
+            input = pack_padded_sequence(input, seqlens, batch_first=self.batch_first)
+        data, batch_sizes = input.data, input.batch_sizes
+        if hx is None:
+            zeros = data.new_zeros(self.num_layers * self.num_directions, batch_sizes[0].item(), self.hidden_size)
+            hx = (zeros, zeros)
+
+        hs = []
+        cs = []
+        for l in range(self.num_layers):
+            layer_hx = [hx[i][l * self.num_directions:(l+1)*self.num_directions].contiguous() for i in range(2)]
+            lstm_weights = native_lstm_weights(self.lstm[l].lstm)
+            if lstm_weights is not None:
+                h, ht, ct = torch.lstm(data, batch_sizes, layer_hx, lstm_weights[0], lstm_weights[1], 1, 0.0, False, self.bidirectional)
+            else:
+                h, (ht, ct) = self.lstm[l].lstm(PackedSequence(data, batch_sizes), tuple(layer_hx))
+                h = h.data
+
+            hs.append(ht)
+            cs.append(ct)
+
+            if isinstance(self.gate[l], nn.Linear) and isinstance(self.highway[l], nn.Linear):
+                weight, bias = self.get_fused_highway(l)
+                gate, highway = F.linear(data, weight, bias).chunk(2, 1)
+            else:
+                gate, highway = self.gate[l](data), self.highway[l](data)
+            data = h + torch.sigmoid(gate) * highway_func(highway)
+
+        input = PackedSequence(data, batch_sizes)
+        if self.pad:
+            input = pad_packed_sequence(input, batch_first=self.batch_first)[0]
+        return input, (torch.cat(hs, 0), torch.cat(cs, 0))
+
+    def get_fused_highway(self, l):
+        """ Get the gate and highway weights of layer l stacked into a single linear layer. """
+        params = list(self.gate[l].parameters()) + list(self.highway[l].parameters())
+        version = params_version(params)
+        if l not in self.fused_highway or self.fused_highway[l][0] != version:
+            weight = torch.cat([self.gate[l].weight, self.highway[l].weight], 0)
+            bias = torch.cat([self.gate[l].bias, self.highway[l].bias], 0)
+            self.fused_highway[l] = (version, weight, bias)
+        return self.fused_highway[l][1:]
+
 if __name__ == "__main__":
     T = 10
     bidir = True
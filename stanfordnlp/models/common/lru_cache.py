@@ -0,0 +1,51 @@
+"""
+A small bounded cache with least-recently-used eviction, for memoizing model predictions.
+"""
+import threading
+
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    A dict-like cache holding at most `capacity` entries. A capacity of 0 or less disables caching.
+    It can be shared by threads, e.g. by a processor that several threads run.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """ Look up a key, marking it as most recently used. """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """ Add or update an entry, evicting the least recently used one if the cache is full. """
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
@@ -49,34 +49,40 @@ class LSTMwRecDropout(nn.Module):
         def rnn_loop(x, batch_sizes, cell, inits, reverse=False):
             # RNN loop for one layer in one direction with recurrent dropout
             # Assumes input is PackedSequence, returns PackedSequence as well
-            batch_size = batch_sizes[0].item()
-            states = [list(init.split([1] * batch_size)) for init in inits]
+            # The states are kept as single (batch, hidden) tensors. Since a PackedSequence is sorted by length,
+            # the first bs rows are the active ones at each step, and the remaining rows already hold their
+            # final states.
+            batch_sizes = batch_sizes.tolist()
+            batch_size = batch_sizes[0]
+            h, c = inits
             h_drop_mask = x.new_ones(batch_size, self.hidden_size)
             h_drop_mask = self.rec_drop(h_drop_mask)
             resh = []
 
+            def step(x_t, h, c, bs):
+                h_t, c_t = cell(x_t, (h[:bs] * h_drop_mask[:bs], c[:bs]))
+                if bs < batch_size:
+                    h = torch.cat([h_t, h[bs:]], 0)
+                    c = torch.cat([c_t, c[bs:]], 0)
+                else:
+                    h, c = h_t, c_t
+                return h_t, h, c
+
             if not reverse:
                 st = 0
                 for bs in batch_sizes:
-                    s1 = cell(x[st:st+bs], (torch.cat(states[0][:bs], 0) * h_drop_mask[:bs], torch.cat(states[1][:bs], 0)))
-                    resh.append(s1[0])
-                    for j in range(bs):
-                        states[0][j] = s1[0][j].unsqueeze(0)
-                        states[1][j] = s1[1][j].unsqueeze(0)
+                    h_t, h, c = step(x[st:st+bs], h, c, bs)
+                    resh.append(h_t)
                     st += bs
             else:
                 en = x.size(0)
-                for i in range(batch_sizes.size(0)-1, -1, -1):
-                    bs = batch_sizes[i]
-                    s1 = cell(x[en-bs:en], (torch.cat(states[0][:bs], 0) * h_drop_mask[:bs], torch.cat(states[1][:bs], 0)))
-                    resh.append(s1[0])
-                    for j in range(bs):
-                        states[0][j] = s1[0][j].unsqueeze(0)
-                        states[1][j] = s1[1][j].unsqueeze(0)
+                for bs in reversed(batch_sizes):
+                    h_t, h, c = step(x[en-bs:en], h, c, bs)
+                    resh.append(h_t)
                     en -= bs
                 resh = list(reversed(resh))
 
-            return torch.cat(resh, 0), tuple(torch.cat(s, 0) for s in states)
+            return torch.cat(resh, 0), (h, c)
 
         all_states = [[], []]
         inputdata, batch_sizes = input.data, input.batch_sizes
@@ -88,7 +94,7 @@ class LSTMwRecDropout(nn.Module):
             for d in range(self.num_directions):
                 idx = l * self.num_directions + d
                 cell = self.cells[idx]
-                out, states = rnn_loop(inputdata, batch_sizes, cell, (hx[i][idx] for i in range(2)) if hx is not None else (input.data.new_zeros(input.batch_sizes[0].item(), self.hidden_size, requires_grad=False) for _ in range(2)), reverse=(d == 1))
+                out, states = rnn_loop(inputdata, batch_sizes, cell, tuple(hx[i][idx] for i in range(2)) if hx is not None else tuple(input.data.new_zeros(input.batch_sizes[0].item(), self.hidden_size, requires_grad=False) for _ in range(2)), reverse=(d == 1))
 
                 new_input.append(out)
                 all_states[0].append(states[0].unsqueeze(0))
@@ -103,3 +109,20 @@ class LSTMwRecDropout(nn.Module):
         input = PackedSequence(inputdata, batch_sizes)
 
         return input, tuple(torch.cat(x, 0) for x in all_states)
+
+def native_lstm_weights(lstm):
+    """
+    Get the weights of an nn.LSTM, or of an LSTMwRecDropout whose recurrent dropout is inactive at inference,
+    in the flat layout expected by the native LSTM kernel (torch.lstm), together with whether they include
+    biases. Returns None for other implementations, e.g. dynamically quantized LSTMs.
+    """
+    if isinstance(lstm, nn.LSTM):
+        return [w for weights in lstm.all_weights for w in weights], lstm.bias
+    if not isinstance(lstm, LSTMwRecDropout) or not all(isinstance(cell, nn.LSTMCell) for cell in lstm.cells):
+        return None
+    weights = []
+    for cell in lstm.cells:
+        weights += [cell.weight_ih, cell.weight_hh]
+        if cell.bias:
+            weights += [cell.bias_ih, cell.bias_hh]
+    return weights, lstm.cells[0].bias
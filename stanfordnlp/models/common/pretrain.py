@@ -6,6 +6,7 @@ import lzma
 import numpy as np
 import torch
 
+from .checkpoint import load_checkpoint
 from .vocab import BaseVocab, VOCAB_PREFIX
 
 class PretrainedWordVocab(BaseVocab):
@@ -35,7 +36,7 @@ class Pretrain:
     def load(self):
         if os.path.exists(self.filename):
             try:
-                data = torch.load(self.filename, lambda storage, loc: storage)
+                data = load_checkpoint(self.filename)
             except BaseException as e:
                 print("Pretrained file exists but cannot be loaded from {}, due to the following exception:".format(self.filename))
                 print("\t{}".format(e))
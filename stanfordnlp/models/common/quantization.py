@@ -0,0 +1,35 @@
+"""
+Dynamic int8 quantization of trained models, for faster CPU inference.
+"""
+import io
+import torch
+import torch.nn as nn
+
+from stanfordnlp.models.common.seq2seq_modules import LinearAttention
+
+# module types that are replaced by their dynamically quantized versions
+QUANTIZABLE_MODULES = (nn.LSTM, nn.LSTMCell, nn.Linear)
+
+# modules that read the weights of their children directly, and so have to stay in float
+FLOAT_ONLY_MODULES = (LinearAttention,)
+
+def quantize_model(model):
+    """
+    Quantize the LSTM and Linear layers of a model to int8 in place, with activations quantized
+    dynamically at run time. The model is switched to eval mode, as the result is only meant for
+    inference on CPU.
+    """
+    model.eval()
+    float_only = set()
+    for name, module in model.named_modules():
+        if isinstance(module, FLOAT_ONLY_MODULES):
+            float_only.update(name + '.' + child for child, _ in module.named_modules() if child)
+    names = set(name for name, module in model.named_modules()
+            if type(module) in QUANTIZABLE_MODULES and name not in float_only)
+    return torch.quantization.quantize_dynamic(model, names, dtype=torch.qint8, inplace=True)
+
+def model_size(model):
+    """ The size in bytes of a model's serialized state dict. """
+    with io.BytesIO() as f:
+        torch.save(model.state_dict(), f)
+        return f.tell()
@@ -10,7 +10,6 @@ import numpy as np
 import stanfordnlp.models.common.seq2seq_constant as constant
 from stanfordnlp.models.common import utils
 from stanfordnlp.models.common.seq2seq_modules import LSTMAttention
-from stanfordnlp.models.common.beam import Beam
 
 class Seq2SeqModel(nn.Module):
     """
@@ -110,10 +109,10 @@ class Seq2SeqModel(nn.Module):
 
     def encode(self, enc_inputs, lens):
         """ Encode source sequence. """
-        self.h0, self.c0 = self.zero_state(enc_inputs)
+        h0, c0 = self.zero_state(enc_inputs)
 
         packed_inputs = nn.utils.rnn.pack_padded_sequence(enc_inputs, lens, batch_first=True)
-        packed_h_in, (hn, cn) = self.encoder(packed_inputs, (self.h0, self.c0))
+        packed_h_in, (hn, cn) = self.encoder(packed_inputs, (h0, c0))
         h_in, _ = nn.utils.rnn.pad_packed_sequence(packed_h_in, batch_first=True)
         hn = torch.cat((hn[-1], hn[-2]), 1)
         cn = torch.cat((cn[-1], cn[-2]), 1)
@@ -130,6 +129,16 @@ class Seq2SeqModel(nn.Module):
         log_probs = self.get_log_prob(decoder_logits)
         return log_probs, dec_hidden
 
+    def decode_step(self, dec_inputs, hn, cn, ctx, ctx_mask=None, ctx_keys=None):
+        """
+        Decode a single step from embedded inputs of batch x emb_dim. ctx_keys are the attention keys
+        from self.decoder.precompute(ctx), so that the context is only projected once per sequence.
+        Returns log probs of batch x vocab_size and the new decoder states.
+        """
+        h_out, dec_hidden = self.decoder.step(dec_inputs, (hn, cn), ctx, ctx_mask, ctx_keys)
+        log_probs = self.get_log_prob(self.dec2vocab(h_out))
+        return log_probs, dec_hidden
+
     def forward(self, src, src_mask, tgt_in, pos=None):
         # prepare for encoder/decoder
         enc_inputs = self.emb_drop(self.embedding(src))
@@ -159,7 +168,7 @@ class Seq2SeqModel(nn.Module):
         return log_probs.view(logits.size(0), logits.size(1), logits.size(2))
 
     def predict(self, src, src_mask, pos=None, beam_size=5):
-        """ Predict with beam search. """
+        """ Predict with beam search, or greedy decoding if beam_size is 1. """
         enc_inputs = self.embedding(src)
         batch_size = enc_inputs.size(0)
         src_lens = list(src_mask.data.eq(constant.PAD_ID).long().sum(1))
@@ -176,51 +185,121 @@ class Seq2SeqModel(nn.Module):
         else:
             edit_logits = None
         
+        # attention keys only depend on the source, so compute them once for all steps and hypotheses
+        with torch.no_grad():
+            ctx_keys = self.decoder.precompute(h_in.data)
+
+        if beam_size == 1:
+            all_hyp = self.greedy_search(h_in.data, src_mask, hn.data, cn.data, ctx_keys, batch_size)
+            return all_hyp, edit_logits
+
         # (2) set up beam
         with torch.no_grad():
             h_in = h_in.data.repeat(beam_size, 1, 1) # repeat data for beam search
             src_mask = src_mask.repeat(beam_size, 1)
+            if ctx_keys is not None:
+                ctx_keys = ctx_keys.repeat(beam_size, *[1] * (ctx_keys.dim() - 1))
             # repeat decoder hidden states
             hn = hn.data.repeat(beam_size, 1)
             cn = cn.data.repeat(beam_size, 1)
-        beam = [Beam(beam_size, self.use_cuda) for _ in range(batch_size)]
+        all_hyp = self.beam_search(h_in, src_mask, hn, cn, ctx_keys, batch_size, beam_size)
+        return all_hyp, edit_logits
+
+    def greedy_search(self, h_in, src_mask, hn, cn, ctx_keys, batch_size):
+        """
+        Batched greedy decoding. Rows that have emitted EOS are dropped from the decoder inputs and states,
+        so later steps only run on the unfinished examples.
+        """
+        device = h_in.device
+        active = torch.arange(batch_size, device=device) # original indices of the unfinished rows
+        next_ys = torch.full((batch_size,), constant.SOS_ID, dtype=torch.long, device=device)
+        output = torch.full((batch_size, self.max_dec_len), constant.PAD_ID, dtype=torch.long, device=device)
+
+        for i in range(self.max_dec_len):
+            dec_inputs = self.embedding(next_ys)
+            log_probs, (hn, cn) = self.decode_step(dec_inputs, hn, cn, h_in, src_mask, ctx_keys)
+            next_ys = log_probs.data.max(1)[1]
+            output[active, i] = next_ys
+
+            unfinished = next_ys.ne(constant.EOS_ID)
+            if not unfinished.any():
+                break
+            if not unfinished.all():
+                keep = unfinished.nonzero().view(-1)
+                active, next_ys = active[keep], next_ys[keep]
+                hn, cn = hn[keep], cn[keep]
+                h_in, src_mask = h_in[keep], src_mask[keep]
+                if ctx_keys is not None:
+                    ctx_keys = ctx_keys[keep]
+
+        output = output[:, :i+1].tolist()
+        all_hyp = [utils.prune_hyp(hyp) for hyp in output]
+        return all_hyp
+
+    def beam_search(self, h_in, src_mask, hn, cn, ctx_keys, batch_size, beam_size):
+        """
+        Batched beam search over all examples at once.
 
-        def update_state(states, idx, positions, beam_size):
-            """ Select the states according to back pointers. """
-            for e in states:
-                br, d = e.size()
-                s = e.contiguous().view(beam_size, br // beam_size, d)[:,idx]
-                s.data.copy_(s.data.index_select(0, positions))
+        All inputs are repeated beam_size times along the batch dimension, so that row k * batch_size + b
+        holds hypothesis k of example b. Scores, tokens and back pointers are kept as [batch, beam]
+        tensors; as with the per-example Beam, an example stops advancing once its top hypothesis emits
+        EOS, and decoding stops when all examples are done.
+        """
+        device = h_in.device
+        scores = torch.zeros(batch_size, beam_size, device=device)
+        done = torch.zeros(batch_size, dtype=torch.bool, device=device)
+        lens = [self.max_dec_len] * batch_size # number of decoded steps for each example
+        beam_idx = torch.arange(beam_size, device=device).unsqueeze(0).expand(batch_size, beam_size)
+        next_ys = torch.full((batch_size, beam_size), constant.PAD_ID, dtype=torch.long, device=device)
+        next_ys[:, 0] = constant.SOS_ID
+        all_ys, all_ks = [], []
 
         # (3) main loop
         for i in range(self.max_dec_len):
-            dec_inputs = torch.stack([b.get_current_state() for b in beam]).t().contiguous().view(-1, 1)
-            dec_inputs = self.embedding(dec_inputs)
-            log_probs, (hn, cn) = self.decode(dec_inputs, hn, cn, h_in, src_mask)
-            log_probs = log_probs.view(beam_size, batch_size, -1).transpose(0,1)\
-                    .contiguous() # [batch, beam, V]
-
-            # advance each beam
-            done = []
-            for b in range(batch_size):
-                is_done = beam[b].advance(log_probs.data[b])
-                if is_done:
-                    done += [b]
-                # update beam state
-                update_state((hn, cn), b, beam[b].get_current_origin(), beam_size)
-
-            if len(done) == batch_size:
+            dec_inputs = self.embedding(next_ys.t().contiguous().view(-1))
+            log_probs, (hn, cn) = self.decode_step(dec_inputs, hn, cn, h_in, src_mask, ctx_keys)
+            log_probs = log_probs.data.view(beam_size, batch_size, -1).transpose(0,1).contiguous() # [batch, beam, V]
+            num_words = log_probs.size(2)
+
+            if i == 0:
+                # first step, expand from the first position
+                beam_lk = log_probs[:, 0]
+            else:
+                beam_lk = (log_probs + scores.unsqueeze(2)).view(batch_size, -1)
+            best_scores, best_ids = beam_lk.topk(beam_size, 1, True, True)
+            prev_ks = best_ids // num_words
+            next_ys = best_ids - prev_ks * num_words
+
+            # finished examples keep their scores and states
+            scores = torch.where(done.unsqueeze(1), scores, best_scores)
+            prev_ks = torch.where(done.unsqueeze(1), beam_idx, prev_ks)
+            all_ys.append(next_ys)
+            all_ks.append(prev_ks)
+
+            # end condition is when top-of-beam is EOS
+            newly_done = next_ys[:, 0].eq(constant.EOS_ID) & ~done
+            for b in newly_done.nonzero().view(-1).tolist():
+                lens[b] = i + 1
+            done = done | newly_done
+            if done.all():
                 break
 
+            # select the states according to back pointers
+            index = prev_ks.t().unsqueeze(2).expand(beam_size, batch_size, hn.size(-1))
+            hn = hn.view(beam_size, batch_size, -1).gather(0, index).view(beam_size * batch_size, -1)
+            cn = cn.view(beam_size, batch_size, -1).gather(0, index).view(beam_size * batch_size, -1)
+
         # back trace and find hypothesis
-        all_hyp, all_scores = [], []
+        best_ks = scores.sort(1, True)[1][:, 0].tolist()
+        all_ys = torch.stack(all_ys).tolist()
+        all_ks = torch.stack(all_ks).tolist()
+        all_hyp = []
         for b in range(batch_size):
-            scores, ks = beam[b].sort_best()
-            all_scores += [scores[0]]
-            k = ks[0]
-            hyp = beam[b].get_hyp(k)
-            hyp = utils.prune_hyp(hyp)
+            k = best_ks[b]
+            hyp = []
+            for j in range(min(lens[b], len(all_ys)) - 1, -1, -1):
+                hyp.append(all_ys[j][b][k])
+                k = all_ks[j][b][k]
+            hyp = utils.prune_hyp(hyp[::-1])
             all_hyp += [hyp]
-
-        return all_hyp, edit_logits
-
+        return all_hyp
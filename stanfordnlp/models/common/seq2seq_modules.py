@@ -22,16 +22,22 @@ class BasicAttention(nn.Module):
         self.tanh = nn.Tanh()
         self.sm = nn.Softmax(dim=1)
 
-    def forward(self, input, context, mask=None, attn_only=False):
+    def precompute(self, context):
+        """ Project the context once, so that it can be reused at every decoding step. """
+        batch_size, source_len, dim = context.size()
+        return self.linear_c(context.contiguous().view(-1, dim)).view(batch_size, source_len, dim)
+
+    def forward(self, input, context, mask=None, attn_only=False, keys=None):
         """
         input: batch x dim
         context: batch x sourceL x dim
+        keys: the output of precompute(context), or None to compute it here
         """
         batch_size = context.size(0)
         source_len = context.size(1)
         dim = context.size(2)
         target = self.linear_in(input) # batch x dim
-        source = self.linear_c(context.contiguous().view(-1, dim)).view(batch_size, source_len, dim)
+        source = keys if keys is not None else self.precompute(context)
         attn = target.unsqueeze(1).expand_as(context) + source
         attn = self.tanh(attn) # batch x sourceL x dim
         attn = self.linear_v(attn.view(-1, dim)).view(batch_size, source_len)
@@ -65,11 +71,16 @@ class SoftDotAttention(nn.Module):
         self.tanh = nn.Tanh()
         self.mask = None
 
-    def forward(self, input, context, mask=None, attn_only=False):
+    def precompute(self, context):
+        """ Nothing to precompute: the context is used as is. """
+        return None
+
+    def forward(self, input, context, mask=None, attn_only=False, keys=None):
         """Propogate input through the network.
 
         input: batch x dim
         context: batch x sourceL x dim
+        keys: unused, kept for a common interface with the other attention layers
         """
         target = self.linear_in(input).unsqueeze(2)  # batch x dim x 1
 
@@ -108,18 +119,26 @@ class LinearAttention(nn.Module):
         self.tanh = nn.Tanh()
         self.mask = None
 
-    def forward(self, input, context, mask=None, attn_only=False):
+    def precompute(self, context):
+        """ Compute the context-only term W_v v once, so that it can be reused at every decoding step. """
+        batch_size, source_len, dim = context.size()
+        w_v = self.linear.weight[:, dim:2*dim]
+        return context.contiguous().view(-1, dim).mm(w_v.t()).view(batch_size, source_len)
+
+    def forward(self, input, context, mask=None, attn_only=False, keys=None):
         """
         input: batch x dim
         context: batch x sourceL x dim
+        keys: the output of precompute(context), or None to compute it here
         """
         batch_size = context.size(0)
         source_len = context.size(1)
         dim = context.size(2)
-        u = input.unsqueeze(1).expand_as(context).contiguous().view(-1, dim)  # batch*sourceL x dim
-        v = context.contiguous().view(-1, dim)
-        attn_in = torch.cat((u, v, u.mul(v)), 1)
-        attn = self.linear(attn_in).view(batch_size, source_len)
+        # W (u; v; u o v) = W_u u + W_v v + (W_uv o u) v, so only the input terms change at each step
+        w_u, w_uv = self.linear.weight[:, :dim], self.linear.weight[:, 2*dim:]
+        source = keys if keys is not None else self.precompute(context)
+        target = input.mm(w_u.t()) # batch x 1
+        attn = torch.bmm(context, input.mul(w_uv).unsqueeze(2)).squeeze(2) + source + target
 
         if mask is not None:
             # sett the padding attention logits to -inf
@@ -154,18 +173,23 @@ class DeepAttention(nn.Module):
         self.tanh = nn.Tanh()
         self.mask = None
 
-    def forward(self, input, context, mask=None, attn_only=False):
+    def precompute(self, context):
+        """ Project the context once, so that it can be reused at every decoding step. """
+        batch_size, source_len, dim = context.size()
+        return self.relu(self.linear_in(context.contiguous().view(-1, dim))).view(batch_size, source_len, dim)
+
+    def forward(self, input, context, mask=None, attn_only=False, keys=None):
         """
         input: batch x dim
         context: batch x sourceL x dim
+        keys: the output of precompute(context), or None to compute it here
         """
         batch_size = context.size(0)
         source_len = context.size(1)
         dim = context.size(2)
-        u = input.unsqueeze(1).expand_as(context).contiguous().view(-1, dim)  # batch*sourceL x dim
-        u = self.relu(self.linear_in(u))
-        v = self.relu(self.linear_in(context.contiguous().view(-1, dim)))
-        attn = self.linear_v(u.mul(v)).view(batch_size, source_len)
+        u = self.relu(self.linear_in(input)).unsqueeze(1) # batch x 1 x dim
+        v = keys if keys is not None else self.precompute(context)
+        attn = self.linear_v(u.mul(v).view(-1, dim)).view(batch_size, source_len)
 
         if mask is not None:
             # sett the padding attention logits to -inf
@@ -207,17 +231,33 @@ class LSTMAttention(nn.Module):
             raise Exception("Unsupported LSTM attention type: {}".format(attn_type))
         print("Using {} attention for LSTM.".format(attn_type))
 
-    def forward(self, input, hidden, ctx, ctx_mask=None):
+    def precompute(self, ctx):
+        """ Precompute the attention keys for a context, to be shared by all decoding steps. """
+        return self.attention_layer.precompute(ctx)
+
+    def step(self, input, hidden, ctx, ctx_mask=None, ctx_keys=None):
+        """
+        Run a single decoding step.
+
+        input: batch x input_size
+        ctx_keys: the output of precompute(ctx), or None to compute it here
+        """
+        hidden = self.lstm_cell(input, hidden)
+        hy, cy = hidden
+        h_tilde, alpha = self.attention_layer(hy, ctx, mask=ctx_mask, keys=ctx_keys)
+        return h_tilde, hidden
+
+    def forward(self, input, hidden, ctx, ctx_mask=None, ctx_keys=None):
         """Propogate input through the network.""" 
         if self.batch_first:
             input = input.transpose(0,1)
+        if ctx_keys is None:
+            ctx_keys = self.precompute(ctx)
 
         output = []
         steps = range(input.size(0))
         for i in steps:
-            hidden = self.lstm_cell(input[i], hidden)
-            hy, cy = hidden
-            h_tilde, alpha = self.attention_layer(hy, ctx, mask=ctx_mask)
+            h_tilde, hidden = self.step(input[i], hidden, ctx, ctx_mask, ctx_keys)
             output.append(h_tilde)
         output = torch.cat(output, 0).view(input.size(0), *output[0].size())
 
@@ -1,5 +1,7 @@
 import torch
 
+from stanfordnlp.models.common.checkpoint import load_checkpoint
+
 class Trainer:
     def change_lr(self, new_lr):
         for param_group in self.optimizer.param_groups:
@@ -13,7 +15,7 @@ class Trainer:
         torch.save(savedict, filename)
 
     def load(self, filename):
-        savedict = torch.load(filename, lambda storage, loc: storage)
+        savedict = load_checkpoint(filename)
 
         self.model.load_state_dict(savedict['model'])
         if self.args['mode'] == 'train':
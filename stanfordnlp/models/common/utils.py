@@ -116,6 +116,10 @@ def keep_partial_grad(grad, topk):
 # other utils
 
 
+def params_version(params):
+    """ A key that changes whenever any of the given parameters is replaced or modified in place. """
+    return tuple((p.data_ptr(), p._version) for p in params)
+
 def ensure_dir(d, verbose=True):
     if not os.path.exists(d):
         if verbose:
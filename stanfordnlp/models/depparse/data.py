@@ -3,6 +3,7 @@ import torch
 
 from stanfordnlp.models.common.data import map_to_ids, get_long_tensor, get_float_tensor, sort_all
 from stanfordnlp.models.common import conll
+from stanfordnlp.models.common.data_cache import DataCache, vocab_checksum
 from stanfordnlp.models.common.vocab import PAD_ID, VOCAB_PREFIX, ROOT_ID, CompositeVocab
 from stanfordnlp.models.pos.vocab import CharVocab, WordVocab, XPOSVocab, FeatureVocab, MultiVocab
 from stanfordnlp.models.pos.xpos_vocab_factory import xpos_vocab_factory
@@ -21,20 +22,30 @@ class DataLoader:
         self.cutoff = cutoff
 
         # check if input source is a file or a Document object
-        if isinstance(input_src, str):
+        data_cache = self.get_data_cache(input_src, pretrain)
+        cached = data_cache.load(MultiVocab, vocab=vocab) if data_cache is not None else None
+        if cached is not None:
             filename = input_src
-            assert filename.endswith('conllu'), "Loaded file must be conllu file."
-            self.conll, data = self.load_file(filename, evaluation=self.eval)
-        elif isinstance(input_src, Document):
-            filename = None
-            doc = input_src
-            self.conll, data = self.load_doc(doc)
-
-        # handle vocab
-        if vocab is None:
-            self.vocab = self.init_vocab(data)
+            self.conll = conll.CoNLLFile(filename)
+            self.vocab, data = cached
         else:
-            self.vocab = vocab
+            if isinstance(input_src, str):
+                filename = input_src
+                assert filename.endswith('conllu'), "Loaded file must be conllu file."
+                self.conll, data = self.load_file(filename, evaluation=self.eval)
+            elif isinstance(input_src, Document):
+                filename = None
+                doc = input_src
+                self.conll, data = self.load_doc(doc)
+
+            # handle vocab
+            if vocab is None:
+                self.vocab = self.init_vocab(data)
+            else:
+                self.vocab = vocab
+            data = self.preprocess(data, self.vocab, pretrain.vocab, args)
+            if data_cache is not None:
+                data_cache.save(self.vocab, data)
         self.pretrain_vocab = pretrain.vocab
 
         # filter and sample data
@@ -43,7 +54,6 @@ class DataLoader:
             data = random.sample(data, keep)
             print("Subsample training set with rate {:g}".format(args['sample_train']))
 
-        data = self.preprocess(data, self.vocab, self.pretrain_vocab, args)
         # shuffle for training
         if self.shuffled:
             random.shuffle(data)
@@ -72,6 +82,15 @@ class DataLoader:
                             'deprel': deprelvocab})
         return vocab
 
+    def get_data_cache(self, input_src, pretrain):
+        """ Set up a cache for the preprocessed data if a cache dir is given and the input is a file. """
+        if self.args.get('data_cache_dir') is None or not isinstance(input_src, str):
+            return None
+        settings = {'shorthand': self.args['shorthand'], 'cutoff': self.cutoff, 'eval': self.eval,
+                    'pretrain': vocab_checksum(pretrain.vocab)}
+        name = 'depparse.eval' if self.eval else 'depparse'
+        return DataCache(self.args['data_cache_dir'], input_src, name, settings=settings)
+
     def preprocess(self, data, vocab, pretrain_vocab, args):
         processed = []
         xpos_replacement = [[ROOT_ID] * len(vocab['xpos'])] if isinstance(vocab['xpos'], CompositeVocab) else [ROOT_ID]
@@ -58,7 +58,8 @@ class Parser(nn.Module):
             input_size += self.args['tag_emb_dim'] * 2
 
         if self.args['char'] and self.args['char_emb_dim'] > 0:
-            self.charmodel = CharacterModel(args, vocab)
+            # padded, like the other inputs of the LSTM
+            self.charmodel = CharacterModel(args, vocab, pad=True)
             self.trans_char = nn.Linear(self.args['char_hidden_dim'], self.args['transformed_dim'], bias=False)
             input_size += self.args['transformed_dim']
 
@@ -151,7 +152,7 @@ class Parser(nn.Module):
 
         if self.args['char'] and self.args['char_emb_dim'] > 0:
             char_reps = self.charmodel(wordchars, wordchars_mask, word_orig_idx, sentlens, wordlens)
-            char_reps = self.trans_char(self.drop(char_reps.data))
+            char_reps = self.trans_char(self.drop(char_reps))
             inputs += [char_reps]
 
         lstm_inputs = torch.cat(inputs, -1)
@@ -199,7 +200,8 @@ class Parser(nn.Module):
             dist_kld = -torch.log((dist_target.float() - dist_pred)**2 / 2 + 1)
             unlabeled_scores += dist_kld.detach()
 
-        diag = torch.eye(head.size(-1) + 1, dtype=torch.uint8, device=head.device).unsqueeze(0)
+        # a comparison gives the mask type masked_fill expects in every torch version (uint8 before 1.2, bool since)
+        diag = torch.eye(head.size(-1) + 1, device=head.device).unsqueeze(0) > 0
         unlabeled_scores.masked_fill_(diag, -float('inf'))
 
         preds = []
@@ -236,3 +238,68 @@ class Parser(nn.Module):
                 preds.append(np.random.randn(*preds[0].shape, len(self.vocab['deprel'])).argmax(-1))
 
         return loss, preds
+
+    def scores(self, word, pretrained, lemma, upos, xpos, ufeats, wordchars, sentlens):
+        """
+        Inference-only forward pass on padded inputs, which can be traced for export. wordchars holds the
+        char ids of each padded sentence (batch x sentlen x wordlen), and sentlens is a tensor of the
+        sentence lengths in decreasing order. Returns the log-probabilities of the heads, followed by the
+        deprel scores if the model was trained with a deprel loss. Only the bihlstm encoder is supported.
+        """
+        assert self.args['lstm_type'] == 'bihlstm', "Only parsers with a bihlstm encoder can run on padded inputs."
+        inputs = []
+        if self.args['pretrain']:
+            inputs += [self.trans_pretrained(self.pretrained_emb(pretrained))]
+
+        if self.args['word_emb_dim'] > 0:
+            inputs += [self.word_emb(word)]
+
+        if self.args['lemma_emb_dim'] > 0:
+            inputs += [self.lemma_emb(lemma)]
+
+        if self.args['tag_emb_dim'] > 0:
+            pos_emb = self.upos_emb(upos)
+            if isinstance(self.vocab['xpos'], CompositeVocab):
+                for i in range(len(self.vocab['xpos'])):
+                    pos_emb = pos_emb + self.xpos_emb[i](xpos[:, :, i])
+            else:
+                pos_emb = pos_emb + self.xpos_emb(xpos)
+
+            feats_emb = 0
+            for i in range(len(self.vocab['feats'])):
+                feats_emb = feats_emb + self.ufeats_emb[i](ufeats[:, :, i])
+
+            inputs += [pos_emb, feats_emb]
+
+        if self.args['char'] and self.args['char_emb_dim'] > 0:
+            inputs += [self.trans_char(self.charmodel.padded_forward(wordchars))]
+
+        lstm_inputs = pack_padded_sequence(torch.cat(inputs, -1), sentlens, batch_first=True)
+        lstm_outputs, _ = self.parserlstm(lstm_inputs, sentlens, hx=(self.parserlstm_h_init.expand(
+            2 * self.args['num_layers'], word.size(0), self.args['hidden_dim']).contiguous(),
+            self.parserlstm_c_init.expand(2 * self.args['num_layers'], word.size(0), self.args['hidden_dim']).contiguous()))
+        lstm_outputs, _ = pad_packed_sequence(lstm_outputs, batch_first=True, total_length=word.size(1))
+
+        unlabeled_scores = self.unlabeled(lstm_outputs, lstm_outputs).squeeze(3)
+
+        if self.args['linearization'] or self.args['distance']:
+            head_offset = torch.arange(word.size(1), device=word.device).view(1, 1, -1).expand(word.size(0), -1, -1) - \
+                torch.arange(word.size(1), device=word.device).view(1, -1, 1).expand(word.size(0), -1, -1)
+
+        if self.args['linearization']:
+            lin_scores = self.linearization(lstm_outputs, lstm_outputs).squeeze(3)
+            unlabeled_scores = unlabeled_scores + F.logsigmoid(lin_scores * torch.sign(head_offset).float())
+
+        if self.args['distance']:
+            dist_scores = self.distance(lstm_outputs, lstm_outputs).squeeze(3)
+            dist_pred = 1 + F.softplus(dist_scores)
+            dist_target = torch.abs(head_offset)
+            unlabeled_scores = unlabeled_scores - torch.log((dist_target.float() - dist_pred)**2 / 2 + 1)
+
+        diag = torch.eye(word.size(1), device=word.device).unsqueeze(0) > 0
+        unlabeled_scores = unlabeled_scores.masked_fill(diag, -float('inf'))
+
+        scores = [F.log_softmax(unlabeled_scores, 2)]
+        if self.args['deprel_loss']:
+            scores += [self.deprel(lstm_outputs, lstm_outputs)]
+        return tuple(scores)
@@ -3,11 +3,14 @@ A trainer class to handle training and testing of models.
 """
 
 import sys
+import numpy as np
 import torch
 from torch import nn
 
+from stanfordnlp.models.common.checkpoint import load_checkpoint
 from stanfordnlp.models.common.trainer import Trainer as BaseTrainer
 from stanfordnlp.models.common import utils, loss
+from stanfordnlp.models.common.export import is_torchscript, is_scripted, load_torchscript, pad_wordchars
 from stanfordnlp.models.common.chuliu_edmonds import chuliu_edmonds_one_root
 from stanfordnlp.models.depparse.model import Parser
 from stanfordnlp.models.pos.vocab import MultiVocab
@@ -76,7 +79,10 @@ class Trainer(BaseTrainer):
 
         self.model.eval()
         batch_size = word.size(0)
-        _, preds = self.model(word, word_mask, wordchars, wordchars_mask, upos, xpos, ufeats, pretrained, lemma, head, deprel, word_orig_idx, sentlens, wordlens)
+        if is_scripted(self.model):
+            preds = self.predict_scripted(word, pretrained, lemma, upos, xpos, ufeats, wordchars, word_orig_idx, sentlens)
+        else:
+            _, preds = self.model(word, word_mask, wordchars, wordchars_mask, upos, xpos, ufeats, pretrained, lemma, head, deprel, word_orig_idx, sentlens, wordlens)
         head_seqs = [chuliu_edmonds_one_root(adj[:l, :l])[1:] for adj, l in zip(preds[0], sentlens)]  # remove attachment for the root
         deprel_seqs = [self.vocab['deprel'].unmap([preds[1][i][j + 1][h] for j, h in enumerate(hs)]) for i, hs in enumerate(head_seqs)]
 
@@ -85,6 +91,17 @@ class Trainer(BaseTrainer):
             pred_tokens = utils.unsort(pred_tokens, orig_idx)
         return pred_tokens
 
+    def predict_scripted(self, word, pretrained, lemma, upos, xpos, ufeats, wordchars, word_orig_idx, sentlens):
+        """ Run an exported model, returning predictions in the same format as the eager model. """
+        with torch.no_grad():
+            scores = self.model(word, pretrained, lemma, upos, xpos, ufeats, pad_wordchars(wordchars, word_orig_idx, sentlens), torch.tensor(sentlens))
+        preds = [scores[0].cpu().numpy()]
+        if self.args['deprel_loss']:
+            preds.append(scores[1].max(3)[1].cpu().numpy())
+        else:
+            preds.append(np.random.randn(*preds[0].shape, len(self.vocab['deprel'])).argmax(-1))
+        return preds
+
     def init_from_lm(self, lm_model, freeze: bool=True,
                      m_names=['word_emb', 'lemma_emb', 'upos_emb', 'xpos_emb',
                               'ufeats_emb', 'charmodel', 'trans_char', 'trans_char',
@@ -181,8 +198,13 @@ class Trainer(BaseTrainer):
             print("[Warning: Saving failed... continuing anyway.]")
 
     def load(self, pretrain, filename):
+        if is_torchscript(filename):
+            # an exported model, which already holds the pretrained embeddings
+            self.model, self.args, vocab_state = load_torchscript(filename)
+            self.vocab = MultiVocab.load_state_dict(vocab_state)
+            return
         try:
-            checkpoint = torch.load(filename, lambda storage, loc: storage)
+            checkpoint = load_checkpoint(filename)
         except BaseException:
             print("Cannot load model from {}".format(filename))
             sys.exit(1)
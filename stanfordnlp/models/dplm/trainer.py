@@ -7,6 +7,7 @@ import torch
 from torch import nn
 import numpy as np
 
+from stanfordnlp.models.common.checkpoint import load_checkpoint
 from stanfordnlp.models.common.trainer import Trainer as BaseTrainer
 from stanfordnlp.models.common import utils, loss
 from stanfordnlp.models.common.chuliu_edmonds import chuliu_edmonds_one_root
@@ -110,7 +111,7 @@ class Trainer(BaseTrainer):
 
     def load(self, pretrain, filename):
         try:
-            checkpoint = torch.load(filename, lambda storage, loc: storage)
+            checkpoint = load_checkpoint(filename)
         except BaseException:
             print("Cannot load model from {}".format(filename))
             sys.exit(1)
@@ -0,0 +1,101 @@
+"""
+Entry point for exporting trained tokenizer, tagger and parser networks to TorchScript and ONNX.
+
+The TorchScript files can be loaded by the pipeline in place of the original models, by pointing the
+corresponding *_model_path option at them. The ONNX files are meant for external runtimes.
+
+Example:
+    python -m stanfordnlp.models.exporter --processor pos --model_file saved_models/pos/en_ewt_tagger.pt \
+        --pretrain_file saved_models/pos/en_ewt.pretrain.pt --eval_file data/pos/en_ewt.dev.in.conllu
+"""
+
+import argparse
+import os
+import torch
+
+from stanfordnlp.models.common import utils
+from stanfordnlp.models.common.export import ScoresModule, TORCHSCRIPT_SUFFIX, ONNX_SUFFIX, pad_wordchars, \
+        save_torchscript, save_onnx
+from stanfordnlp.models.common.pretrain import Pretrain
+from stanfordnlp.models.common.vocab import CompositeVocab
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processor', type=str, required=True, choices=['tokenize', 'pos', 'depparse'])
+    parser.add_argument('--model_file', type=str, required=True, help='Model to export.')
+    parser.add_argument('--pretrain_file', type=str, default=None, help='Pretrained word vectors of the pos and depparse models.')
+    parser.add_argument('--eval_file', type=str, default=None, help='CoNLL-U file to take an example batch from, required for pos and depparse.')
+    parser.add_argument('--output_dir', type=str, default=None, help='Where to save the exported models, by default next to the model file.')
+    parser.add_argument('--format', type=str, default='torchscript', choices=['torchscript', 'onnx', 'both'])
+    parser.add_argument('--batch_size', type=int, default=5000)
+    args = parser.parse_args()
+    return args
+
+def export_tokenizer(args):
+    from stanfordnlp.models.tokenize.trainer import Trainer
+    trainer = Trainer(model_file=args['model_file'])
+    feat_dim = trainer.args['feat_dim']
+    units = torch.ones(1, trainer.args.get('max_seqlen', 100), dtype=torch.long)
+    features = torch.zeros(1, trainer.args.get('max_seqlen', 100), feat_dim)
+    inputs = (units, features)
+    names = (['units', 'features'], ['scores'], {'units': {0: 'batch', 1: 'length'}, 'features': {0: 'batch', 1: 'length'}, 'scores': {0: 'batch', 1: 'length'}})
+    return trainer.model, inputs, names, trainer.args, trainer.vocab
+
+def export_tagger(args):
+    from stanfordnlp.models.pos.data import DataLoader
+    from stanfordnlp.models.pos.trainer import Trainer, unpack_batch
+    pretrain = Pretrain(args['pretrain_file'])
+    trainer = Trainer(pretrain=pretrain, model_file=args['model_file'])
+    batch = DataLoader(args['eval_file'], args['batch_size'], trainer.args, pretrain, vocab=trainer.vocab, evaluation=True)
+    inputs, _, word_orig_idx, sentlens, _ = unpack_batch(batch[0], False)
+    word, _, wordchars, _, _, _, _, pretrained = inputs
+    inputs = (word, pretrained, pad_wordchars(wordchars, word_orig_idx, sentlens), torch.tensor(sentlens))
+
+    n_xpos = len(trainer.vocab['xpos']) if isinstance(trainer.vocab['xpos'], CompositeVocab) else 1
+    output_names = ['upos'] + ['xpos{}'.format(i) for i in range(n_xpos)] + ['feats{}'.format(i) for i in range(len(trainer.vocab['feats']))]
+    dynamic_axes = {name: {0: 'batch', 1: 'length'} for name in ['word', 'pretrained', 'wordchars'] + output_names}
+    dynamic_axes['wordchars'][2] = 'wordlen'
+    dynamic_axes['sentlens'] = {0: 'batch'}
+    names = (['word', 'pretrained', 'wordchars', 'sentlens'], output_names, dynamic_axes)
+    return ScoresModule(trainer.model), inputs, names, trainer.args, trainer.vocab
+
+def export_parser(args):
+    from stanfordnlp.models.depparse.data import DataLoader
+    from stanfordnlp.models.depparse.trainer import Trainer, unpack_batch
+    pretrain = Pretrain(args['pretrain_file'])
+    trainer = Trainer(pretrain=pretrain, model_file=args['model_file'])
+    batch = DataLoader(args['eval_file'], args['batch_size'], trainer.args, pretrain, vocab=trainer.vocab, evaluation=True)
+    inputs, _, word_orig_idx, sentlens, _ = unpack_batch(batch[0], False)
+    word, _, wordchars, _, upos, xpos, ufeats, pretrained, lemma, _, _ = inputs
+    inputs = (word, pretrained, lemma, upos, xpos, ufeats, pad_wordchars(wordchars, word_orig_idx, sentlens), torch.tensor(sentlens))
+
+    input_names = ['word', 'pretrained', 'lemma', 'upos', 'xpos', 'ufeats', 'wordchars', 'sentlens']
+    output_names = ['heads'] + (['deprels'] if trainer.args['deprel_loss'] else [])
+    dynamic_axes = {name: {0: 'batch', 1: 'length'} for name in input_names[:-1]}
+    dynamic_axes['wordchars'][2] = 'wordlen'
+    dynamic_axes['sentlens'] = {0: 'batch'}
+    dynamic_axes.update({name: {0: 'batch', 1: 'length', 2: 'length'} for name in output_names})
+    names = (input_names, output_names, dynamic_axes)
+    return ScoresModule(trainer.model), inputs, names, trainer.args, trainer.vocab
+
+EXPORTERS = {'tokenize': export_tokenizer, 'pos': export_tagger, 'depparse': export_parser}
+
+def main():
+    args = vars(parse_args())
+    if args['processor'] != 'tokenize':
+        assert args['pretrain_file'] is not None and args['eval_file'] is not None, \
+                "A pretrain file and an eval file are required to export {} models.".format(args['processor'])
+
+    module, inputs, (input_names, output_names, dynamic_axes), model_args, vocab = EXPORTERS[args['processor']](args)
+    module.eval()
+
+    output_dir = args['output_dir'] if args['output_dir'] is not None else os.path.dirname(args['model_file'])
+    utils.ensure_dir(output_dir)
+    name = os.path.splitext(os.path.basename(args['model_file']))[0]
+    if args['format'] in ['torchscript', 'both']:
+        save_torchscript(module, inputs, os.path.join(output_dir, name + TORCHSCRIPT_SUFFIX), model_args, vocab)
+    if args['format'] in ['onnx', 'both']:
+        save_onnx(module, inputs, os.path.join(output_dir, name + ONNX_SUFFIX), input_names, output_names, dynamic_axes)
+
+if __name__ == '__main__':
+    main()
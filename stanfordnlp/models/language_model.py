@@ -33,6 +33,7 @@ def parse_args():
     parser.add_argument('--train_file', type=str, nargs='+', default=None, help='Input file for data loader.')
     parser.add_argument('--eval_file', type=str, nargs='+', default=None, help='Input file for data loader.')
     parser.add_argument('--output_file', type=str, default=None, help='Output file for test data prediction.')
+    parser.add_argument('--data_cache_dir', type=str, default=None, help='Directory for binary caches of the preprocessed data. Build them with --mode prepare.')
 
     # additional arguments
     parser.add_argument('--vocab_cutoff', type=int, default=10000, help='vocabulary size for each domain')
@@ -42,7 +43,7 @@ def parse_args():
     parser.add_argument('--balance', type=utils.bool_flag, nargs='?', const=True,  default=True, help='balance data across multiple training files')
     parser.add_argument('--tie_softmax', type=utils.bool_flag, nargs='?', const=True, default=True, help='use the word embedding matrix as softmax weights')
 
-    parser.add_argument('--mode', default='train', choices=['train', 'predict'])
+    parser.add_argument('--mode', default='train', choices=['train', 'predict', 'prepare'])
     parser.add_argument('--lang', type=str, help='Language')
     parser.add_argument('--shorthand', type=str, help="Treebank shorthand")
 
@@ -106,6 +107,8 @@ def main():
 
     if args['mode'] == 'train':
         train(args)
+    elif args['mode'] == 'prepare':
+        prepare(args)
     else:
         evaluate(args)
 
@@ -208,6 +211,21 @@ def train(args):
     print("Best dev ppl = {:.2f}, at iteration = {}".format(best_ppl, best_eval * args['eval_interval']))
 
 
+def prepare(args):
+    """ Preprocess the train and dev files into binary data caches, so that later runs can skip this step. """
+    assert args['data_cache_dir'] is not None, "Please provide --data_cache_dir to prepare data caches."
+    utils.ensure_dir(args['save_dir'])
+
+    # load pretrained vectors
+    vec_file = utils.get_wordvec_file(args['wordvec_dir'], args['shorthand'])
+    pretrain_file = '{}/{}.pretrain.pt'.format(args['save_dir'], args['shorthand'])
+    pretrain = Pretrain(pretrain_file, vec_file)
+
+    print("Preparing data caches in {}...".format(args['data_cache_dir']))
+    train_batch = DataLoader(args['train_file'], args['batch_size'], args, pretrain, evaluation=False)
+    DataLoader(args['eval_file'], args['eval_batch_size'], args, pretrain, vocab=train_batch.vocab, evaluation=True)
+
+
 def evaluate(args):
     model_file = args['save_dir'] + '/' + args['save_name'] if args['save_name'] is not None \
         else '{}/{}_lm.pt'.format(args['save_dir'], args['shorthand'])
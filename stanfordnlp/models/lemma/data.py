@@ -7,6 +7,7 @@ import torch
 import stanfordnlp.models.common.seq2seq_constant as constant
 from stanfordnlp.models.common.data import map_to_ids, get_long_tensor, get_float_tensor, sort_all
 from stanfordnlp.models.common import conll
+from stanfordnlp.models.common.data_cache import DataCache
 from stanfordnlp.models.lemma.vocab import Vocab, MultiVocab
 from stanfordnlp.models.lemma import edit
 from stanfordnlp.pipeline.doc import Document
@@ -20,25 +21,37 @@ class DataLoader:
         self.shuffled = not self.eval
 
         # check if input source is a file or a Document object
-        if isinstance(input_src, str):
-            filename = input_src
-            assert filename.endswith('conllu'), "Loaded file must be conllu file."
-            self.conll, data = self.load_file(filename)
-        elif isinstance(input_src, Document):
-            filename = None
-            doc = input_src
-            self.conll, data = self.load_doc(doc)
-
-        if conll_only: # only load conll file
-            return
-
-        # handle vocab
-        if vocab is not None:
-            self.vocab = vocab
+        data_cache = self.get_data_cache(input_src) if not conll_only else None
+        cached = data_cache.load(MultiVocab, vocab=vocab) if data_cache is not None else None
+        if cached is not None:
+            self.conll = conll.CoNLLFile(input_src)
+            self.vocab, data = cached
         else:
-            self.vocab = dict()
-            char_vocab, pos_vocab = self.init_vocab(data)
-            self.vocab = MultiVocab({'char': char_vocab, 'pos': pos_vocab})
+            if isinstance(input_src, str):
+                filename = input_src
+                assert filename.endswith('conllu'), "Loaded file must be conllu file."
+                self.conll, data = self.load_file(filename)
+            elif isinstance(input_src, Document):
+                filename = None
+                doc = input_src
+                self.conll, data = self.load_doc(doc)
+            elif isinstance(input_src, list):
+                # a list of [word, upos, lemma] triples, with no backing CoNLL file
+                self.conll, data = None, input_src
+
+            if conll_only: # only load conll file
+                return
+
+            # handle vocab
+            if vocab is not None:
+                self.vocab = vocab
+            else:
+                self.vocab = dict()
+                char_vocab, pos_vocab = self.init_vocab(data)
+                self.vocab = MultiVocab({'char': char_vocab, 'pos': pos_vocab})
+            data = self.preprocess(data, self.vocab['char'], self.vocab['pos'], args)
+            if data_cache is not None:
+                data_cache.save(self.vocab, data)
 
         # filter and sample data
         if args.get('sample_train', 1.0) < 1.0 and not self.eval:
@@ -46,7 +59,6 @@ class DataLoader:
             data = random.sample(data, keep)
             print("Subsample training set with rate {:g}".format(args['sample_train']))
 
-        data = self.preprocess(data, self.vocab['char'], self.vocab['pos'], args)
         # shuffle for training
         if self.shuffled:
             indices = list(range(len(data)))
@@ -66,6 +78,14 @@ class DataLoader:
         pos_vocab = Vocab(pos_data, self.args['lang'])
         return char_vocab, pos_vocab
 
+    def get_data_cache(self, input_src):
+        """ Set up a cache for the preprocessed data if a cache dir is given and the input is a file. """
+        if self.args.get('data_cache_dir') is None or not isinstance(input_src, str):
+            return None
+        settings = {'lang': self.args.get('lang'), 'shorthand': self.args.get('shorthand'), 'eval': self.eval}
+        name = 'lemma.eval' if self.eval else 'lemma'
+        return DataCache(self.args['data_cache_dir'], input_src, name, settings=settings)
+
     def preprocess(self, data, char_vocab, pos_vocab, args):
         processed = []
         for d in data:
@@ -9,6 +9,7 @@ import torch
 from torch import nn
 import torch.nn.init as init
 
+from stanfordnlp.models.common.checkpoint import load_checkpoint
 import stanfordnlp.models.common.seq2seq_constant as constant
 from stanfordnlp.models.common.seq2seq_model import Seq2SeqModel
 from stanfordnlp.models.common import utils, loss
@@ -149,6 +150,12 @@ class Trainer(object):
                 lemmas += [w]
         return lemmas
 
+    def lookup_dict(self, word, pos):
+        """ Look up the lemma of a (word, pos) pair in the dicts. Returns None if neither dict has the word. """
+        if (word, pos) in self.composite_dict:
+            return self.composite_dict[(word, pos)]
+        return self.word_dict.get(word)
+
     def ensemble(self, pairs, other_preds):
         """ Ensemble the dict with statitical model predictions. """
         lemmas = []
@@ -178,7 +185,7 @@ class Trainer(object):
 
     def load(self, filename, use_cuda=False):
         try:
-            checkpoint = torch.load(filename, lambda storage, loc: storage)
+            checkpoint = load_checkpoint(filename)
         except BaseException:
             print("Cannot load model from {}".format(filename))
             sys.exit(1)
@@ -24,15 +24,16 @@ from stanfordnlp.models.lemma import scorer, edit
 from stanfordnlp.models.common import utils
 import stanfordnlp.models.common.seq2seq_constant as constant
 
-def parse_args():
+def parse_args(args=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--data_dir', type=str, default='data/lemma', help='Directory for all lemma data.')
     parser.add_argument('--train_file', type=str, default=None, help='Input file for data loader.')
     parser.add_argument('--eval_file', type=str, default=None, help='Input file for data loader.')
     parser.add_argument('--output_file', type=str, default=None, help='Output CoNLL-U file.')
     parser.add_argument('--gold_file', type=str, default=None, help='Output CoNLL-U file.')
+    parser.add_argument('--data_cache_dir', type=str, default=None, help='Directory for binary caches of the preprocessed data. Build them with --mode prepare.')
 
-    parser.add_argument('--mode', default='train', choices=['train', 'predict'])
+    parser.add_argument('--mode', default='train', choices=['train', 'predict', 'prepare'])
     parser.add_argument('--lang', type=str, help='Language')
 
     parser.add_argument('--no_dict', dest='ensemble_dict', action='store_false', help='Do not ensemble dictionary with seq2seq. By default use ensemble.')
@@ -68,7 +69,7 @@ def parse_args():
     parser.add_argument('--seed', type=int, default=1234)
     parser.add_argument('--cuda', type=bool, default=torch.cuda.is_available())
     parser.add_argument('--cpu', action='store_true', help='Ignore CUDA.')
-    args = parser.parse_args()
+    args = parser.parse_args(args=args)
     return args
 
 def main():
@@ -91,6 +92,8 @@ def main():
 
     if args['mode'] == 'train':
         train(args)
+    elif args['mode'] == 'prepare':
+        prepare(args)
     else:
         evaluate(args)
 
@@ -196,6 +199,13 @@ def train(args):
         best_f, best_epoch = max(dev_score_history)*100, np.argmax(dev_score_history)+1
         print("Best dev F1 = {:.2f}, at epoch = {}".format(best_f, best_epoch))
 
+def prepare(args):
+    """ Preprocess the train and dev files into binary data caches, so that later runs can skip this step. """
+    assert args['data_cache_dir'] is not None, "Please provide --data_cache_dir to prepare data caches."
+    print("[Preparing data caches in {}...]".format(args['data_cache_dir']))
+    train_batch = DataLoader(args['train_file'], args['batch_size'], args, evaluation=False)
+    DataLoader(args['eval_file'], args['batch_size'], args, vocab=train_batch.vocab, evaluation=True)
+
 def evaluate(args):
     # file paths
     system_pred_file = args['output_file']
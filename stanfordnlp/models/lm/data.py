@@ -3,6 +3,7 @@ import torch
 
 from stanfordnlp.models.common.data import map_to_ids, get_long_tensor, get_float_tensor, sort_all
 from stanfordnlp.models.common import conll
+from stanfordnlp.models.common.data_cache import DataCache, vocab_checksum
 from stanfordnlp.models.common.vocab import PAD_ID, VOCAB_PREFIX, ROOT_ID, CompositeVocab
 from stanfordnlp.models.pos.vocab import CharVocab, WordVocab, XPOSVocab, FeatureVocab, MultiVocab
 from stanfordnlp.models.pos.xpos_vocab_factory import xpos_vocab_factory
@@ -31,15 +32,23 @@ class DataLoader:
         # elif isinstance(input_src, Document):
         #     raise NotImplementedError()
 
-        data_list = [self.load_file(file) for file in input_srcs]
+        data_cache = self.get_data_cache(input_srcs, pretrain)
+        cached = data_cache.load(MultiVocab, vocab=vocab) if data_cache is not None else None
+        if cached is not None:
+            self.vocab, data_list = cached
+        else:
+            data_list = [self.load_file(file) for file in input_srcs]
+
+            # handle vocab
+            if vocab is None:
+                self.vocab = self.init_vocab(data_list)
+            else:
+                self.vocab = vocab
+            data_list = [self.preprocess(data, self.vocab, pretrain.vocab, args) for data in data_list]
+            if data_cache is not None:
+                data_cache.save(self.vocab, data_list)
         for f_name, data in zip(input_srcs, data_list):
             print('File {} contains {} examples'.format(f_name, len(data)))
-
-        # handle vocab
-        if vocab is None:
-            self.vocab = self.init_vocab(data_list)
-        else:
-            self.vocab = vocab
         self.pretrain_vocab = pretrain.vocab
 
         # filter and sample data
@@ -57,7 +66,6 @@ class DataLoader:
         else:
             data = sum(data_list, [])
 
-        data = self.preprocess(data, self.vocab, self.pretrain_vocab, args)
         # shuffle for training
         if self.shuffled:
             print('Shuffling data')
@@ -134,6 +142,15 @@ class DataLoader:
                             'lemma': lemmavocab, })
         return vocab
 
+    def get_data_cache(self, input_srcs, pretrain):
+        """ Set up a cache for the preprocessed data if a cache dir is given. """
+        if self.args.get('data_cache_dir') is None:
+            return None
+        settings = {'shorthand': self.args['shorthand'], 'cutoff': self.cutoff, 'vocab_cutoff': self.args.get('vocab_cutoff'),
+                    'pretrain': vocab_checksum(pretrain.vocab)}
+        name = 'lm.eval' if self.eval else 'lm'
+        return DataCache(self.args['data_cache_dir'], input_srcs, name, settings=settings)
+
     def preprocess(self, data, vocab, pretrain_vocab, args):
         """
         returns: list[list[list]] sent -> feat -> seq
@@ -7,6 +7,7 @@ import torch
 import stanfordnlp.models.common.seq2seq_constant as constant
 from stanfordnlp.models.common.data import map_to_ids, get_long_tensor, get_float_tensor, sort_all
 from stanfordnlp.models.common import conll
+from stanfordnlp.models.common.data_cache import DataCache
 from stanfordnlp.models.mwt.vocab import Vocab
 from stanfordnlp.pipeline.doc import Document
 
@@ -19,20 +20,34 @@ class DataLoader:
         self.shuffled = not self.eval
 
         # check if input source is a file or a Document object
-        if isinstance(input_src, str):
+        data_cache = self.get_data_cache(input_src)
+        cached = data_cache.load(Vocab, vocab=vocab) if data_cache is not None else None
+        if cached is not None:
             filename = input_src
-            assert filename.endswith('conllu'), "Loaded file must be conllu file."
-            self.conll, data = self.load_file(filename, evaluation=self.eval)
-        elif isinstance(input_src, Document):
-            filename = None
-            doc = input_src
-            self.conll, data = self.load_doc(doc)
-
-        # handle vocab
-        if vocab is None:
-            self.vocab = self.init_vocab(data)
+            self.conll = conll.CoNLLFile(filename)
+            self.vocab, data = cached
         else:
-            self.vocab = vocab
+            if isinstance(input_src, str):
+                filename = input_src
+                assert filename.endswith('conllu'), "Loaded file must be conllu file."
+                self.conll, data = self.load_file(filename, evaluation=self.eval)
+            elif isinstance(input_src, Document):
+                filename = None
+                doc = input_src
+                self.conll, data = self.load_doc(doc)
+            elif isinstance(input_src, list):
+                # a list of [word] or [word, expansion] examples, with no backing CoNLL file
+                filename = None
+                self.conll, data = None, input_src
+
+            # handle vocab
+            if vocab is None:
+                self.vocab = self.init_vocab(data)
+            else:
+                self.vocab = vocab
+            data = self.preprocess(data, self.vocab, args)
+            if data_cache is not None:
+                data_cache.save(self.vocab, data)
 
         # filter and sample data
         if args.get('sample_train', 1.0) < 1.0 and not self.eval:
@@ -40,7 +55,6 @@ class DataLoader:
             data = random.sample(data, keep)
             print("Subsample training set with rate {:g}".format(args['sample_train']))
 
-        data = self.preprocess(data, self.vocab, args)
         # shuffle for training
         if self.shuffled:
             indices = list(range(len(data)))
@@ -59,6 +73,14 @@ class DataLoader:
         vocab = Vocab(data, self.args['shorthand'])
         return vocab
 
+    def get_data_cache(self, input_src):
+        """ Set up a cache for the preprocessed data if a cache dir is given and the input is a file. """
+        if self.args.get('data_cache_dir') is None or not isinstance(input_src, str):
+            return None
+        settings = {'lang': self.args.get('lang'), 'shorthand': self.args.get('shorthand'), 'eval': self.eval}
+        name = 'mwt.eval' if self.eval else 'mwt'
+        return DataCache(self.args['data_cache_dir'], input_src, name, settings=settings)
+
     def preprocess(self, data, vocab, args):
         processed = []
         for d in data:
@@ -9,6 +9,7 @@ import torch
 from torch import nn
 import torch.nn.init as init
 
+from stanfordnlp.models.common.checkpoint import load_checkpoint
 import stanfordnlp.models.common.seq2seq_constant as constant
 from stanfordnlp.models.common.trainer import Trainer as BaseTrainer
 from stanfordnlp.models.common.seq2seq_model import Seq2SeqModel
@@ -73,7 +74,9 @@ class Trainer(object):
 
         self.model.eval()
         batch_size = src.size(0)
-        preds, _ = self.model.predict(src, src_mask, self.args['beam_size'])
+        # MWT models have always been decoded with the default beam of Seq2SeqModel.predict, whatever their
+        # beam_size setting (it used to be passed as the pos argument), so keep that beam
+        preds, _ = self.model.predict(src, src_mask)
         pred_seqs = [self.vocab.unmap(ids) for ids in preds] # unmap to tokens
         pred_seqs = utils.prune_decoded_seqs(pred_seqs)
         pred_tokens = ["".join(seq) for seq in pred_seqs] # join chars to be tokens
@@ -107,6 +110,12 @@ class Trainer(object):
                 expansions += [w]
         return expansions
 
+    def lookup_dict(self, word):
+        """ Look up the expansion of a word in the dict. Returns None if the word is not in the dict. """
+        if word in self.expansion_dict:
+            return self.expansion_dict[word]
+        return self.expansion_dict.get(word.lower())
+
     def ensemble(self, cands, other_preds):
         """ Ensemble the dict with statistical model predictions. """
         expansions = []
@@ -135,7 +144,7 @@ class Trainer(object):
 
     def load(self, filename, use_cuda=False):
         try:
-            checkpoint = torch.load(filename, lambda storage, loc: storage)
+            checkpoint = load_checkpoint(filename)
         except BaseException:
             print("Cannot load model from {}".format(filename))
             sys.exit(1)
@@ -24,15 +24,16 @@ from stanfordnlp.models.mwt import scorer
 from stanfordnlp.models.common import utils
 import stanfordnlp.models.common.seq2seq_constant as constant
 
-def parse_args():
+def parse_args(args=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--data_dir', type=str, default='data/mwt', help='Root dir for saving models.')
     parser.add_argument('--train_file', type=str, default=None, help='Input file for data loader.')
     parser.add_argument('--eval_file', type=str, default=None, help='Input file for data loader.')
     parser.add_argument('--output_file', type=str, default=None, help='Output CoNLL-U file.')
     parser.add_argument('--gold_file', type=str, default=None, help='Output CoNLL-U file.')
+    parser.add_argument('--data_cache_dir', type=str, default=None, help='Directory for binary caches of the preprocessed data. Build them with --mode prepare.')
 
-    parser.add_argument('--mode', default='train', choices=['train', 'predict'])
+    parser.add_argument('--mode', default='train', choices=['train', 'predict', 'prepare'])
     parser.add_argument('--lang', type=str, help='Language')
     parser.add_argument('--shorthand', type=str, help="Treebank shorthand")
 
@@ -64,7 +65,7 @@ def parse_args():
     parser.add_argument('--seed', type=int, default=1234)
     parser.add_argument('--cuda', type=bool, default=torch.cuda.is_available())
     parser.add_argument('--cpu', action='store_true', help='Ignore CUDA.')
-    args = parser.parse_args()
+    args = parser.parse_args(args=args)
     return args
 
 def main():
@@ -83,6 +84,8 @@ def main():
 
     if args['mode'] == 'train':
         train(args)
+    elif args['mode'] == 'prepare':
+        prepare(args)
     else:
         evaluate(args)
 
@@ -188,6 +191,13 @@ def train(args):
             print("Ensemble dev F1 = {:.2f}".format(dev_score*100))
             best_f = max(best_f, dev_score)
 
+def prepare(args):
+    """ Preprocess the train and dev files into binary data caches, so that later runs can skip this step. """
+    assert args['data_cache_dir'] is not None, "Please provide --data_cache_dir to prepare data caches."
+    print("Preparing data caches in {}...".format(args['data_cache_dir']))
+    train_batch = DataLoader(args['train_file'], args['batch_size'], args, evaluation=False)
+    DataLoader(args['eval_file'], args['batch_size'], args, vocab=train_batch.vocab, evaluation=True)
+
 def evaluate(args):
     # file paths
     system_pred_file = args['output_file']
@@ -28,7 +28,7 @@ from stanfordnlp.models.common import utils
 from stanfordnlp.models.common.pretrain import Pretrain
 
 
-def parse_args():
+def parse_args(args=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--data_dir', type=str, default='data/depparse', help='Root dir for saving models.')
     parser.add_argument('--wordvec_dir', type=str, default='extern_data/word2vec', help='Directory of word vectors')
@@ -36,6 +36,7 @@ def parse_args():
     parser.add_argument('--eval_file', type=str, default=None, help='Input file for data loader.')
     parser.add_argument('--output_file', type=str, default=None, help='Output CoNLL-U file.')
     parser.add_argument('--gold_file', type=str, default=None, help='Output CoNLL-U file.')
+    parser.add_argument('--data_cache_dir', type=str, default=None, help='Directory for binary caches of the preprocessed data. Build them with --mode prepare.')
 
     # additional arguments
     parser.add_argument('--vocab_cutoff', type=int, default=7, help='Word frequency threshold for vocab construction')
@@ -48,7 +49,7 @@ def parse_args():
     parser.add_argument('--deprel_loss', type=utils.bool_flag, nargs='?', const=True, default=True, help='optimize relation label loss')
     parser.add_argument('--lr_shrink', type=float, default=(1 / 2.6), help='lr shrink ratio when finetuning lower layers')
 
-    parser.add_argument('--mode', default='train', choices=['train', 'predict'])
+    parser.add_argument('--mode', default='train', choices=['train', 'predict', 'prepare'])
     parser.add_argument('--lang', type=str, help='Language')
     parser.add_argument('--shorthand', type=str, help="Treebank shorthand")
     parser.add_argument('--scorer', choices=['biaffine', 'mlp'], default='biaffine')
@@ -89,7 +90,7 @@ def parse_args():
     parser.add_argument('--seed', type=int, default=1234)
     parser.add_argument('--cuda', type=bool, default=torch.cuda.is_available())
     parser.add_argument('--cpu', action='store_true', help='Ignore CUDA.')
-    args = parser.parse_args()
+    args = parser.parse_args(args=args)
     return args
 
 
@@ -113,6 +114,8 @@ def main():
 
     if args['mode'] == 'train':
         train(args)
+    elif args['mode'] == 'prepare':
+        prepare(args)
     else:
         evaluate(args)
 
@@ -266,6 +269,24 @@ def train(args):
     print("Best dev F1 = {:.2f}, at iteration = {}".format(best_f, best_eval * args['eval_interval']))
 
 
+def prepare(args):
+    """ Preprocess the train and dev files into binary data caches, so that later runs can skip this step. """
+    assert args['data_cache_dir'] is not None, "Please provide --data_cache_dir to prepare data caches."
+    utils.ensure_dir(args['save_dir'])
+
+    # load pretrained vectors
+    vec_file = utils.get_wordvec_file(args['wordvec_dir'], args['shorthand'])
+    pretrain_file = '{}/{}.pretrain.pt'.format(args['save_dir'], args['shorthand'])
+    pretrain = Pretrain(pretrain_file, vec_file)
+
+    print("Preparing data caches in {}...".format(args['data_cache_dir']))
+    train_batch = DataLoader(args['train_file'], args['batch_size'], args, pretrain,
+                             vocab=None, evaluation=False, cutoff=args['vocab_cutoff'])
+    vocab = train_batch.vocab
+    DataLoader(args['train_file'], args['batch_size'], args, pretrain, vocab=vocab, evaluation=True)
+    DataLoader(args['eval_file'], args['batch_size'], args, pretrain, vocab=vocab, evaluation=True)
+
+
 def evaluate(args):
     # file paths
     system_pred_file = args['output_file']
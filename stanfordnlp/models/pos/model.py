@@ -168,3 +168,46 @@ class Tagger(nn.Module):
         preds.append(torch.cat(ufeats_preds, 2))
 
         return loss, preds
+
+    def scores(self, word, pretrained, wordchars, sentlens):
+        """
+        Inference-only forward pass on padded inputs, which can be traced for export. wordchars holds the
+        char ids of each padded sentence (batch x sentlen x wordlen), and sentlens is a tensor of the
+        sentence lengths in decreasing order. Returns the padded upos scores, followed by the xpos and
+        ufeats scores, one tensor per component for composite vocabs.
+        """
+        inputs = []
+        if self.args['word_emb_dim'] > 0:
+            inputs += [self.word_emb(word)]
+
+        if self.args['pretrain']:
+            inputs += [self.trans_pretrained(self.pretrained_emb(pretrained))]
+
+        if self.args['char'] and self.args['char_emb_dim'] > 0:
+            inputs += [self.trans_char(self.charmodel.padded_forward(wordchars))]
+
+        lstm_inputs = pack_padded_sequence(torch.cat(inputs, 2), sentlens, batch_first=True)
+        lstm_outputs, _ = self.taggerlstm(lstm_inputs, sentlens, hx=(self.taggerlstm_h_init.expand(2 * self.args['num_layers'], word.size(0), self.args['hidden_dim']).contiguous(), self.taggerlstm_c_init.expand(2 * self.args['num_layers'], word.size(0), self.args['hidden_dim']).contiguous()))
+        lstm_outputs, _ = pad_packed_sequence(lstm_outputs, batch_first=True, total_length=word.size(1))
+
+        upos_hid = F.relu(self.upos_hid(lstm_outputs))
+        upos_scores = self.upos_clf(upos_hid)
+        scores = [upos_scores]
+
+        if self.share_hid:
+            xpos_hid = upos_hid
+            ufeats_hid = upos_hid
+            clffunc = lambda clf, hid: clf(hid)
+        else:
+            xpos_hid = F.relu(self.xpos_hid(lstm_outputs))
+            ufeats_hid = F.relu(self.ufeats_hid(lstm_outputs))
+            upos_emb = self.upos_emb(upos_scores.max(2)[1])
+            clffunc = lambda clf, hid: clf(hid, upos_emb)
+
+        if isinstance(self.vocab['xpos'], CompositeVocab):
+            scores += [clffunc(self.xpos_clf[i], xpos_hid) for i in range(len(self.vocab['xpos']))]
+        else:
+            scores += [clffunc(self.xpos_clf, xpos_hid)]
+
+        scores += [clffunc(self.ufeats_clf[i], ufeats_hid) for i in range(len(self.vocab['feats']))]
+        return tuple(scores)
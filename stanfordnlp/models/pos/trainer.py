@@ -6,8 +6,11 @@ import sys
 import torch
 from torch import nn
 
+from stanfordnlp.models.common.checkpoint import load_checkpoint
 from stanfordnlp.models.common.trainer import Trainer as BaseTrainer
 from stanfordnlp.models.common import utils, loss
+from stanfordnlp.models.common.export import is_torchscript, is_scripted, load_torchscript, pad_wordchars
+from stanfordnlp.models.common.vocab import CompositeVocab
 from stanfordnlp.models.pos.model import Tagger
 from stanfordnlp.models.pos.vocab import MultiVocab
 
@@ -68,7 +71,10 @@ class Trainer(BaseTrainer):
 
         self.model.eval()
         batch_size = word.size(0)
-        _, preds = self.model(word, word_mask, wordchars, wordchars_mask, upos, xpos, ufeats, pretrained, word_orig_idx, sentlens, wordlens)
+        if is_scripted(self.model):
+            preds = self.predict_scripted(word, pretrained, wordchars, word_orig_idx, sentlens)
+        else:
+            _, preds = self.model(word, word_mask, wordchars, wordchars_mask, upos, xpos, ufeats, pretrained, word_orig_idx, sentlens, wordlens)
         upos_seqs = [self.vocab['upos'].unmap(sent) for sent in preds[0].tolist()]
         xpos_seqs = [self.vocab['xpos'].unmap(sent) for sent in preds[1].tolist()]
         feats_seqs = [self.vocab['feats'].unmap(sent) for sent in preds[2].tolist()]
@@ -78,6 +84,19 @@ class Trainer(BaseTrainer):
             pred_tokens = utils.unsort(pred_tokens, orig_idx)
         return pred_tokens
 
+    def predict_scripted(self, word, pretrained, wordchars, word_orig_idx, sentlens):
+        """ Run an exported model, returning predictions in the same format as the eager model. """
+        with torch.no_grad():
+            scores = self.model(word, pretrained, pad_wordchars(wordchars, word_orig_idx, sentlens), torch.tensor(sentlens))
+        n_xpos = len(self.vocab['xpos']) if isinstance(self.vocab['xpos'], CompositeVocab) else 1
+        preds = [scores[0].max(2)[1]]
+        if isinstance(self.vocab['xpos'], CompositeVocab):
+            preds.append(torch.cat([s.max(2, keepdim=True)[1] for s in scores[1:1+n_xpos]], 2))
+        else:
+            preds.append(scores[1].max(2)[1])
+        preds.append(torch.cat([s.max(2, keepdim=True)[1] for s in scores[1+n_xpos:]], 2))
+        return preds
+
     def save(self, filename, skip_modules=True):
         model_state = self.model.state_dict()
         # skip saving modules like pretrained embeddings, because they are large and will be saved in a separate file
@@ -97,8 +116,13 @@ class Trainer(BaseTrainer):
             print("[Warning: Saving failed... continuing anyway.]")
 
     def load(self, pretrain, filename):
+        if is_torchscript(filename):
+            # an exported model, which already holds the pretrained embeddings
+            self.model, self.args, vocab_state = load_torchscript(filename)
+            self.vocab = MultiVocab.load_state_dict(vocab_state)
+            return
         try:
-            checkpoint = torch.load(filename, lambda storage, loc: storage)
+            checkpoint = load_checkpoint(filename)
         except BaseException:
             print("Cannot load model from {}".format(filename))
             sys.exit(1)
@@ -23,7 +23,7 @@ from stanfordnlp.models.pos import scorer
 from stanfordnlp.models.common import utils
 from stanfordnlp.models.common.pretrain import Pretrain
 
-def parse_args():
+def parse_args(args=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--data_dir', type=str, default='data/pos', help='Root dir for saving models.')
     parser.add_argument('--wordvec_dir', type=str, default='extern_data/word2vec', help='Directory of word vectors')
@@ -31,8 +31,9 @@ def parse_args():
     parser.add_argument('--eval_file', type=str, default=None, help='Input file for data loader.')
     parser.add_argument('--output_file', type=str, default=None, help='Output CoNLL-U file.')
     parser.add_argument('--gold_file', type=str, default=None, help='Output CoNLL-U file.')
+    parser.add_argument('--data_cache_dir', type=str, default=None, help='Directory for binary caches of the preprocessed data. Build them with --mode prepare.')
 
-    parser.add_argument('--mode', default='train', choices=['train', 'predict'])
+    parser.add_argument('--mode', default='train', choices=['train', 'predict', 'prepare'])
     parser.add_argument('--lang', type=str, help='Language')
     parser.add_argument('--shorthand', type=str, help="Treebank shorthand")
 
@@ -74,7 +75,7 @@ def parse_args():
     parser.add_argument('--seed', type=int, default=1234)
     parser.add_argument('--cuda', type=bool, default=torch.cuda.is_available())
     parser.add_argument('--cpu', action='store_true', help='Ignore CUDA.')
-    args = parser.parse_args()
+    args = parser.parse_args(args=args)
     return args
 
 def main():
@@ -93,6 +94,8 @@ def main():
 
     if args['mode'] == 'train':
         train(args)
+    elif args['mode'] == 'prepare':
+        prepare(args)
     else:
         evaluate(args)
 
@@ -200,6 +203,20 @@ def train(args):
     best_f, best_eval = max(dev_score_history)*100, np.argmax(dev_score_history)+1
     print("Best dev F1 = {:.2f}, at iteration = {}".format(best_f, best_eval * args['eval_interval']))
 
+def prepare(args):
+    """ Preprocess the train and dev files into binary data caches, so that later runs can skip this step. """
+    assert args['data_cache_dir'] is not None, "Please provide --data_cache_dir to prepare data caches."
+    utils.ensure_dir(args['save_dir'])
+
+    # load pretrained vectors
+    vec_file = utils.get_wordvec_file(args['wordvec_dir'], args['shorthand'])
+    pretrain_file = '{}/{}.pretrain.pt'.format(args['save_dir'], args['shorthand'])
+    pretrain = Pretrain(pretrain_file, vec_file)
+
+    print("Preparing data caches in {}...".format(args['data_cache_dir']))
+    train_batch = DataLoader(args['train_file'], args['batch_size'], args, pretrain, evaluation=False)
+    DataLoader(args['eval_file'], args['batch_size'], args, pretrain, vocab=train_batch.vocab, evaluation=True)
+
 def evaluate(args):
     # file paths
     system_pred_file = args['output_file']
@@ -3,6 +3,8 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 
+from stanfordnlp.models.common.checkpoint import load_checkpoint
+from stanfordnlp.models.common.export import is_torchscript, load_torchscript
 from stanfordnlp.models.common.trainer import Trainer
 
 from .model import Tokenizer
@@ -78,8 +80,12 @@ class Trainer(Trainer):
             print("[Warning: Saving failed... continuing anyway.]")
 
     def load(self, filename):
+        if is_torchscript(filename):
+            self.model, self.args, vocab_state = load_torchscript(filename)
+            self.vocab = Vocab.load_state_dict(vocab_state)
+            return
         try:
-            checkpoint = torch.load(filename, lambda storage, loc: storage)
+            checkpoint = load_checkpoint(filename)
         except BaseException:
             print("Cannot load model from {}".format(filename))
             sys.exit(1)
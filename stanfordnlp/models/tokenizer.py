@@ -17,7 +17,7 @@ from stanfordnlp.models.tokenize.trainer import Trainer
 from stanfordnlp.models.tokenize.data import DataLoader
 from stanfordnlp.models.tokenize.utils import load_mwt_dict, eval_model, output_predictions
 
-def parse_args():
+def parse_args(args=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--txt_file', type=str, help="Input plaintext file")
     parser.add_argument('--label_file', type=str, default=None, help="Character-level label file")
@@ -64,7 +64,7 @@ def parse_args():
     parser.add_argument('--cuda', type=bool, default=torch.cuda.is_available())
     parser.add_argument('--cpu', action='store_true', help='Ignore CUDA and run on CPU.')
     parser.add_argument('--seed', type=int, default=1234)
-    args = parser.parse_args()
+    args = parser.parse_args(args=args)
     return args
 
 def main():
@@ -2,11 +2,16 @@
 Pipeline that runs tokenize,mwt,pos,lemma,depparse
 """
 
+import gc
 import itertools
+import threading
 import torch
 
 from distutils.util import strtobool
+from stanfordnlp.models.common.pretrain import Pretrain
+from stanfordnlp.models.common.vocab import CompositeVocab
 from stanfordnlp.pipeline.doc import Document
+from stanfordnlp.pipeline.profile import PipelineProfile, StageTimer
 from stanfordnlp.pipeline.tokenize_processor import TokenizeProcessor
 from stanfordnlp.pipeline.mwt_processor import MWTProcessor
 from stanfordnlp.pipeline.pos_processor import POSProcessor
@@ -19,40 +24,45 @@ DEFAULT_PROCESSORS_LIST = 'tokenize,mwt,pos,lemma,depparse'
 NAME_TO_PROCESSOR_CLASS = {'tokenize': TokenizeProcessor, 'mwt': MWTProcessor, 'pos': POSProcessor,
                            'lemma': LemmaProcessor, 'depparse': DepparseProcessor}
 
+# processors that take pretrained word vectors, which are shared when they come from the same file
+PRETRAIN_PROCESSORS = ['pos', 'depparse']
+
 PIPELINE_SETTINGS = ['lang', 'shorthand', 'mode']
 
 # list of settings for each processor
 PROCESSOR_SETTINGS = {
     'tokenize': ['anneal', 'anneal_after', 'batch_size', 'conv_filters', 'conv_res', 'dropout', 'emb_dim', 'feat_dim',
                  'feat_funcs', 'hidden_dim', 'hier_invtemp', 'hierarchical', 'input_dropout', 'lr0', 'max_grad_norm',
-                 'max_seqlen', 'pretokenized', 'report_steps', 'residual', 'rnn_layers', 'seed', 'shuffle_steps',
-                 'steps', 'tok_noise', 'unit_dropout', 'vocab_size', 'weight_decay'],
-    'mwt': ['attn_type', 'batch_size', 'beam_size', 'decay_epoch', 'dict_only', 'dropout', 'emb_dim', 'emb_dropout',
-            'ensemble_dict', 'ensemble_early_stop', 'hidden_dim', 'log_step', 'lr', 'lr_decay', 'max_dec_len',
-            'max_grad_norm', 'num_epoch', 'num_layers', 'optim', 'seed', 'vocab_size'],
-    'pos': ['adapt_eval_interval', 'batch_size', 'beta2', 'char', 'char_emb_dim', 'char_hidden_dim', 'char_num_layers',
-            'char_rec_dropout', 'composite_deep_biaff_hidden_dim', 'deep_biaff_hidden_dim', 'dropout', 'eval_interval',
-            'hidden_dim', 'log_step', 'lr', 'max_grad_norm', 'max_steps', 'max_steps_before_stop', 'num_layers',
-            'optim', 'pretrain', 'rec_dropout', 'seed', 'share_hid', 'tag_emb_dim', 'transformed_dim', 'word_dropout',
-            'word_emb_dim', 'wordvec_dir'],
-    'lemma': ['alpha', 'attn_type', 'batch_size', 'beam_size', 'decay_epoch', 'dict_only', 'dropout', 'edit', 'emb_dim',
-              'emb_dropout', 'ensemble_dict', 'hidden_dim', 'log_step', 'lr', 'lr_decay', 'max_dec_len',
-              'max_grad_norm', 'num_edit', 'num_epoch', 'num_layers', 'optim', 'pos', 'pos_dim', 'pos_dropout',
-              'pos_vocab_size', 'seed', 'use_identity', 'vocab_size'],
-    'depparse': ['batch_size', 'beta2', 'char', 'char_emb_dim', 'char_hidden_dim', 'char_num_layers',
+                 'max_seqlen', 'pretokenized', 'quantize', 'report_steps', 'residual', 'rnn_layers', 'seed',
+                 'shuffle_steps', 'steps', 'tok_noise', 'unit_dropout', 'vocab_size', 'weight_decay'],
+    'mwt': ['attn_type', 'batch_size', 'beam_size', 'cache_size', 'decay_epoch', 'dict_only', 'dropout', 'emb_dim',
+            'emb_dropout', 'ensemble_dict', 'ensemble_early_stop', 'hidden_dim', 'log_step', 'lr', 'lr_decay',
+            'max_dec_len', 'max_grad_norm', 'num_epoch', 'num_layers', 'optim', 'quantize', 'seed', 'vocab_size'],
+    'pos': ['adapt_eval_interval', 'batch_size', 'beta2', 'cache_size', 'char', 'char_emb_dim', 'char_hidden_dim',
+            'char_num_layers', 'char_rec_dropout', 'composite_deep_biaff_hidden_dim', 'deep_biaff_hidden_dim',
+            'dropout', 'eval_interval', 'hidden_dim', 'log_step', 'lr', 'max_grad_norm', 'max_steps',
+            'max_steps_before_stop', 'num_layers', 'optim', 'pretrain', 'quantize', 'rec_dropout', 'seed', 'share_hid',
+            'tag_emb_dim', 'transformed_dim', 'word_dropout', 'word_emb_dim', 'wordvec_dir'],
+    'lemma': ['alpha', 'attn_type', 'batch_size', 'beam_size', 'cache_size', 'decay_epoch', 'dict_only', 'dropout',
+              'edit', 'emb_dim', 'emb_dropout', 'ensemble_dict', 'hidden_dim', 'log_step', 'lr', 'lr_decay',
+              'max_dec_len', 'max_grad_norm', 'num_edit', 'num_epoch', 'num_layers', 'optim', 'pos', 'pos_dim',
+              'pos_dropout', 'pos_vocab_size', 'quantize', 'seed', 'use_identity', 'vocab_size'],
+    'depparse': ['batch_size', 'beta2', 'cache_size', 'char', 'char_emb_dim', 'char_hidden_dim', 'char_num_layers',
                  'char_rec_dropout', 'composite_deep_biaff_hidden_dim', 'deep_biaff_hidden_dim', 'distance', 'dropout',
                  'eval_interval', 'hidden_dim', 'linearization', 'log_step', 'lr', 'max_grad_norm', 'max_steps',
-                 'max_steps_before_stop', 'num_layers', 'optim', 'pretrain', 'rec_dropout', 'sample_train', 'seed',
-                 'shorthand', 'tag_emb_dim', 'transformed_dim', 'word_dropout', 'word_emb_dim', 'wordvec_dir']
+                 'max_steps_before_stop', 'num_layers', 'optim', 'pretrain', 'quantize', 'rec_dropout', 'sample_train',
+                 'seed', 'shorthand', 'tag_emb_dim', 'transformed_dim', 'word_dropout', 'word_emb_dim', 'wordvec_dir']
 }
 
 PROCESSOR_SETTINGS_LIST = \
     ['_'.join(psp) for k, v in PROCESSOR_SETTINGS.items() for psp in itertools.product([k], v)]
 
 BOOLEAN_PROCESSOR_SETTINGS = {
-    'tokenize': ['pretokenized'],
-    'mwt': ['dict_only'],
-    'lemma': ['dict_only', 'edit', 'ensemble_dict', 'pos', 'use_identity']
+    'tokenize': ['pretokenized', 'quantize'],
+    'mwt': ['dict_only', 'quantize'],
+    'pos': ['quantize'],
+    'lemma': ['dict_only', 'edit', 'ensemble_dict', 'pos', 'quantize', 'use_identity'],
+    'depparse': ['quantize']
 }
 
 BOOLEAN_PROCESSOR_SETTINGS_LIST = \
@@ -62,10 +72,24 @@ BOOLEAN_PROCESSOR_SETTINGS_LIST = \
 class Pipeline:
 
     def __init__(self, processors=DEFAULT_PROCESSORS_LIST, lang='en', models_dir=DEFAULT_MODEL_DIR, treebank=None,
-                 use_gpu=True, **kwargs):
+                 use_gpu=True, quantize=False, lazy=False, warmup=False, profile_hook=None, profile_memory=False,
+                 return_arrays=False, **kwargs):
+        """
+        With lazy=True, each processor is only loaded the first time it is needed, and warmup=True then loads
+        all processors in a background thread, so that the pipeline can be used while it is still loading.
+        profile_hook is called with the PipelineProfile of each run, e.g. stanfordnlp.pipeline.profile.log_profile.
+        The profiles only time the stages, unless profile_memory=True, which also measures the peak memory of
+        each stage at the cost of resetting the memory counters of the process or GPU around it.
+        With return_arrays=True, calling the pipeline returns the columnar arrays of Document.to_arrays, with the
+        ids of the vocabularies of the loaded pos and depparse models, instead of the Document.
+        """
         shorthand = default_treebanks[lang] if treebank is None else treebank
         config = build_default_config(shorthand, models_dir)
         config.update(kwargs)
+        # quantize all processors, unless a processor-level {processor}_quantize setting says otherwise
+        if quantize:
+            for processor_name in NAME_TO_PROCESSOR_CLASS:
+                config.setdefault('{}_quantize'.format(processor_name), True)
         self.config = config
         self.config['processors'] = processors
         self.config['lang'] = lang
@@ -79,20 +103,102 @@ class Pipeline:
         # configs that are the same for all processors
         pipeline_level_configs = {'lang': self.config['lang'], 'shorthand': self.config['shorthand'], 'mode': 'predict'}
         self.standardize_config_values()
-        # set up processors
+        # set up processor configs, processors are loaded from them on demand
+        self.processor_configs = {}
         for processor_name in self.processor_names:
             if processor_name == 'mwt' and self.config['shorthand'] not in mwt_languages:
                 continue
-            print('---')
-            print('Loading: ' + processor_name)
             curr_processor_config = self.filter_config(processor_name, self.config)
             curr_processor_config.update(pipeline_level_configs)
-            print('With settings: ')
-            print(curr_processor_config)
-            self.processors[processor_name] = NAME_TO_PROCESSOR_CLASS[processor_name](config=curr_processor_config,
-                                                                                      use_gpu=self.use_gpu)
-        print("Done loading processors!")
-        print('---')
+            self.processor_configs[processor_name] = curr_processor_config
+        # one lock per processor, so that a processor being loaded does not hold up the others
+        self.locks = {processor_name: threading.Lock() for processor_name in self.processor_configs}
+        self.pretrains = {}
+        self.pretrains_lock = threading.Lock()
+        # statistics of all runs, the statistics of each run are attached to its document
+        self.profile = PipelineProfile()
+        self.profile_hook = profile_hook
+        self.profile_memory = profile_memory
+        self.return_arrays = return_arrays
+        self._array_vocabs = None
+        self.warmup_thread = None
+        if not lazy:
+            self.warmup()
+            print("Done loading processors!")
+            print('---')
+        elif warmup:
+            self.warmup_thread = threading.Thread(target=self.warmup, name='pipeline-warmup', daemon=True)
+            self.warmup_thread.start()
+
+    def load(self, processor_name):
+        """ Get a processor of the pipeline, loading it first if needed. Returns None for skipped processors. """
+        if processor_name not in self.processor_configs:
+            return None
+        with self.locks[processor_name]:
+            if self.processors[processor_name] is None:
+                print('---')
+                print('Loading: ' + processor_name)
+                print('With settings: ')
+                print(self.processor_configs[processor_name])
+                self.processors[processor_name] = self.build_processor(processor_name)
+            return self.processors[processor_name]
+
+    def build_processor(self, processor_name):
+        """ Build a processor from its config. Processors that read the same pretrained vectors share them. """
+        config = self.processor_configs[processor_name]
+        if processor_name in PRETRAIN_PROCESSORS:
+            return NAME_TO_PROCESSOR_CLASS[processor_name](config=config, use_gpu=self.use_gpu,
+                                                           pretrain=self.get_pretrain(config['pretrain_path']))
+        return NAME_TO_PROCESSOR_CLASS[processor_name](config=config, use_gpu=self.use_gpu)
+
+    def get_pretrain(self, filename):
+        with self.pretrains_lock:
+            if filename not in self.pretrains:
+                self.pretrains[filename] = Pretrain(filename)
+            return self.pretrains[filename]
+
+    def warmup(self):
+        """ Load all processors of the pipeline that are not loaded yet. """
+        for processor_name in self.processor_configs:
+            self.load(processor_name)
+
+    def unload(self, processor_name):
+        """ Release a loaded processor. It will be loaded again the next time it is needed. """
+        if processor_name not in self.processor_configs:
+            return
+        with self.locks[processor_name]:
+            self.processors[processor_name] = None
+        with self.pretrains_lock:
+            in_use = [self.processors[name].pretrain for name in PRETRAIN_PROCESSORS if self.processors[name] is not None]
+            self.pretrains = {filename: pretrain for filename, pretrain in self.pretrains.items()
+                              if any(pretrain is p for p in in_use)}
+        gc.collect()
+        if self.use_gpu:
+            torch.cuda.empty_cache()
+
+    def array_vocabs(self):
+        """
+        The vocabularies of the loaded models, as tables of strings for Document.to_arrays: upos, xpos and feats
+        from the pos model (xpos and feats only when they are whole tags), deprel from the depparse model.
+        Models that are not loaded yet are not loaded for this, and their fields get per-document tables.
+        """
+        if self._array_vocabs is not None:
+            return self._array_vocabs
+        vocabs = {}
+        if self.is_loaded('pos'):
+            pos_vocab = self.processors['pos'].vocab
+            for field in ['upos', 'xpos', 'feats']:
+                if not isinstance(pos_vocab[field], CompositeVocab):
+                    vocabs[field] = list(pos_vocab[field]._id2unit)
+        if self.is_loaded('depparse'):
+            vocabs['deprel'] = list(self.processors['depparse'].vocab['deprel']._id2unit)
+        # keep the tables once all models that have them are loaded
+        if all(self.is_loaded(name) for name in ['pos', 'depparse'] if name in self.processor_configs):
+            self._array_vocabs = vocabs
+        return vocabs
+
+    def is_loaded(self, processor_name):
+        return self.processors.get(processor_name) is not None
 
     def filter_config(self, prefix, config_dict):
         filtered_dict = {}
@@ -112,15 +218,37 @@ class Pipeline:
                 standardized_entries[key] = strtobool(val)
         self.config.update(standardized_entries)
 
-    def process(self, doc):
+    def process(self, doc, processors=None):
+        """
+        Run the pipeline on a document. processors optionally restricts the run to some of the pipeline's
+        processors, as a list or a comma-separated string, in which case the others are not loaded.
+        """
+        if processors is None:
+            processors = self.processor_names
+        elif isinstance(processors, str):
+            processors = processors.split(',')
+        unknown = [processor_name for processor_name in processors if processor_name not in self.processor_names]
+        if len(unknown) > 0:
+            raise ValueError("Processors not in the pipeline: {}".format(','.join(unknown)))
         # run the pipeline
+        timer = StageTimer(self.use_gpu, self.profile_memory)
         for processor_name in self.processor_names:
-            if self.processors[processor_name] is not None:
-                self.processors[processor_name].process(doc)
-        doc.load_annotations()
-
-    def __call__(self, doc):
+            if processor_name in processors:
+                processor = self.load(processor_name)
+                if processor is not None:
+                    timer.time(processor_name, processor.process, doc)
+        timer.time('load_annotations', doc.load_annotations)
+        conll_file = doc.conll_file
+        doc.profile = timer.finish(conll_file.num_words if conll_file is not None else 0,
+                                   len(conll_file) if conll_file is not None else 0)
+        self.profile.merge(doc.profile)
+        if self.profile_hook is not None:
+            self.profile_hook(doc.profile)
+
+    def __call__(self, doc, processors=None):
         if isinstance(doc, str):
             doc = Document(doc)
-        self.process(doc)
+        self.process(doc, processors=processors)
+        if self.return_arrays:
+            return doc.to_arrays(self.array_vocabs())
         return doc
@@ -3,19 +3,34 @@ Basic data structures
 """
 
 import io
-import re
+import numpy as np
 
 from stanfordnlp.models.common.conll import FIELD_TO_IDX as CONLLU_FIELD_TO_IDX
 
-multi_word_token_line = re.compile("([0-9]+)\-([0-9]+)")
+ID_IDX = CONLLU_FIELD_TO_IDX['id']
+WORD_IDX = CONLLU_FIELD_TO_IDX['word']
+LEMMA_IDX = CONLLU_FIELD_TO_IDX['lemma']
+UPOS_IDX = CONLLU_FIELD_TO_IDX['upos']
+XPOS_IDX = CONLLU_FIELD_TO_IDX['xpos']
+FEATS_IDX = CONLLU_FIELD_TO_IDX['feats']
+HEAD_IDX = CONLLU_FIELD_TO_IDX['head']
+DEPREL_IDX = CONLLU_FIELD_TO_IDX['deprel']
+
+# the columns of Document.to_arrays() that are ids in a vocab table
+ARRAY_FIELDS = ['lemma', 'upos', 'xpos', 'feats', 'deprel']
+
+# how many characters past a token Document.to_arrays() looks for it, after the previous token was not found
+RESYNC_WINDOW = 100
 
 
 class Document:
+    __slots__ = ['_text', '_conll_file', '_sentences', '_profile']
 
     def __init__(self, text):
         self._text = text
         self._conll_file = None
         self._sentences = []
+        self._profile = None
 
     @property
     def conll_file(self):
@@ -47,45 +62,219 @@ class Document:
         """ Set the list of tokens for this document. """
         self._sentences = value
 
+    @property
+    def profile(self):
+        """ Access the per-stage statistics of the pipeline run that annotated this document. """
+        return self._profile
+
+    @profile.setter
+    def profile(self, value):
+        """ Set the document's pipeline statistics. """
+        self._profile = value
+
     def load_annotations(self):
-        """ Integrate info from the CoNLLFile instance. """
-        self._sentences = [Sentence(token_list) for token_list in self.conll_file.sents]
+        """
+        Integrate info from the CoNLLFile instance. Each sentence is built when it is first accessed. Words
+        read their annotations from the lines of the CoNLLFile, and setting them changes those lines too.
+        """
+        self._sentences = LazySentences(self.conll_file.sents)
 
     def write_conll_to_file(self, file_path):
         """ Write conll contents to file. """
         self.conll_file.write_conll(file_path)
 
+    def to_arrays(self, vocabs=None):
+        """
+        Export the annotations as a dict of contiguous numpy arrays, read from the CoNLL-U columns without
+        building Sentence or Word objects:
+            sentence_offsets  (sentences + 1,)  the words of sentence i are words [offsets[i], offsets[i+1])
+            sentence_tokens   (sentences + 1,)  the same for tokens
+            token_offsets     (tokens + 1,)     the words of token i
+            token_chars       (tokens, 2)       character span of each token in the text, -1 if the text differs
+            lemma, upos, xpos, feats, deprel  (words,)  ids in vocab[field], -1 for empty ('_') values
+            head              (words,)          head of each word in its sentence (1-based, 0 for the root),
+                                                -1 if unparsed
+            vocab             {field: list of strings}
+        vocabs maps fields to fixed tables of strings (e.g. those of the models), so that ids are the same
+        across documents; strings missing from them are appended to the returned table.
+        """
+        vocabs = vocabs or {}
+        tables = {field: list(vocabs.get(field, [])) for field in ARRAY_FIELDS}
+        ids = {field: {unit: i for i, unit in enumerate(table)} for field, table in tables.items()}
+        columns = {field: [] for field in ARRAY_FIELDS}
+        field_idxs = [(field, CONLLU_FIELD_TO_IDX[field]) for field in ARRAY_FIELDS]
+        heads, sentence_offsets, sentence_tokens, token_offsets, token_chars = [], [0], [0], [0], []
+        text = self.text or ''
+        cursor, lost = 0, False
+        sents = self.conll_file.sents if self.conll_file is not None else []
+        for sent in sents:
+            mwt_end = -1
+            for ln in sent:
+                idx = ln[ID_IDX]
+                is_mwt = '-' in idx
+                if is_mwt:
+                    mwt_end = int(idx.split('-')[1])
+                elif mwt_end < 0 or int(idx) > mwt_end:
+                    mwt_end = -1
+                if is_mwt or mwt_end < 0:
+                    # a new token, expected at the first non-space character after the previous one
+                    surface = ln[WORD_IDX]
+                    start = cursor
+                    while start < len(text) and text[start].isspace():
+                        start += 1
+                    if lost:
+                        # after a token that was not found, the token is searched in the rest of the current
+                        # whitespace-separated chunk and in the next one, so that the tokens can match again
+                        limit = min(len(text), start + len(surface) + RESYNC_WINDOW)
+                        end = start
+                        while end < limit and not text[end].isspace():
+                            end += 1
+                        while end < limit and text[end].isspace():
+                            end += 1
+                        while end < limit and not text[end].isspace():
+                            end += 1
+                        found = text.find(surface, start, end)
+                        start = found if found >= 0 else start
+                    else:
+                        found = start if text.startswith(surface, start) else -1
+                    # on a miss, skip as many characters as the token has
+                    cursor = min(start + len(surface), len(text))
+                    lost = found < 0
+                    token_chars.append((start, cursor) if found >= 0 else (-1, -1))
+                    if len(token_chars) > 1:
+                        token_offsets.append(len(heads))
+                if is_mwt:
+                    continue
+                for field, fidx in field_idxs:
+                    unit = ln[fidx]
+                    if unit == '_':
+                        columns[field].append(-1)
+                        continue
+                    field_ids = ids[field]
+                    unit_id = field_ids.get(unit)
+                    if unit_id is None:
+                        unit_id = field_ids[unit] = len(tables[field])
+                        tables[field].append(unit)
+                    columns[field].append(unit_id)
+                heads.append(int(ln[HEAD_IDX]) if ln[DEPREL_IDX] != '_' else -1)
+            sentence_offsets.append(len(heads))
+            sentence_tokens.append(len(token_chars))
+        if len(token_chars) > 0:
+            token_offsets.append(len(heads))
+
+        arrays = {field: np.array(column, dtype=np.int32) for field, column in columns.items()}
+        arrays['head'] = np.array(heads, dtype=np.int32)
+        arrays['sentence_offsets'] = np.array(sentence_offsets, dtype=np.int64)
+        arrays['sentence_tokens'] = np.array(sentence_tokens, dtype=np.int64)
+        arrays['token_offsets'] = np.array(token_offsets, dtype=np.int64)
+        arrays['token_chars'] = np.array(token_chars, dtype=np.int64).reshape(-1, 2)
+        arrays['vocab'] = tables
+        return arrays
+
+class LazySentences(list):
+    """
+    The sentences of a document, as a list whose sentences are built from their CoNLL-U lines when first
+    accessed. Indexing and iterating build the sentences they reach; the other operations that read the
+    whole list, and those that move sentences around, build all of them first.
+    """
+    __slots__ = ['_lines']
+
+    def __init__(self, lines):
+        list.__init__(self, [None] * len(lines))
+        # the lines of the sentences that are not built yet, None once all of them are
+        self._lines = lines
+
+    def _build(self, idx):
+        sentence = list.__getitem__(self, idx)
+        if sentence is None and self._lines is not None:
+            idx = idx + len(self) if idx < 0 else idx
+            if idx < len(self._lines):
+                sentence = Sentence(self._lines[idx])
+                list.__setitem__(self, idx, sentence)
+        return sentence
+
+    def _build_all(self):
+        if self._lines is not None:
+            for idx in range(len(self._lines)):
+                self._build(idx)
+            self._lines = None
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._build(i) for i in range(*idx.indices(len(self)))]
+        return self._build(idx)
+
+    def __iter__(self):
+        idx = 0
+        while idx < len(self):
+            yield self._build(idx)
+            idx += 1
+
+    def __reversed__(self):
+        for idx in range(len(self) - 1, -1, -1):
+            yield self._build(idx)
+
+    def __setitem__(self, idx, value):
+        if isinstance(idx, slice):
+            self._build_all()
+        list.__setitem__(self, idx, value)
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return other + list(self)
+
+
+def _build_all_first(name):
+    method = getattr(list, name)
+    def build_all_first(self, *args, **kwargs):
+        self._build_all()
+        return method(self, *args, **kwargs)
+    build_all_first.__name__ = name
+    build_all_first.__doc__ = method.__doc__
+    return build_all_first
+
+# list operations that read the items directly, or change their positions
+for name in ['__contains__', '__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__', '__add__', '__mul__',
+             '__rmul__', '__imul__', '__delitem__', '__repr__', 'copy', 'count', 'index', 'insert', 'pop',
+             'remove', 'reverse', 'sort']:
+    setattr(LazySentences, name, _build_all_first(name))
+
 class Sentence:
+    __slots__ = ['_lines', '_tokens', '_words', '_dependencies']
 
     def __init__(self, tokens):
-        self._tokens = []
-        self._words = []
-        self._process_tokens(tokens)
-        self._dependencies = []
-        # check if there is dependency info
-        if self.words[0].dependency_relation is not None:
-            self.build_dependencies()
-
-    def _process_tokens(self, tokens):
-        st, en = -1, -1
-        for tok in tokens:
-            m = multi_word_token_line.match(tok[CONLLU_FIELD_TO_IDX['id']])
-            if m:
-                st, en = int(m.group(1)), int(m.group(2))
+        # tokens and words are built from the CoNLL-U lines when first accessed
+        self._lines = tokens
+        self._tokens = None
+        self._words = None
+        self._dependencies = None
+
+    def _process_tokens(self):
+        self._tokens, self._words = [], []
+        en = -1
+        for tok in self._lines:
+            idx = tok[ID_IDX]
+            if '-' in idx:
+                en = int(idx.split('-')[1])
                 self._tokens.append(Token(tok))
             else:
                 new_word = Word(tok)
                 self._words.append(new_word)
-                idx = int(tok[CONLLU_FIELD_TO_IDX['id']])
-                if idx <= en:
+                if en >= 0 and int(idx) <= en:
                     self._tokens[-1].words.append(new_word)
                     new_word.parent_token = self._tokens[-1]
                 else:
-                    self.tokens.append(Token(tok, words=[new_word]))
+                    self._tokens.append(Token(tok, words=[new_word]))
 
     @property
     def dependencies(self):
         """ Access list of dependencies for this sentence. """
+        if self._dependencies is None:
+            self._dependencies = []
+            # check if there is dependency info
+            if len(self.words) > 0 and self.words[0].dependency_relation is not None:
+                self.build_dependencies()
         return self._dependencies
 
     @dependencies.setter
@@ -96,32 +285,45 @@ class Sentence:
     @property
     def tokens(self):
         """ Access list of tokens for this sentence. """
+        if self._tokens is None:
+            self._process_tokens()
         return self._tokens
 
     @tokens.setter
     def tokens(self, value):
         """ Set the list of tokens for this sentence. """
+        if self._words is None:
+            self._process_tokens()
         self._tokens = value
 
     @property
     def words(self):
         """ Access list of words for this sentence. """
+        if self._words is None:
+            self._process_tokens()
         return self._words
 
     @words.setter
     def words(self, value):
         """ Set the list of words for this sentence. """
+        if self._tokens is None:
+            self._process_tokens()
         self._words = value
 
     def build_dependencies(self):
+        if self._dependencies is None:
+            self._dependencies = []
+        root = None
         for word in self.words:
             if word.governor == 0:
-                # make a word for the ROOT
-                governor = Word(["0", "ROOT", "_", "_", "_", "_", "-1", "_", "_", "_", "_", "_"])
+                # one word for the ROOT, shared by the dependencies of the sentence
+                if root is None:
+                    root = Word(["0", "ROOT", "_", "_", "_", "_", "-1", "_", "_", "_"])
+                governor = root
             else:
                 # id is index in words list + 1
                 governor = self.words[word.governor-1]
-            self.dependencies.append((governor, word.dependency_relation, word))
+            self._dependencies.append((governor, word.dependency_relation, word))
 
     def print_dependencies(self, file=None):
         for dep_edge in self.dependencies:
@@ -151,11 +353,13 @@ class Sentence:
         return wrds_string.getvalue().strip()
 
 
+
 class Token:
+    __slots__ = ['_index', '_text', '_words']
 
     def __init__(self, token_entry, words=None):
-        self._index = token_entry[CONLLU_FIELD_TO_IDX['id']]
-        self._text = token_entry[CONLLU_FIELD_TO_IDX['word']]
+        self._index = token_entry[ID_IDX]
+        self._text = token_entry[WORD_IDX]
         if words is None:
             self.words = []
         else:
@@ -197,109 +401,103 @@ class Token:
         return f"<{self.__class__.__name__} index={self.index};words={self.words}>"
 
 class Word:
+    """
+    A syntactic word, which reads its annotations from its CoNLL-U line (a list of fields), so that setting
+    them also updates the line.
+    """
+    __slots__ = ['_entry', '_parent_token']
 
     def __init__(self, word_entry):
-        self._index = word_entry[CONLLU_FIELD_TO_IDX['id']]
-        self._text = word_entry[CONLLU_FIELD_TO_IDX['word']]
-        self._lemma = word_entry[CONLLU_FIELD_TO_IDX['lemma']]
-        if self._lemma == '_':
-            self._lemma = None
-        self._upos = word_entry[CONLLU_FIELD_TO_IDX['upos']]
-        self._xpos = word_entry[CONLLU_FIELD_TO_IDX['xpos']]
-        self._feats = word_entry[CONLLU_FIELD_TO_IDX['feats']]
-        if self._upos == '_':
-            self._upos = None
-            self._xpos = None
-            self._feats = None
-        self._governor = word_entry[CONLLU_FIELD_TO_IDX['head']]
-        self._dependency_relation = word_entry[CONLLU_FIELD_TO_IDX['deprel']]
+        self._entry = word_entry
         self._parent_token = None
-        # check if there is dependency information
-        if self._dependency_relation != '_':
-            self._governor = int(self._governor)
-        else:
-            self._governor = None
-            self._dependency_relation = None
 
     @property
     def dependency_relation(self):
         """ Access dependency relation of this word. Example: 'nmod'"""
-        return self._dependency_relation
+        deprel = self._entry[DEPREL_IDX]
+        return deprel if deprel != '_' else None
 
     @dependency_relation.setter
     def dependency_relation(self, value):
         """ Set the word's dependency relation value. Example: 'nmod'"""
-        self._dependency_relation = value
+        self._entry[DEPREL_IDX] = value if value is not None else '_'
 
     @property
     def lemma(self):
         """ Access lemma of this word. """
-        return self._lemma
+        lemma = self._entry[LEMMA_IDX]
+        return lemma if lemma != '_' else None
 
     @lemma.setter
     def lemma(self, value):
         """ Set the word's lemma value. """
-        self._lemma = value
+        self._entry[LEMMA_IDX] = value if value is not None else '_'
 
     @property
     def governor(self):
         """ Access governor of this word. """
-        return self._governor
+        # there is dependency information only if there is a relation, the tokenizer fills in the heads
+        head = self._entry[HEAD_IDX]
+        return int(head) if head != '_' and self._entry[DEPREL_IDX] != '_' else None
 
     @governor.setter
     def governor(self, value):
         """ Set the word's governor value. """
-        self._governor = value
+        self._entry[HEAD_IDX] = str(value) if value is not None else '_'
 
     @property
     def pos(self):
         """ Access (treebank-specific) part-of-speech of this word. Example: 'NNP'"""
-        return self._xpos
+        return self.xpos
 
     @pos.setter
     def pos(self, value):
         """ Set the word's (treebank-specific) part-of-speech value. Example: 'NNP'"""
-        self._xpos = value
+        self.xpos = value
 
     @property
     def text(self):
         """ Access text of this word. Example: 'The'"""
-        return self._text
+        return self._entry[WORD_IDX]
 
     @text.setter
     def text(self, value):
         """ Set the word's text value. Example: 'The'"""
-        self._text = value
+        self._entry[WORD_IDX] = value
 
     @property
     def xpos(self):
         """ Access treebank-specific part-of-speech of this word. Example: 'NNP'"""
-        return self._xpos
+        xpos = self._entry[XPOS_IDX]
+        # words without a UPOS have no tags at all
+        return xpos if xpos != '_' or self._entry[UPOS_IDX] != '_' else None
 
     @xpos.setter
     def xpos(self, value):
         """ Set the word's treebank-specific part-of-speech value. Example: 'NNP'"""
-        self._xpos = value
+        self._entry[XPOS_IDX] = value if value is not None else '_'
 
     @property
     def upos(self):
         """ Access universal part-of-speech of this word. Example: 'DET'"""
-        return self._upos
+        upos = self._entry[UPOS_IDX]
+        return upos if upos != '_' else None
 
     @upos.setter
     def upos(self, value):
         """ Set the word's universal part-of-speech value. Example: 'DET'"""
-        self._upos = value
+        self._entry[UPOS_IDX] = value if value is not None else '_'
 
     @property
     def feats(self):
         """ Access morphological features of this word. Example: 'Gender=Fem'"""
-        return self._feats
+        feats = self._entry[FEATS_IDX]
+        return feats if feats != '_' or self._entry[UPOS_IDX] != '_' else None
 
     @feats.setter
     def feats(self, value):
         """ Set this word's morphological features. Example: 'Gender=Fem'"""
-        self._feats = value
+        self._entry[FEATS_IDX] = value if value is not None else '_'
 
     @property
     def parent_token(self):
@@ -314,12 +512,12 @@ class Word:
     @property
     def index(self):
         """ Access index of this word. """
-        return self._index
+        return self._entry[ID_IDX]
 
     @index.setter
     def index(self, value):
         """ Set the word's index value. """
-        self._index = value
+        self._entry[ID_IDX] = value
 
     def __repr__(self):
         features = ['index', 'text', 'lemma', 'upos', 'xpos', 'feats', 'governor', 'dependency_relation']
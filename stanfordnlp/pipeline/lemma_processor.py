@@ -1,8 +1,12 @@
 from stanfordnlp.models.common.conll import FIELD_TO_IDX
+from stanfordnlp.models.common.lru_cache import LRUCache
 from stanfordnlp.models.lemma.data import DataLoader
 from stanfordnlp.models.lemma.trainer import Trainer
 from stanfordnlp.pipeline.processor import UDProcessor
 
+# default number of (word, upos) seq2seq predictions kept across calls
+DEFAULT_CACHE_SIZE = 100000
+
 
 class LemmaProcessor(UDProcessor):
 
@@ -15,30 +19,54 @@ class LemmaProcessor(UDProcessor):
             self.use_identity = False
             self.trainer = Trainer(model_file=config['model_path'], use_cuda=use_gpu)
             self.build_final_config(config)
+            self.quantize()
+            self.cache = LRUCache(int(self.config.get('cache_size', DEFAULT_CACHE_SIZE)))
 
     def process(self, doc):
-        if not self.use_identity:
-            batch = DataLoader(doc, self.config['batch_size'], self.config, vocab=self.vocab, evaluation=True)
-        else:
-            batch = DataLoader(doc, self.config['batch_size'], self.config, evaluation=True, conll_only=True)
+        batch = DataLoader(doc, self.config['batch_size'], self.config, evaluation=True, conll_only=True)
         if self.use_identity:
             preds = [ln[FIELD_TO_IDX['word']] for sent in batch.conll.sents for ln in sent if '-' not in ln[0]]
         elif self.config.get('dict_only', False):
             preds = self.trainer.predict_dict(batch.conll.get(['word', 'upos']))
         else:
-            preds = []
-            edits = []
-            for i, b in enumerate(batch):
-                ps, es = self.trainer.predict(b, self.config['beam_size'])
-                preds += ps
-                if es is not None:
-                    edits += es
-            preds = self.trainer.postprocess(batch.conll.get(['word']), preds, edits=edits)
+            preds = self.predict(batch.conll.get(['word', 'upos']))
 
-            if self.config.get('ensemble_dict', False):
-                preds = self.trainer.ensemble(batch.conll.get(['word', 'upos']), preds)
-        
         # map empty string lemmas to '_'
         preds = [max([(len(x),x), (0, '_')])[1] for x in preds]
         batch.conll.set(['lemma'], preds)
 
+    def predict(self, pairs):
+        """
+        Lemmatize (word, upos) pairs. Dictionary hits are resolved first when ensembling with the dict,
+        and only the distinct remaining pairs that are not in the prediction cache are run through the
+        seq2seq model.
+        """
+        ensemble_dict = self.config.get('ensemble_dict', False)
+        preds = [None] * len(pairs)
+        unseen = dict() # (word, upos) -> positions, in order of first occurrence
+        for i, (word, upos) in enumerate(pairs):
+            lemma = self.trainer.lookup_dict(word, upos) if ensemble_dict else None
+            if lemma is None:
+                lemma = self.cache.get((word, upos))
+            if lemma is not None:
+                preds[i] = lemma
+            else:
+                unseen.setdefault((word, upos), []).append(i)
+
+        if len(unseen) > 0:
+            keys = list(unseen.keys())
+            batch = DataLoader([[word, upos, '_'] for word, upos in keys], self.config['batch_size'], self.config,
+                               vocab=self.vocab, evaluation=True)
+            seq2seq_preds = []
+            edits = []
+            for i, b in enumerate(batch):
+                ps, es = self.trainer.predict(b, self.config['beam_size'])
+                seq2seq_preds += ps
+                if es is not None:
+                    edits += es
+            seq2seq_preds = self.trainer.postprocess([word for word, _ in keys], seq2seq_preds, edits=edits)
+            for key, lemma in zip(keys, seq2seq_preds):
+                self.cache.put(key, lemma)
+                for i in unseen[key]:
+                    preds[i] = lemma
+        return preds
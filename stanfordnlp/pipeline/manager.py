@@ -0,0 +1,166 @@
+"""
+Manager of pipelines for many languages, which keeps the recently used ones loaded within a memory budget.
+"""
+
+import gc
+import os
+import threading
+import weakref
+import torch
+
+from collections import OrderedDict
+from stanfordnlp.models.common.pretrain import Pretrain
+from stanfordnlp.pipeline.core import Pipeline, DEFAULT_PROCESSORS_LIST, PRETRAIN_PROCESSORS
+from stanfordnlp.pipeline.doc import Document
+from stanfordnlp.utils.resources import DEFAULT_MODEL_DIR, default_treebanks
+
+
+class ManagedPipeline(Pipeline):
+    """ A lazily loaded pipeline whose processors and pretrained vectors come from its manager. """
+
+    def __init__(self, manager, **kwargs):
+        self.manager = manager
+        super().__init__(lazy=True, **kwargs)
+
+    def build_processor(self, processor_name):
+        return self.manager.get_processor(self, processor_name)
+
+    def get_pretrain(self, filename):
+        return self.manager.get_pretrain(filename)
+
+
+class PipelineManager:
+    """
+    Pipelines for many languages, built on first request and evicted when least recently used.
+
+    Processors are loaded lazily by each pipeline, and processors with identical configs, as well as the
+    pretrained vectors read from the same file, are shared as long as any pipeline still holds them. Each
+    of them is built once, under a lock of its own, so that concurrent requests for it wait for that build
+    without holding up the others. The shared processors are thread-safe, so the pipelines that share them
+    can run concurrently. The memory budget max_memory (in bytes) is checked against the size on disk of the model and pretrain
+    files of the loaded processors, and max_pipelines bounds the number of pipelines kept. The most
+    recently used pipeline is never evicted.
+    """
+
+    def __init__(self, processors=DEFAULT_PROCESSORS_LIST, models_dir=DEFAULT_MODEL_DIR, use_gpu=True,
+                 max_memory=None, max_pipelines=None, **kwargs):
+        self.processors = processors
+        self.models_dir = models_dir
+        self.use_gpu = use_gpu
+        self.max_memory = max_memory
+        self.max_pipelines = max_pipelines
+        self.kwargs = kwargs
+        self.pipelines = OrderedDict() # shorthand -> pipeline, least recently used first
+        self.shared_processors = weakref.WeakValueDictionary()
+        self.shared_pretrains = weakref.WeakValueDictionary()
+        self.lock = threading.RLock()
+        self.build_locks = {} # key of a processor or pretrain being built -> lock held while building it
+        # counters
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.processor_loads = 0
+        self.processor_shares = 0
+
+    def get(self, lang='en', treebank=None):
+        """ Get the pipeline of a language (or of a specific treebank), building it if it is not loaded. """
+        shorthand = default_treebanks[lang] if treebank is None else treebank
+        with self.lock:
+            if shorthand in self.pipelines:
+                self.hits += 1
+                self.pipelines.move_to_end(shorthand)
+                return self.pipelines[shorthand]
+            self.loads += 1
+            pipeline = ManagedPipeline(self, processors=self.processors, lang=lang, models_dir=self.models_dir,
+                                       treebank=shorthand, use_gpu=self.use_gpu, **self.kwargs)
+            self.pipelines[shorthand] = pipeline
+            self.enforce_budget()
+            return pipeline
+
+    def process(self, doc, lang='en', treebank=None, processors=None):
+        """ Annotate a document (or a string) with the pipeline of a language, and return it. """
+        if isinstance(doc, str):
+            doc = Document(doc)
+        self.get(lang, treebank).process(doc, processors=processors)
+        # processors are loaded on demand, so the footprint may have grown
+        with self.lock:
+            self.enforce_budget()
+        return doc
+
+    def __call__(self, doc, lang='en', treebank=None, processors=None):
+        return self.process(doc, lang=lang, treebank=treebank, processors=processors)
+
+    def get_processor(self, pipeline, processor_name):
+        """ Build a processor for a pipeline, or reuse a loaded one with the same config. """
+        config = pipeline.processor_configs[processor_name]
+        key = (processor_name, pipeline.use_gpu, tuple(sorted((k, repr(v)) for k, v in config.items())))
+        processor, built = self.get_shared(self.shared_processors, key,
+                                           lambda: Pipeline.build_processor(pipeline, processor_name))
+        with self.lock:
+            if built:
+                self.processor_loads += 1
+            else:
+                self.processor_shares += 1
+        return processor
+
+    def get_pretrain(self, filename):
+        pretrain, _ = self.get_shared(self.shared_pretrains, filename, lambda: Pretrain(filename))
+        return pretrain
+
+    def get_shared(self, shared, key, build):
+        """
+        Get the object stored under a key of a shared table, building and storing it if needed. Only one
+        thread builds it, the others wait for the build. Returns the object and whether it was built here.
+        """
+        with self.lock:
+            obj = shared.get(key)
+            if obj is not None:
+                return obj, False
+            build_lock = self.build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            with self.lock:
+                obj = shared.get(key)
+            if obj is not None:
+                return obj, False
+            try:
+                obj = build()
+                with self.lock:
+                    shared[key] = obj
+            finally:
+                with self.lock:
+                    self.build_locks.pop(key, None)
+            return obj, True
+
+    def evict(self, shorthand):
+        """ Drop the pipeline of a treebank. Its processors are released once no other pipeline uses them. """
+        with self.lock:
+            if self.pipelines.pop(shorthand, None) is None:
+                return
+            self.evictions += 1
+        gc.collect()
+        if self.use_gpu and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def enforce_budget(self):
+        """ Evict least recently used pipelines until the loaded ones fit in the limits. """
+        while len(self.pipelines) > 1 and (
+                (self.max_pipelines is not None and len(self.pipelines) > self.max_pipelines) or
+                (self.max_memory is not None and self.memory_size() > self.max_memory)):
+            self.evict(next(iter(self.pipelines)))
+
+    def memory_size(self):
+        """ Estimated memory taken by the loaded pipelines: the size of the files their processors were loaded from. """
+        files = set()
+        for pipeline in self.pipelines.values():
+            for processor_name, config in pipeline.processor_configs.items():
+                if not pipeline.is_loaded(processor_name):
+                    continue
+                files.update(config[k] for k in ['model_path', 'pretrain_path'] if k in config and
+                             (k == 'model_path' or processor_name in PRETRAIN_PROCESSORS))
+        return sum(os.path.getsize(f) for f in files if os.path.exists(f))
+
+    def stats(self):
+        with self.lock:
+            return {'pipelines': list(self.pipelines.keys()), 'memory_size': self.memory_size(), 'hits': self.hits,
+                    'loads': self.loads, 'evictions': self.evictions, 'processor_loads': self.processor_loads,
+                    'processor_shares': self.processor_shares}
@@ -1,10 +1,14 @@
 import io
 
 from stanfordnlp.models.common import conll
+from stanfordnlp.models.common.lru_cache import LRUCache
 from stanfordnlp.models.mwt.data import DataLoader
 from stanfordnlp.models.mwt.trainer import Trainer
 from stanfordnlp.pipeline.processor import UDProcessor
 
+# default number of seq2seq expansions kept across calls
+DEFAULT_CACHE_SIZE = 10000
+
 
 class MWTProcessor(UDProcessor):
 
@@ -12,26 +16,48 @@ class MWTProcessor(UDProcessor):
         # set up configurations
         self.trainer = Trainer(model_file=config['model_path'], use_cuda=use_gpu)
         self.build_final_config(config)
+        self.quantize()
+        self.cache = LRUCache(int(self.config.get('cache_size', DEFAULT_CACHE_SIZE)))
 
     def process(self, doc):
-        batch = DataLoader(doc, self.config['batch_size'], self.config, vocab=self.vocab, evaluation=True)
-        if len(batch) > 0:
-            dict_preds = self.trainer.predict_dict(batch.conll.get_mwt_expansion_cands())
-            # decide trainer type and run eval
-            if self.config['dict_only']:
-                preds = dict_preds
-            else:
-                preds = []
-                for i, b in enumerate(batch):
-                    preds += self.trainer.predict(b)
-
-                if self.config.get('ensemble_dict', False):
-                    preds = self.trainer.ensemble(batch.conll.get_mwt_expansion_cands(), preds)
+        cands = doc.conll_file.get_mwt_expansion_cands()
+        # decide trainer type and run eval
+        if self.config['dict_only']:
+            preds = self.trainer.predict_dict(cands)
         else:
-            # skip eval if dev data does not exist
-            preds = []
+            preds = self.predict(cands)
 
         with io.StringIO() as conll_with_mwt:
-            batch.conll.write_conll_with_mwt_expansions(preds, conll_with_mwt)
+            doc.conll_file.write_conll_with_mwt_expansions(preds, conll_with_mwt)
             doc.conll_file = conll.CoNLLFile(input_str=conll_with_mwt.getvalue())
 
+    def predict(self, cands):
+        """
+        Expand MWT candidates. Dictionary hits are resolved first when ensembling with the dict, and
+        only the distinct remaining surface forms that are not in the expansion cache are run through
+        the seq2seq model.
+        """
+        ensemble_dict = self.config.get('ensemble_dict', False)
+        preds = [None] * len(cands)
+        unseen = dict() # word -> positions, in order of first occurrence
+        for i, word in enumerate(cands):
+            expansion = self.trainer.lookup_dict(word) if ensemble_dict else None
+            if expansion is None:
+                expansion = self.cache.get(word)
+            if expansion is not None:
+                preds[i] = expansion
+            else:
+                unseen.setdefault(word, []).append(i)
+
+        if len(unseen) > 0:
+            words = list(unseen.keys())
+            batch = DataLoader([[word] for word in words], self.config['batch_size'], self.config, vocab=self.vocab,
+                               evaluation=True)
+            seq2seq_preds = []
+            for i, b in enumerate(batch):
+                seq2seq_preds += self.trainer.predict(b)
+            for word, expansion in zip(words, seq2seq_preds):
+                self.cache.put(word, expansion)
+                for i in unseen[word]:
+                    preds[i] = expansion
+        return preds
@@ -6,13 +6,15 @@ from stanfordnlp.pipeline.processor import UDProcessor
 
 class POSProcessor(UDProcessor):
 
-    def __init__(self, config, use_gpu):
+    def __init__(self, config, use_gpu, pretrain=None):
         # set up configurations
-        # get pretrained word vectors
-        self.pretrain = Pretrain(config['pretrain_path'])
+        # get pretrained word vectors, unless they are shared with another processor
+        self.pretrain = Pretrain(config['pretrain_path']) if pretrain is None else pretrain
         # set up trainer
         self.trainer = Trainer(pretrain=self.pretrain, model_file=config['model_path'], use_cuda=use_gpu)
         self.build_final_config(config)
+        self.quantize()
+        self.set_char_cache_size()
 
     def process(self, doc):
         batch = DataLoader(
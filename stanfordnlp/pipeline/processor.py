@@ -4,6 +4,9 @@ base classes for processors
 
 from abc import ABC, abstractmethod
 
+from stanfordnlp.models.common.export import is_scripted
+from stanfordnlp.models.common.quantization import quantize_model
+
 
 # base class for all processors
 class Processor(ABC):
@@ -31,6 +34,24 @@ class UDProcessor(Processor):
         loaded_args.update(config)
         self.config = loaded_args
 
+    def quantize(self):
+        """ Apply dynamic int8 quantization to the loaded model, if the config asks for it. """
+        if not self.config.get('quantize', False) or self.trainer is None or self.trainer.model is None:
+            return
+        if self.trainer.use_cuda:
+            print("Dynamic quantization is only supported on CPU, running the float model.")
+            return
+        if is_scripted(self.trainer.model):
+            print("Dynamic quantization is not supported for exported models, running the model as it is.")
+            return
+        self.trainer.model = quantize_model(self.trainer.model)
+
+    def set_char_cache_size(self):
+        """ Size the word representation cache of the character model from the cache_size setting, if given. """
+        charmodel = getattr(self.trainer.model, 'charmodel', None)
+        if charmodel is not None and self.config.get('cache_size') is not None:
+            charmodel.set_cache_size(int(self.config['cache_size']))
+
     @staticmethod
     def filter_out_option(option):
         options_to_filter = ['cpu', 'cuda', 'dev_conll_gold', 'epochs', 'lang', 'mode', 'save_name', 'shorthand']
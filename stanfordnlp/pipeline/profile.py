@@ -0,0 +1,199 @@
+"""
+Timing and throughput statistics of the pipeline stages.
+"""
+
+import logging
+import threading
+import time
+import torch
+
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+logger = logging.getLogger('stanfordnlp')
+
+
+# the peak RSS of the process before the last reset of VmHWM, which also resets ru_maxrss
+_process_peak_rss = 0
+_peak_rss_lock = threading.Lock()
+
+
+def _current_peak_rss():
+    """ VmHWM of the process in bytes, the peak RSS since it was last reset. None if it cannot be read. """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_memory(use_gpu=False):
+    """
+    Peak memory in bytes over the lifetime of the process: allocated on the GPU if it is used, otherwise the
+    peak RSS of the process.
+    """
+    if use_gpu:
+        return torch.cuda.max_memory_allocated()
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux
+    return max(_process_peak_rss, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def reset_peak_memory(use_gpu=False):
+    """
+    Start measuring the peak memory of a stage: reset the peak allocated on the GPU, or the peak RSS of the
+    process, which Linux allows through /proc/self/clear_refs. Returns whether the peak could be reset.
+    """
+    global _process_peak_rss
+    if use_gpu:
+        torch.cuda.synchronize()
+        # reset_peak_memory_stats replaces reset_max_memory_allocated from torch 1.4
+        getattr(torch.cuda, 'reset_peak_memory_stats', torch.cuda.reset_max_memory_allocated)()
+        return True
+    with _peak_rss_lock:
+        peak = _current_peak_rss()
+        if peak is None:
+            return False
+        try:
+            with open('/proc/self/clear_refs', 'w') as f:
+                f.write('5')
+        except OSError:
+            return False
+        _process_peak_rss = max(_process_peak_rss, peak)
+        return True
+
+
+def stage_peak_memory(use_gpu=False):
+    """ Peak memory in bytes since reset_peak_memory, allocated on the GPU or the RSS of the process. """
+    if use_gpu:
+        return torch.cuda.max_memory_allocated()
+    return _current_peak_rss() or 0
+
+
+class StageStats:
+    """ Accumulated statistics of one stage of the pipeline. """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.time = 0.0
+        self.tokens = 0
+        self.sentences = 0
+        self.peak_memory = 0
+
+    def add(self, time, tokens, sentences, peak_memory):
+        self.calls += 1
+        self.time += time
+        self.tokens += tokens
+        self.sentences += sentences
+        self.peak_memory = max(self.peak_memory, peak_memory)
+
+    @property
+    def tokens_per_sec(self):
+        return self.tokens / self.time if self.time > 0 else 0.0
+
+    @property
+    def sentences_per_sec(self):
+        return self.sentences / self.time if self.time > 0 else 0.0
+
+    def to_dict(self):
+        return {'calls': self.calls, 'time': self.time, 'tokens': self.tokens, 'sentences': self.sentences,
+                'tokens_per_sec': self.tokens_per_sec, 'sentences_per_sec': self.sentences_per_sec,
+                'peak_memory': self.peak_memory}
+
+
+class PipelineProfile:
+    """
+    Per-stage statistics of one or more pipeline runs. Each processor is a stage, and so is building the
+    sentences of the document from the CoNLL-U annotations (load_annotations). Token and sentence counts are
+    those of the annotated document. The peak memory of a stage is the highest of its calls: the memory
+    allocated on the GPU, or on CPU the RSS of the process while the stage ran, which is only measured on Linux.
+    It is only measured when memory profiling is turned on, and is 0 otherwise.
+    """
+
+    def __init__(self):
+        self.stages = OrderedDict()
+        self.lock = threading.Lock()
+
+    def record(self, name, time, tokens, sentences, peak_memory):
+        with self.lock:
+            if name not in self.stages:
+                self.stages[name] = StageStats(name)
+            self.stages[name].add(time, tokens, sentences, peak_memory)
+
+    def merge(self, other):
+        """ Add the statistics of another profile to this one. """
+        for name, stats in other.stages.items():
+            with self.lock:
+                if name not in self.stages:
+                    self.stages[name] = StageStats(name)
+                total = self.stages[name]
+                total.calls += stats.calls
+                total.time += stats.time
+                total.tokens += stats.tokens
+                total.sentences += stats.sentences
+                total.peak_memory = max(total.peak_memory, stats.peak_memory)
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+
+    @property
+    def time(self):
+        return sum(stats.time for stats in self.stages.values())
+
+    def to_dict(self):
+        return OrderedDict((name, stats.to_dict()) for name, stats in self.stages.items())
+
+    def __str__(self):
+        lines = ["{:<18}{:>8}{:>12}{:>14}{:>14}{:>12}".format('stage', 'calls', 'time (s)', 'tokens/s', 'sents/s', 'peak (MB)')]
+        for name, stats in self.stages.items():
+            lines.append("{:<18}{:>8}{:>12.3f}{:>14.1f}{:>14.1f}{:>12.1f}".format(name, stats.calls, stats.time,
+                    stats.tokens_per_sec, stats.sentences_per_sec, stats.peak_memory / 2**20))
+        return '\n'.join(lines)
+
+
+class StageTimer:
+    """
+    Times the stages of one pipeline run into a new profile. With profile_memory=True, the peak memory of each
+    stage is measured too, which resets the peak memory counters of the process (or of the GPU, and waits for
+    the GPU to finish each stage) around every stage.
+    """
+
+    def __init__(self, use_gpu=False, profile_memory=False):
+        self.use_gpu = use_gpu
+        self.profile_memory = profile_memory
+        self.profile = PipelineProfile()
+        self.times = []
+
+    def time(self, name, func, *args):
+        # the peak memory of each stage, 0 where it is not measured
+        measure_memory = self.profile_memory and reset_peak_memory(self.use_gpu)
+        start = time.perf_counter()
+        res = func(*args)
+        if measure_memory and self.use_gpu:
+            torch.cuda.synchronize()
+        memory = stage_peak_memory(self.use_gpu) if measure_memory else 0
+        self.times.append((name, time.perf_counter() - start, memory))
+        return res
+
+    def finish(self, tokens, sentences):
+        """ Record the timed stages with the final size of the document, and return the profile. """
+        for name, elapsed, memory in self.times:
+            self.profile.record(name, elapsed, tokens, sentences, memory)
+        return self.profile
+
+
+def log_profile(profile, level=logging.INFO):
+    """ A profile hook for Pipeline that sends the statistics of each run to the stanfordnlp logger. """
+    for name, stats in profile.stages.items():
+        logger.log(level, "%s: %.3fs, %.1f tokens/s, %.1f sentences/s, peak memory %.1fMB", name, stats.time,
+                   stats.tokens_per_sec, stats.sentences_per_sec, stats.peak_memory / 2**20)
@@ -18,6 +18,7 @@ class TokenizeProcessor(UDProcessor):
         else:
             self.trainer = Trainer(model_file=config['model_path'], use_cuda=use_gpu)
         self.build_final_config(config)
+        self.quantize()
 
     def process_pre_tokenized_text(self, doc):
         """Assume text is tokenized by whitespace, sentence split by newline, generate CoNLL-U output"""
@@ -2,8 +2,9 @@ from __future__ import absolute_import
 
 from io import BytesIO
 
-from google.protobuf.internal.encoder import _EncodeVarint
+from google.protobuf.internal.encoder import _EncodeVarint, _VarintBytes
 from google.protobuf.internal.decoder import _DecodeVarint
+from google.protobuf.message import DecodeError
 from .CoreNLP_pb2 import *
 
 def parseFromDelimitedString(obj, buf, offset=0):
@@ -33,6 +34,85 @@ def writeToDelimitedString(obj, stream=None):
     stream.write(obj.SerializeToString())
     return stream
 
+def iter_delimited(stream, cls, buffer_size=1 << 16):
+    """
+    Reads the delimited messages (as written by writeDelimitedTo) of a
+    binary stream, such as a file or a socket file, one at a time.
+
+    The stream is read in chunks into a single buffer, which grows only
+    to fit the largest message, and messages are parsed from slices of
+    it without copies, so that streams of any size are read in constant
+    memory.
+
+    @yields a @cls object for each message of @stream.
+    """
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    readinto = getattr(stream, 'readinto', None)
+    start = end = 0
+    eof = False
+    while True:
+        # decode the size of the next message, if it is all in the buffer
+        size, pos, shift = 0, start, 0
+        while pos < end:
+            b = buf[pos]
+            size |= (b & 0x7f) << shift
+            pos += 1
+            if not b & 0x80:
+                break
+            shift += 7
+        else:
+            pos = None
+
+        if pos is not None and pos + size <= end:
+            obj = cls()
+            obj.ParseFromString(view[pos:pos+size])
+            start = pos + size
+            yield obj
+            continue
+
+        if eof:
+            if start == end:
+                return
+            raise DecodeError("Truncated message at the end of the stream.")
+
+        # move the partial message to the front, and make room for it
+        needed = end - start + 1 if pos is None else pos - start + size
+        if start > 0:
+            buf[:end-start] = view[start:end]
+            end -= start
+            start = 0
+        if needed > len(buf):
+            view.release()
+            buf.extend(bytes(max(needed, 2 * len(buf)) - len(buf)))
+            view = memoryview(buf)
+
+        if readinto is not None:
+            n = readinto(view[end:])
+        else:
+            chunk = stream.read(len(buf) - end)
+            n = len(chunk)
+            buf[end:end+n] = chunk
+        if not n:
+            eof = True
+        end += n or 0
+
+def write_delimited_many(stream, objs):
+    """
+    Writes messages to @stream the way writeToDelimitedString does, one
+    after the other, so that iter_delimited reads them back.
+
+    @returns how many bytes were written.
+    """
+    written = 0
+    for obj in objs:
+        data = obj.SerializeToString()
+        header = _VarintBytes(len(data))
+        stream.write(header)
+        stream.write(data)
+        written += len(header) + len(data)
+    return written
+
 def to_text(sentence):
     """
     Helper routine that converts a Sentence protobuf to a string from
@@ -0,0 +1,121 @@
+"""
+Conversion between the Documents of the neural pipeline and CoreNLP protobuf Documents, without writing
+and parsing CoNLL-U text in between.
+
+Each syntactic word of the pipeline is a CoreNLP token: the UPOS is its coarseTag, the XPOS its pos, the
+features its conllUFeatures, and the words of a multi-word token share its text as originalText and its
+span of word ids as conllUTokenSpan. Dependencies are the basicDependencies of each sentence.
+"""
+
+from stanfordnlp.models.common.conll import CoNLLFile
+from stanfordnlp.pipeline.doc import Document as PipelineDocument
+from stanfordnlp.protobuf import Document
+
+
+def _set_feats(feats, token):
+    for feat in feats.split('|'):
+        key, _, value = feat.partition('=')
+        token.conllUFeatures.key.append(key)
+        token.conllUFeatures.value.append(value)
+
+
+def sentence_to_protobuf(lines, sentence, sentence_index=0, token_offset=0):
+    """
+    Fill a protobuf Sentence with the CoNLL-U lines (lists of fields) of a sentence. token_offset is the
+    number of tokens in the document before this sentence.
+    """
+    sentence.sentenceIndex = sentence_index
+    sentence.tokenOffsetBegin = token_offset
+    graph = sentence.basicDependencies
+    mwt_text, mwt_end = None, -1
+    for ln in lines:
+        idx, word, lemma, upos, xpos, feats, head, deprel, _, misc = ln
+        if '-' in idx:
+            mwt_begin, mwt_end = [int(x) for x in idx.split('-')]
+            mwt_text = word
+            continue
+        index = int(idx)
+        token = sentence.token.add()
+        token.word = word
+        token.value = word
+        if index <= mwt_end:
+            token.originalText = mwt_text
+            token.conllUTokenSpan.begin = mwt_begin
+            token.conllUTokenSpan.end = mwt_end
+            # the words of a multi-word token are not separated in the text
+            token.before = ' ' if index == mwt_begin and len(sentence.token) > 1 else ''
+        else:
+            token.originalText = word
+            token.before = ' ' if len(sentence.token) > 1 else ''
+        if lemma != '_':
+            token.lemma = lemma
+        if upos != '_':
+            token.coarseTag = upos
+        if xpos != '_':
+            token.pos = xpos
+        if feats != '_':
+            _set_feats(feats, token)
+        if misc != '_':
+            token.conllUMisc = misc
+        token.tokenBeginIndex = token_offset + index - 1
+        token.tokenEndIndex = token_offset + index
+
+        if deprel != '_':
+            node = graph.node.add()
+            node.sentenceIndex = sentence_index
+            node.index = index
+            if head == '0':
+                graph.root.append(index)
+            else:
+                edge = graph.edge.add()
+                edge.source = int(head)
+                edge.target = index
+                edge.dep = deprel
+    sentence.tokenOffsetEnd = token_offset + len(sentence.token)
+    return sentence
+
+
+def to_protobuf(doc):
+    """ Convert a Document annotated by the pipeline to a CoreNLP protobuf Document. """
+    doc_pb = Document()
+    doc_pb.text = doc.text or ''
+    token_offset = 0
+    for i, lines in enumerate(doc.conll_file.sents if doc.conll_file is not None else []):
+        sentence_to_protobuf(lines, doc_pb.sentence.add(), i, token_offset)
+        token_offset = doc_pb.sentence[-1].tokenOffsetEnd
+    return doc_pb
+
+
+def sentence_from_protobuf(sentence):
+    """ The CoNLL-U lines (lists of fields) of a protobuf Sentence. """
+    heads = {}
+    graph = sentence.basicDependencies
+    if len(graph.node) > 0:
+        for edge in graph.edge:
+            heads[edge.target] = (str(edge.source), edge.dep)
+        for root in graph.root:
+            heads[root] = ('0', 'root')
+
+    lines = []
+    for i, token in enumerate(sentence.token):
+        index = i + 1
+        if token.HasField('conllUTokenSpan') and token.conllUTokenSpan.begin == index \
+                and token.conllUTokenSpan.end > index:
+            span = token.conllUTokenSpan
+            lines.append(['{}-{}'.format(span.begin, span.end), token.originalText] + ['_'] * 8)
+        if len(token.conllUFeatures.key) > 0:
+            feats = '|'.join('{}={}'.format(k, v) for k, v in zip(token.conllUFeatures.key, token.conllUFeatures.value))
+        else:
+            feats = '_'
+        head, deprel = heads.get(index, ('_', '_'))
+        lines.append([str(index), token.word, token.lemma or '_', token.coarseTag or '_', token.pos or '_', feats,
+                      head, deprel, '_', token.conllUMisc or '_'])
+    return lines
+
+
+def from_protobuf(doc_pb):
+    """ Convert a CoreNLP protobuf Document to a pipeline Document, with its annotations loaded. """
+    doc = PipelineDocument(doc_pb.text)
+    doc.conll_file = CoNLLFile(sents=[sentence_from_protobuf(sentence) for sentence in doc_pb.sentence])
+    doc.load_annotations()
+    return doc
@@ -7,4 +7,5 @@ from stanfordnlp.protobuf import Operator, Polarity
 from stanfordnlp.protobuf import SentenceFragment, TokenLocation
 from stanfordnlp.protobuf import MapStringString, MapIntString
 from .client import CoreNLPClient, AnnotationException, TimeoutException
+from .async_client import AsyncCoreNLPClient
 from .annotator import Annotator
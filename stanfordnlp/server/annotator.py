@@ -2,11 +2,22 @@
 Defines a base class that can be used to annotate.
 """
 import io
+import json
+import time
 from multiprocessing import Process
 from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.socketserver import ThreadingMixIn
 from six.moves import http_client as HTTPStatus
 
 from stanfordnlp.protobuf import Document, parseFromDelimitedString, writeToDelimitedString
+from stanfordnlp.server.batcher import MicroBatcher, Metrics
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """ An HTTPServer that handles each connection in its own thread. """
+    daemon_threads = True
+    # CoreNLP may open many connections at once
+    request_queue_size = 128
 
 class Annotator(Process):
     """
@@ -16,6 +27,14 @@ class Annotator(Process):
 
     This class takes care of defining appropriate endpoints to interface
     with CoreNLP.
+
+    Requests are served concurrently, over keep-alive connections. Annotate
+    calls are handed to num_workers worker threads, so with the default of
+    one worker annotate is never called concurrently. Annotators that can
+    process several documents at once override annotate_batch, and then
+    concurrent requests are grouped into batches of up to max_batch_size
+    documents, waiting at most max_wait seconds for a batch to fill.
+    Request counts, queue depth and latencies are served at /metrics.
     """
     @property
     def name(self):
@@ -49,6 +68,22 @@ class Annotator(Process):
         """
         raise NotImplementedError()
 
+    def annotate_batch(self, anns):
+        """
+        @anns: a list of protobuf annotation objects.
+        Populate each of @anns. Override this to process batches at once.
+        """
+        for ann in anns:
+            self.annotate(ann)
+
+    @property
+    def supports_batching(self):
+        return type(self).annotate_batch is not Annotator.annotate_batch
+
+    def process_batch(self, anns):
+        self.annotate_batch(anns)
+        return anns
+
     @property
     def properties(self):
         """
@@ -63,71 +98,114 @@ class Annotator(Process):
 
     class _Handler(BaseHTTPRequestHandler):
         annotator = None
+        # keep connections alive between requests, and do not let Nagle's algorithm hold back
+        # the body of a response behind its headers
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
 
         def __init__(self, request, client_address, server):
             BaseHTTPRequestHandler.__init__(self, request, client_address, server)
 
+        def send_message(self, status, msg=b"", content_type="text/application", close=False):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", len(msg))
+            if close:
+                self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(msg)
+
         def do_GET(self):
             """
-            Handle a ping request
+            Handle a ping or a metrics request
             """
             if not self.path.endswith("/"): self.path += "/"
             if self.path == "/ping/":
-                msg = "pong".encode("UTF-8")
-
-                self.send_response(HTTPStatus.OK)
-                self.send_header("Content-Type", "text/application")
-                self.send_header("Content-Length", len(msg))
-                self.end_headers()
-                self.wfile.write(msg)
+                self.send_message(HTTPStatus.OK, "pong".encode("UTF-8"))
+            elif self.path == "/metrics/":
+                msg = json.dumps(self.annotator.metrics()).encode("UTF-8")
+                self.send_message(HTTPStatus.OK, msg, "application/json")
             else:
-                self.send_response(HTTPStatus.BAD_REQUEST)
-                self.end_headers()
+                self.send_message(HTTPStatus.BAD_REQUEST)
 
         def do_POST(self):
             """
             Handle an annotate request
             """
+            # read the whole body first, even for a bad request, so that the next request on the
+            # connection starts where it should
+            try:
+                length = int(self.headers.get('content-length', 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                # the body cannot be skipped, so the connection cannot be used again
+                self.send_message(HTTPStatus.BAD_REQUEST, close=True)
+                return
+            msg = self.rfile.read(length)
+
             if not self.path.endswith("/"): self.path += "/"
             if self.path == "/annotate/":
-                # Read message
-                length = int(self.headers.get('content-length'))
-                msg = self.rfile.read(length)
-
-                # Do the annotation
-                doc = Document()
-                parseFromDelimitedString(doc, msg)
-                self.annotator.annotate(doc)
-
-                with io.BytesIO() as stream:
-                    writeToDelimitedString(doc, stream)
-                    msg = stream.getvalue()
+                start = time.time()
+                self.annotator.stats.request_started()
+                try:
+                    # Do the annotation
+                    doc = Document()
+                    parseFromDelimitedString(doc, msg)
+                    doc = self.annotator.batcher.submit(doc)
+
+                    with io.BytesIO() as stream:
+                        writeToDelimitedString(doc, stream)
+                        msg = stream.getvalue()
+                except Exception as e:
+                    self.annotator.stats.request_finished(time.time() - start, error=True)
+                    self.send_message(HTTPStatus.INTERNAL_SERVER_ERROR, str(e).encode("UTF-8"))
+                    return
+                self.annotator.stats.request_finished(time.time() - start)
 
                 # write message
-                self.send_response(HTTPStatus.OK)
-                self.send_header("Content-Type", "application/x-protobuf")
-                self.send_header("Content-Length", len(msg))
-                self.end_headers()
-                self.wfile.write(msg)
-
+                self.send_message(HTTPStatus.OK, msg, "application/x-protobuf")
             else:
-                self.send_response(HTTPStatus.BAD_REQUEST)
-                self.end_headers()
+                self.send_message(HTTPStatus.BAD_REQUEST)
+
+        def log_message(self, format, *args):
+            # one line per request is too much at high concurrency
+            pass
 
-    def __init__(self, host="", port=8432):
+    def __init__(self, host="", port=8432, num_workers=1, max_batch_size=16, max_wait=0.005):
         """
         Launches a server endpoint to communicate with CoreNLP
         """
         Process.__init__(self)
         self.host, self.port = host, port
-        self._Handler.annotator = self
+        self.num_workers = num_workers
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.stats = None
+        self.batcher = None
+
+    def metrics(self):
+        """
+        Request counts, current queue depth and latencies (in seconds) of the server.
+        """
+        return self.stats.snapshot(self.batcher.queue_depth)
+
+    def make_server(self):
+        """
+        Starts the batcher and returns the threading HTTPServer of the annotator, which is not serving yet.
+        """
+        self.stats = Metrics()
+        self.batcher = MicroBatcher(self.process_batch, max_batch_size=self.max_batch_size if self.supports_batching else 1,
+                                    max_wait=self.max_wait, num_workers=self.num_workers, metrics=self.stats).start()
+        # a handler class of our own, so that several annotators can be served from one process
+        handler = type("Handler", (self._Handler,), {"annotator": self})
+        return ThreadingHTTPServer((self.host, self.port), handler)
 
     def run(self):
         """
-        Runs the server using Python's simple HTTPServer.
-        TODO: make this multithreaded.
+        Runs the server using a threading HTTPServer.
         """
-        httpd = HTTPServer((self.host, self.port), self._Handler)
+        httpd = self.make_server()
         sa = httpd.socket.getsockname()
         serve_message = "Serving HTTP on {host} port {port} (http://{host}:{port}/) ..."
         print(serve_message.format(host=sa[0], port=sa[1]))
@@ -135,4 +213,6 @@ class Annotator(Process):
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\nKeyboard interrupt received, exiting.")
-            httpd.shutdown()
+        finally:
+            httpd.server_close()
+            self.batcher.stop()
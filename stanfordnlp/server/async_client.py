@@ -0,0 +1,275 @@
+r"""
+An asyncio client to the Stanford CoreNLP server, which does not block the event loop.
+
+Requires aiohttp (pip install stanfordnlp[async]).
+
+Example:
+    async with AsyncCoreNLPClient(annotators="tokenize ssplit".split()) as client:
+        ann = await client.annotate(text)
+"""
+import asyncio
+import io
+import json
+import os
+import shlex
+import sys
+
+from urllib.parse import urlparse
+
+from stanfordnlp.protobuf import Document, parseFromDelimitedString, writeToDelimitedString
+from stanfordnlp.server.client import CoreNLPClient, AnnotationException, TimeoutException, \
+    PermanentlyFailedException, server_start_cmd, regex_matches_to_indexed_words
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncCoreNLPClient(object):
+    """
+    An asyncio version of CoreNLPClient, with the same arguments and the same results.
+
+    Requests share a pool of at most `threads` connections, the number of requests the server handles at
+    the same time. Until the server answers /ping, the client retries with exponential backoff, from
+    `backoff` up to `max_backoff` seconds, for at most TIMEOUT seconds.
+    """
+    TIMEOUT = 15
+    DEFAULT_ANNOTATORS = CoreNLPClient.DEFAULT_ANNOTATORS
+    DEFAULT_PROPERTIES = CoreNLPClient.DEFAULT_PROPERTIES
+    DEFAULT_OUTPUT_FORMAT = CoreNLPClient.DEFAULT_OUTPUT_FORMAT
+
+    # the properties of a request are built the same way as in the synchronous client
+    _properties = CoreNLPClient._properties
+
+    def __init__(self, start_server=True,
+                 endpoint="http://localhost:9000",
+                 timeout=30000,
+                 threads=5,
+                 annotators=None,
+                 properties=None,
+                 output_format=None,
+                 stdout=sys.stdout,
+                 stderr=sys.stderr,
+                 memory="4G",
+                 be_quiet=True,
+                 max_char_length=100000,
+                 backoff=0.1,
+                 max_backoff=2.0
+                ):
+        if aiohttp is None:
+            raise ImportError("AsyncCoreNLPClient requires aiohttp, install it with: pip install aiohttp")
+        if isinstance(annotators, str):
+            annotators = annotators.split()
+
+        if start_server:
+            host, port = urlparse(endpoint).netloc.split(":")
+            assert host == "localhost", "If starting a server, endpoint must be localhost"
+
+            assert os.getenv("CORENLP_HOME") is not None, "Please define $CORENLP_HOME where your CoreNLP Java checkout is"
+            self.start_cmd = shlex.split(server_start_cmd(port, memory, timeout, threads, max_char_length))
+        else:
+            self.start_cmd = None
+
+        self.endpoint = endpoint
+        self.stdout = stdout
+        self.stderr = stderr
+        self.be_quiet = be_quiet
+        self.server = None
+        self.is_active = False
+        self.session = None
+
+        self.timeout = timeout
+        self.threads = threads
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.default_annotators = annotators or self.DEFAULT_ANNOTATORS
+        self.default_properties = properties or self.DEFAULT_PROPERTIES
+        self.default_output_format = output_format or self.DEFAULT_OUTPUT_FORMAT
+        # the properties the server has already built a pipeline for, see _warm_up
+        self.warmed_up = set()
+        self.warm_up_lock = None
+
+    def _session(self):
+        # the session belongs to the event loop it is created in, so it is created on first use
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.threads)
+            self.session = aiohttp.ClientSession(connector=connector,
+                                                 timeout=aiohttp.ClientTimeout(total=(self.timeout*2)/1000))
+            self.warm_up_lock = asyncio.Lock()
+        return self.session
+
+    async def start(self):
+        if self.start_cmd:
+            stderr = asyncio.subprocess.DEVNULL if self.be_quiet else self.stderr
+            self.server = await asyncio.create_subprocess_exec(*self.start_cmd, stdout=stderr, stderr=stderr)
+            # a new server has no pipelines loaded
+            self.warmed_up = set()
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.kill()
+            await self.server.wait()
+            self.server = None
+        self.is_active = False
+
+    async def close(self):
+        """Close the connections, and stop the server if this client started it."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        await self.stop()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, _, __, ___):
+        await self.close()
+
+    async def is_alive(self):
+        try:
+            async with self._session().get(self.endpoint + "/ping") as r:
+                return r.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def ensure_alive(self):
+        # Check if the service is active and alive
+        if self.is_active and await self.is_alive():
+            return
+        self.is_active = False
+
+        # If not, try to start up the service.
+        if self.server is None:
+            await self.start()
+
+        # Wait for the service to start up, backing off between checks.
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.TIMEOUT
+        delay = self.backoff
+        while not await self.is_alive():
+            if loop.time() + delay > deadline:
+                raise PermanentlyFailedException("Timed out waiting for service to come alive.")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+        # At this point we are guaranteed that the service is alive.
+        self.is_active = True
+
+    async def _post(self, path, params, buf, input_format):
+        """Send a request to the CoreNLP server, and return its status and the body of its response."""
+        if input_format == "text":
+            ctype = "text/plain; charset=utf-8"
+        elif input_format == "serialized":
+            ctype = "application/x-protobuf"
+        else:
+            raise ValueError("Unrecognized inputFormat " + input_format)
+
+        await self.ensure_alive()
+        try:
+            async with self._session().post(self.endpoint + path, params=params, data=buf,
+                                            headers={'content-type': ctype}) as r:
+                return r.status, await r.read()
+        except asyncio.TimeoutError:
+            raise TimeoutException("CoreNLP request timed out.")
+        except aiohttp.ClientError as e:
+            # the server went away, check it again on the next request
+            self.is_active = False
+            raise AnnotationException(str(e))
+
+    async def _request(self, buf, properties):
+        """Send an annotation request to the CoreNLP server.
+
+        :param (bytes) buf: raw text or serialized document for the CoreNLPServer to annotate
+        :param (dict) properties: properties that the server expects
+        :return: the body of the response
+        """
+        status, content = await self._post('', {'properties': str(properties)}, buf,
+                                           properties.get("inputFormat", "text"))
+        if status != 200:
+            text = content.decode('utf-8', errors='replace')
+            if text == "CoreNLP request timed out. Your document may be too long.":
+                raise TimeoutException(text)
+            else:
+                raise AnnotationException(text)
+        return content
+
+    async def annotate(self, text, annotators=None, output_format=None, properties=None):
+        """Send a request to the CoreNLP server.
+
+        :param (str | unicode) text: raw text for the CoreNLPServer to parse
+        :param (list | string) annotators: list of annotators to use
+        :param (str) output_format: output type from server: serialized, json, text, conll, conllu, or xml
+        :param (dict) properties: properties that the server expects
+        :return: request result
+        """
+        properties = self._properties(properties, annotators, 'text', output_format)
+        content = await self._request(text.encode('utf-8'), properties)
+        # customize what is returned based outputFormat
+        if properties.get("outputFormat") == "serialized":
+            doc = Document()
+            parseFromDelimitedString(doc, content)
+            return doc
+        elif properties.get("outputFormat") == "json":
+            return json.loads(content.decode('utf-8'))
+        else:
+            return content.decode('utf-8')
+
+    async def update(self, doc, annotators=None, properties=None):
+        if properties is None:
+            properties = self._properties(None, annotators, 'serialized', 'serialized')
+        with io.BytesIO() as stream:
+            writeToDelimitedString(doc, stream)
+            msg = stream.getvalue()
+
+        content = await self._request(msg, properties)
+        doc = Document()
+        parseFromDelimitedString(doc, content)
+        return doc
+
+    async def tokensregex(self, text, pattern, filter=False, to_words=False, annotators=None, properties=None):
+        matches = await self._regex('/tokensregex', text, pattern, filter, annotators, properties)
+        if to_words:
+            matches = regex_matches_to_indexed_words(matches)
+        return matches
+
+    async def semgrex(self, text, pattern, filter=False, to_words=False, annotators=None, properties=None):
+        matches = await self._regex('/semgrex', text, pattern, filter, annotators, properties)
+        if to_words:
+            matches = regex_matches_to_indexed_words(matches)
+        return matches
+
+    async def tregrex(self, text, pattern, filter=False, annotators=None, properties=None):
+        return await self._regex('/tregex', text, pattern, filter, annotators, properties)
+
+    async def _regex(self, path, text, pattern, filter, annotators=None, properties=None):
+        """Send a regex-related request to the CoreNLP server, see CoreNLPClient.tokensregex."""
+        properties = self._properties(properties, annotators, 'text', None)
+        await self._warm_up(properties)
+
+        params = {'pattern': pattern, 'filter': str(filter), 'properties': str(properties)}
+        status, content = await self._post(path, params, text.encode('utf-8'), properties.get("inputFormat", "text"))
+        text = content.decode('utf-8', errors='replace')
+        if status != 200:
+            if text.startswith("Timeout"):
+                raise TimeoutException(text)
+            else:
+                raise AnnotationException(text)
+        try:
+            return json.loads(text)
+        except ValueError:
+            raise AnnotationException(text)
+
+    async def _warm_up(self, properties):
+        """Have the server build its pipeline for these properties, once per set of properties."""
+        key = tuple(sorted((k, str(v)) for k, v in properties.items()))
+        self._session()
+        async with self.warm_up_lock:
+            if key in self.warmed_up:
+                return
+            await self.annotate("Warm up.", properties=dict(properties, inputFormat='text'))
+            self.warmed_up.add(key)
+
+
+__all__ = ["AsyncCoreNLPClient"]
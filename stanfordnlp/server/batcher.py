@@ -0,0 +1,163 @@
+"""
+Micro-batching of concurrent requests, and request metrics, for the annotation servers.
+"""
+import queue
+import threading
+import time
+from collections import deque
+
+
+class Metrics:
+    """
+    Request counters and latency statistics of a server. Latencies are kept for the last `window` requests,
+    from which the mean and percentiles are computed.
+    """
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=window)
+        self.queue_waits = deque(maxlen=window)
+        self.batch_times = deque(maxlen=window)
+
+    def request_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def request_finished(self, latency, error=False):
+        with self.lock:
+            self.in_flight -= 1
+            self.requests += 1
+            if error:
+                self.errors += 1
+            self.latencies.append(latency)
+
+    def batch_finished(self, size, queue_waits, batch_time):
+        with self.lock:
+            self.batches += 1
+            self.batched_items += size
+            self.queue_waits.extend(queue_waits)
+            self.batch_times.append(batch_time)
+
+    @staticmethod
+    def summarize(values):
+        values = sorted(values)
+        if len(values) == 0:
+            return {'mean': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+        percentile = lambda p: values[min(len(values) - 1, int(p / 100.0 * len(values)))]
+        return {'mean': sum(values) / len(values), 'p50': percentile(50), 'p90': percentile(90),
+                'p99': percentile(99), 'max': values[-1]}
+
+    def snapshot(self, queue_depth=0):
+        """ The current metrics, as a JSON-serializable dict. Times are in seconds. """
+        with self.lock:
+            return {'uptime': time.time() - self.started, 'requests': self.requests, 'errors': self.errors,
+                    'in_flight': self.in_flight, 'queue_depth': queue_depth, 'batches': self.batches,
+                    'mean_batch_size': self.batched_items / self.batches if self.batches > 0 else 0.0,
+                    'latency': self.summarize(self.latencies), 'queue_wait': self.summarize(self.queue_waits),
+                    'batch_time': self.summarize(self.batch_times)}
+
+
+class _Request:
+    __slots__ = ['item', 'result', 'error', 'enqueued', 'done']
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.enqueued = time.time()
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Groups items submitted concurrently from many threads into batches for process_batch, which takes a list
+    of items and returns the list of their results.
+
+    A worker takes the oldest waiting item, then keeps collecting items until the batch holds max_batch_size
+    of them or max_wait seconds have passed since that item was submitted, so that no item waits for a batch
+    to fill for longer than max_wait. num_workers batches are processed at the same time; with a single
+    worker, process_batch is never called concurrently.
+    """
+
+    def __init__(self, process_batch, max_batch_size=16, max_wait=0.005, num_workers=1, metrics=None):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.num_workers = num_workers
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.queue = queue.Queue()
+        self.workers = []
+
+    def start(self):
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self.work, name='batcher-{}'.format(i))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+        return self
+
+    def stop(self):
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+    @property
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    def submit(self, item):
+        """ Process an item as part of a batch, blocking until it is done, and return its result. """
+        request = _Request(item)
+        self.queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def next_batch(self):
+        """ Collect the next batch, or return None when the batcher is stopped. """
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first.enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.time()
+            try:
+                # past the deadline, only take the items that are already waiting
+                request = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # leave the stop signal for this worker's next call
+                self.queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def work(self):
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                return
+            start = time.time()
+            try:
+                results = self.process_batch([request.item for request in batch])
+                assert len(results) == len(batch), "process_batch returned {} results for {} items".format(len(results), len(batch))
+                for request, result in zip(batch, results):
+                    request.result = result
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            end = time.time()
+            self.metrics.batch_finished(len(batch), [start - request.enqueued for request in batch], end - start)
+            for request in batch:
+                request.done.set()
@@ -7,9 +7,12 @@ import logging
 import json
 import shlex
 import subprocess
+import threading
 import time
 import sys
 
+from concurrent.futures import ThreadPoolExecutor
+
 from six.moves.urllib.parse import urlparse
 
 import requests
@@ -50,7 +53,7 @@ class RobustService(object):
     TIMEOUT = 15
 
     def __init__(self, start_cmd, stop_cmd, endpoint, stdout=sys.stdout,
-                 stderr=sys.stderr, be_quiet=False):
+                 stderr=sys.stderr, be_quiet=False, pool_size=10):
         self.start_cmd = start_cmd and shlex.split(start_cmd)
         self.stop_cmd = stop_cmd and shlex.split(stop_cmd)
         self.endpoint = endpoint
@@ -61,9 +64,15 @@ class RobustService(object):
         self.is_active = False
         self.be_quiet = be_quiet
 
+        # reuse connections across requests, keeping up to pool_size of them open
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
     def is_alive(self):
         try:
-            return requests.get(self.endpoint + "/ping").ok
+            return self.session.get(self.endpoint + "/ping").ok
         except requests.exceptions.ConnectionError as e:
             raise ShouldRetryException(e)
 
@@ -121,6 +130,16 @@ class RobustService(object):
         # At this point we are guaranteed that the service is alive.
         self.is_active = True
 
+def server_start_cmd(port, memory, timeout, threads, max_char_length):
+    """The command that starts a CoreNLP server from the checkout in $CORENLP_HOME."""
+    return "java -Xmx{memory} -cp '{corenlp_home}/*'  edu.stanford.nlp.pipeline.StanfordCoreNLPServer -port {port} -timeout {timeout} -threads {threads} -maxCharLength {max_char_length}".format(
+        corenlp_home=os.getenv("CORENLP_HOME"),
+        port=port,
+        memory=memory,
+        timeout=timeout,
+        threads=threads,
+        max_char_length=max_char_length)
+
 class CoreNLPClient(RobustService):
     """
     A CoreNLP client to the Stanford CoreNLP server.
@@ -150,23 +169,45 @@ class CoreNLPClient(RobustService):
             assert host == "localhost", "If starting a server, endpoint must be localhost"
 
             assert os.getenv("CORENLP_HOME") is not None, "Please define $CORENLP_HOME where your CoreNLP Java checkout is"
-            start_cmd = "java -Xmx{memory} -cp '{corenlp_home}/*'  edu.stanford.nlp.pipeline.StanfordCoreNLPServer -port {port} -timeout {timeout} -threads {threads} -maxCharLength {max_char_length}".format(
-                corenlp_home=os.getenv("CORENLP_HOME"),
-                port=port,
-                memory=memory,
-                timeout=timeout,
-                threads=threads,
-                max_char_length=max_char_length)
+            start_cmd = server_start_cmd(port, memory, timeout, threads, max_char_length)
             stop_cmd = None
         else:
             start_cmd = stop_cmd = None
 
         super(CoreNLPClient, self).__init__(start_cmd, stop_cmd, endpoint,
-                                            stdout, stderr, be_quiet)
+                                            stdout, stderr, be_quiet, pool_size=threads)
         self.timeout = timeout
+        self.threads = threads
         self.default_annotators = annotators or self.DEFAULT_ANNOTATORS
         self.default_properties = properties or self.DEFAULT_PROPERTIES
         self.default_output_format = output_format or self.DEFAULT_OUTPUT_FORMAT
+        # the properties the server has already built a pipeline for, see _warm_up
+        self.warmed_up = set()
+        self.warm_up_lock = threading.Lock()
+
+    def start(self):
+        # a new server has no pipelines loaded
+        self.warmed_up = set()
+        super(CoreNLPClient, self).start()
+
+    def _properties(self, properties, annotators, input_format, output_format):
+        """The properties of a request, without modifying self.default_properties or the given properties."""
+        if properties is None:
+            properties = dict(self.default_properties)
+            properties.update({
+                'annotators': ','.join(annotators or self.default_annotators),
+                'inputFormat': input_format,
+                'outputFormat': output_format or self.default_output_format,
+                'serializer': 'edu.stanford.nlp.pipeline.ProtobufAnnotationSerializer'
+            })
+        else:
+            properties = dict(properties)
+            if "annotators" not in properties:
+                properties['annotators'] = ','.join(annotators or self.default_annotators)
+            # if an output_format is specified, use that to override
+            if output_format is not None:
+                properties["outputFormat"] = output_format
+        return properties
 
     def _request(self, buf, properties):
         """Send a request to the CoreNLP server.
@@ -186,10 +227,10 @@ class CoreNLPClient(RobustService):
             else:
                 raise ValueError("Unrecognized inputFormat " + input_format)
 
-            r = requests.post(self.endpoint,
-                              params={'properties': str(properties)},
-                              data=buf, headers={'content-type': ctype},
-                              timeout=(self.timeout*2)/1000)
+            r = self.session.post(self.endpoint,
+                                  params={'properties': str(properties)},
+                                  data=buf, headers={'content-type': ctype},
+                                  timeout=(self.timeout*2)/1000)
             r.raise_for_status()
             return r
         except requests.HTTPError as e:
@@ -208,42 +249,39 @@ class CoreNLPClient(RobustService):
         :return: request result
         """
         # set properties for server call
-        if properties is None:
-            properties = self.default_properties
-            properties.update({
-                'annotators': ','.join(annotators or self.default_annotators),
-                'inputFormat': 'text',
-                'outputFormat': self.default_output_format,
-                'serializer': 'edu.stanford.nlp.pipeline.ProtobufAnnotationSerializer'
-            })
-        elif "annotators" not in properties:
-            properties.update({'annotators': ','.join(annotators or self.default_annotators)})
-        # if an output_format is specified, use that to override
-        if output_format is not None:
-            properties["outputFormat"] = output_format
+        properties = self._properties(properties, annotators, 'text', output_format)
         # make the request
         r = self._request(text.encode('utf-8'), properties)
         # customize what is returned based outputFormat
-        if properties["outputFormat"] == "serialized":
+        if properties.get("outputFormat") == "serialized":
             doc = Document()
             parseFromDelimitedString(doc, r.content)
             return doc
-        elif properties["outputFormat"] == "json":
+        elif properties.get("outputFormat") == "json":
             return r.json()
-        elif properties["outputFormat"] in ["text", "conllu", "conll", "xml"]:
+        elif properties.get("outputFormat") in ["text", "conllu", "conll", "xml"]:
             return r.text
         else:
             return r
 
+    def annotate_many(self, texts, annotators=None, output_format=None, properties=None, max_concurrency=None):
+        """Annotate several texts with concurrent requests, so that the server's threads work in parallel.
+
+        :param (list) texts: raw texts for the CoreNLPServer to parse
+        :param (int) max_concurrency: requests in flight at the same time, by default the number of server threads
+        :return: the results of annotate, in the order of the texts
+        """
+        self.ensure_alive()
+        properties = self._properties(properties, annotators, 'text', output_format)
+        max_concurrency = max_concurrency or self.threads
+        if max_concurrency <= 1:
+            return [self.annotate(text, properties=properties) for text in texts]
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(executor.map(lambda text: self.annotate(text, properties=properties), texts))
+
     def update(self, doc, annotators=None, properties=None):
         if properties is None:
-            properties = self.default_properties
-            properties.update({
-                'annotators': ','.join(annotators or self.default_annotators),
-                'inputFormat': 'serialized',
-                'outputFormat': 'serialized',
-                'serializer': 'edu.stanford.nlp.pipeline.ProtobufAnnotationSerializer'
-            })
+            properties = self._properties(None, annotators, 'serialized', 'serialized')
         with io.BytesIO() as stream:
             writeToDelimitedString(doc, stream)
             msg = stream.getvalue()
@@ -279,21 +317,11 @@ class CoreNLPClient(RobustService):
         :return: request result
         """
         self.ensure_alive()
-        if properties is None:
-            properties = self.default_properties
-            properties.update({
-                'annotators': ','.join(annotators or self.default_annotators),
-                'inputFormat': 'text',
-                'outputFormat': self.default_output_format,
-                'serializer': 'edu.stanford.nlp.pipeline.ProtobufAnnotationSerializer'
-            })
-        elif "annotators" not in properties:
-            properties.update({'annotators': ','.join(annotators or self.default_annotators)})
+        properties = self._properties(properties, annotators, 'text', None)
 
-        # HACK: For some stupid reason, CoreNLPServer will timeout if we
-        # need to annotate something from scratch. So, we need to call
-        # this to ensure that the _regex call doesn't timeout.
-        self.annotate(text, properties=properties)
+        # CoreNLPServer times out on a regex request if it has to build the pipeline
+        # for these properties first, so make sure that it has been built.
+        self._warm_up(properties)
 
         try:
             # Error occurs unless put properties in params
@@ -305,7 +333,7 @@ class CoreNLPClient(RobustService):
             else:
                 raise ValueError("Unrecognized inputFormat " + input_format)
             # change request method from `get` to `post` as required by CoreNLP
-            r = requests.post(
+            r = self.session.post(
                 self.endpoint + path, params={
                     'pattern': pattern,
                     'filter': filter,
@@ -324,6 +352,15 @@ class CoreNLPClient(RobustService):
         except json.JSONDecodeError:
             raise AnnotationException(r.text)
 
+    def _warm_up(self, properties):
+        """Have the server build its pipeline for these properties, once per set of properties."""
+        key = tuple(sorted((k, str(v)) for k, v in properties.items()))
+        with self.warm_up_lock:
+            if key in self.warmed_up:
+                return
+            self.annotate("Warm up.", properties=dict(properties, inputFormat='text'))
+            self.warmed_up.add(key)
+
 def regex_matches_to_indexed_words(matches):
     """Transforms tokensregex and semgrex matches to indexed words.
     :param matches: unprocessed regex matches
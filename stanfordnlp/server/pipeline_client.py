@@ -0,0 +1,72 @@
+"""
+A client for the pipeline server of stanfordnlp/server/pipeline_server.py.
+"""
+
+import json
+import requests
+
+
+class PipelineClient(object):
+    """
+    Sends documents to a running pipeline server. Connections are kept alive between requests, and a client
+    can be shared between threads.
+    """
+
+    def __init__(self, endpoint='http://localhost:5000', timeout=60, pool_size=10):
+        self.endpoint = endpoint.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _post(self, data, headers):
+        r = self.session.post(self.endpoint + '/annotate', data=data, headers=headers, timeout=self.timeout)
+        if r.status_code != 200:
+            try:
+                error = r.json()['error']
+            except ValueError:
+                error = r.text
+            raise requests.HTTPError("{} {}: {}".format(r.status_code, r.reason, error), response=r)
+        return r
+
+    def annotate(self, text, processors=None):
+        """ Annotate raw text, and return its sentences as lists of {field: value} dicts. """
+        request = {'text': text}
+        if processors is not None:
+            request['processors'] = processors
+        return self._post(json_body(request), {'Content-Type': 'application/json'}).json()['sentences']
+
+    def annotate_conllu(self, conllu, processors=None):
+        """ Annotate a tokenized document given as CoNLL-U, and return the annotated CoNLL-U. """
+        if processors is None:
+            r = self._post(conllu.encode('utf-8'), {'Content-Type': 'text/x-conllu; charset=utf-8'})
+        else:
+            request = {'conllu': conllu, 'processors': processors, 'output': 'conllu'}
+            r = self._post(json_body(request), {'Content-Type': 'application/json'})
+        r.encoding = 'utf-8'
+        return r.text
+
+    def metrics(self):
+        r = self.session.get(self.endpoint + '/metrics', timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def ping(self):
+        try:
+            return self.session.get(self.endpoint + '/ping', timeout=self.timeout).ok
+        except requests.exceptions.ConnectionError:
+            return False
+
+
+def json_body(obj):
+    return json.dumps(obj).encode('utf-8')
@@ -0,0 +1,301 @@
+"""
+An HTTP server for the neural Pipeline, which loads the pipeline once and annotates raw text or CoNLL-U.
+
+Endpoints:
+    POST /annotate   A JSON request {"text": ...} or {"conllu": ...}, optionally with "processors" (a subset of
+                     the pipeline's, as a comma-separated string) and "output" ("json", the default, or
+                     "conllu"). A request with Content-Type text/x-conllu is annotated CoNLL-U in, CoNLL-U out.
+    GET  /metrics    Request counts, queue depth, batch sizes and latencies, and the per-stage profile of the
+                     pipeline, as JSON.
+    GET  /ping       Health check.
+
+Concurrent requests are coalesced into batches of up to max_batch_size requests, waiting at most max_wait
+seconds for a batch to fill. Raw text is tokenized request by request, and the CoNLL-U of all the requests
+of a batch then goes through the other processors at once, so that their networks run on shared batches.
+num_workers batches are processed at the same time; each processor runs one batch at a time, so that
+several workers overlap different stages of different batches.
+
+Example:
+    python -m stanfordnlp.server.pipeline_server --lang en --port 5000 --workers 2
+"""
+
+import argparse
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+
+from stanfordnlp.models.common.conll import CoNLLFile, FIELD_TO_IDX
+from stanfordnlp.pipeline.core import Pipeline
+from stanfordnlp.pipeline.doc import Document
+from stanfordnlp.pipeline.profile import StageTimer
+from stanfordnlp.server.annotator import ThreadingHTTPServer
+from stanfordnlp.server.batcher import MicroBatcher, Metrics
+from stanfordnlp.utils.resources import DEFAULT_MODEL_DIR
+
+CONLLU_CONTENT_TYPES = ['text/x-conllu', 'text/conllu']
+
+
+class BadRequest(Exception):
+    pass
+
+
+class AnnotateRequest:
+    """ One document to annotate, as raw text or as CoNLL-U, with the processors to run on it. """
+    __slots__ = ['text', 'conllu', 'processors']
+
+    def __init__(self, text=None, conllu=None, processors=None):
+        self.text = text
+        self.conllu = conllu
+        self.processors = processors
+
+
+def sentences_to_conllu(sentences):
+    return ''.join(''.join('\t'.join(ln) + '\n' for ln in sent) + '\n' for sent in sentences)
+
+
+def sentences_to_json(sentences):
+    """ Sentences of CoNLL-U lines as lists of {field: value} dicts, leaving out empty ('_') fields. """
+    res = []
+    for sent in sentences:
+        words = []
+        for ln in sent:
+            word = {field: ln[idx] for field, idx in FIELD_TO_IDX.items() if ln[idx] != '_'}
+            if 'head' in word and word['head'].isdigit():
+                word['head'] = int(word['head'])
+            words.append(word)
+        res.append(words)
+    return res
+
+
+class PipelineServer:
+    """ Serves a Pipeline over HTTP, with micro-batching of concurrent requests. """
+
+    def __init__(self, pipeline, host='localhost', port=5000, num_workers=1, max_batch_size=32, max_wait=0.01):
+        self.pipeline = pipeline
+        self.stats = Metrics()
+        self.batcher = MicroBatcher(self.process_batch, max_batch_size=max_batch_size, max_wait=max_wait,
+                                    num_workers=num_workers, metrics=self.stats)
+        handler = type('Handler', (PipelineRequestHandler,), {'app': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def serve_forever(self):
+        self.batcher.start()
+        host, port = self.address[:2]
+        print("Serving the pipeline on http://{}:{}/ ...".format(host, port))
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nKeyboard interrupt received, exiting.")
+        finally:
+            self.httpd.server_close()
+            self.batcher.stop()
+
+    def start(self):
+        """ Serve from a background thread. """
+        self.thread = threading.Thread(target=self.serve_forever, name='pipeline-server')
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def annotate(self, text=None, conllu=None, processors=None):
+        """ Annotate a document as part of a batch, and return its sentences as lists of CoNLL-U fields. """
+        if (text is None) == (conllu is None):
+            raise BadRequest("Exactly one of text and conllu is required.")
+        if not isinstance(text if conllu is None else conllu, str):
+            raise BadRequest("The document must be a string.")
+        if processors is None:
+            processors = self.pipeline.processor_names
+        elif isinstance(processors, str):
+            processors = processors.split(',')
+        unknown = [processor_name for processor_name in processors if processor_name not in self.pipeline.processor_names]
+        if len(unknown) > 0:
+            raise BadRequest("Processors not in the pipeline: {}".format(','.join(unknown)))
+        if conllu is not None:
+            # the input is already tokenized
+            processors = [processor_name for processor_name in processors if processor_name != 'tokenize']
+        elif 'tokenize' not in processors:
+            raise BadRequest("Raw text requires the tokenize processor.")
+        return self.batcher.submit(AnnotateRequest(text, conllu, tuple(processors)))
+
+    def run_stage(self, processor_name, doc, timer):
+        processor = self.pipeline.load(processor_name)
+        if processor is None:
+            return
+        timer.time(processor_name, processor.process, doc)
+
+    def process_batch(self, requests):
+        results = [None] * len(requests)
+        groups = {}
+        for i, request in enumerate(requests):
+            groups.setdefault(request.processors, []).append(i)
+        for processors, indices in groups.items():
+            for i, sentences in zip(indices, self.process_group([requests[i] for i in indices], processors)):
+                results[i] = sentences
+        return results
+
+    def process_group(self, requests, processors):
+        """ Annotate requests that run the same processors, and return the sentences of each of them. """
+        timer = StageTimer(self.pipeline.use_gpu, self.pipeline.profile_memory)
+        sentences = []
+        for request in requests:
+            if request.conllu is not None:
+                text = request.conllu
+            elif len(request.text.strip()) > 0:
+                doc = Document(request.text)
+                self.run_stage('tokenize', doc, timer)
+                text = doc.conll_file.conll_as_string() if doc.conll_file is not None else ''
+            else:
+                text = ''
+            sentences.append(CoNLLFile(input_str=text).sents if len(text.strip()) > 0 else [])
+
+        # the remaining processors run once on the sentences of all the requests
+        counts = [len(sents) for sents in sentences]
+        if sum(counts) > 0:
+            doc = Document('')
+            doc.conll_file = CoNLLFile(input_str=sentences_to_conllu([sent for sents in sentences for sent in sents]))
+            for processor_name in self.pipeline.processor_names:
+                if processor_name in processors and processor_name != 'tokenize':
+                    self.run_stage(processor_name, doc, timer)
+            annotated = doc.conll_file.sents
+            offset = 0
+            for i, count in enumerate(counts):
+                sentences[i] = annotated[offset:offset + count]
+                offset += count
+        self.pipeline.profile.merge(timer.finish(sum(sum(len(sent) for sent in sents) for sents in sentences), sum(counts)))
+        return sentences
+
+    def metrics(self):
+        res = self.stats.snapshot(self.batcher.queue_depth)
+        res['pipeline'] = self.pipeline.profile.to_dict()
+        return res
+
+
+class PipelineRequestHandler(BaseHTTPRequestHandler):
+    app = None
+    # keep connections alive between requests, and do not let Nagle's algorithm hold back
+    # the body of a response behind its headers
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def send_message(self, status, msg=b'', content_type='text/plain; charset=utf-8', close=False):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', len(msg))
+        if close:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(msg)
+
+    def send_json(self, status, obj, close=False):
+        self.send_message(status, json.dumps(obj).encode('utf-8'), 'application/json', close=close)
+
+    def do_GET(self):
+        path = self.path.rstrip('/')
+        if path == '/ping':
+            self.send_message(HTTPStatus.OK, b'pong')
+        elif path == '/metrics':
+            self.send_json(HTTPStatus.OK, self.app.metrics())
+        else:
+            self.send_json(HTTPStatus.NOT_FOUND, {'error': 'Unknown path {}'.format(self.path)})
+
+    def do_POST(self):
+        # read the whole body first, even for a bad request, so that the next request on the
+        # connection starts where it should
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            # the body cannot be skipped, so the connection cannot be used again
+            self.send_json(HTTPStatus.BAD_REQUEST, {'error': 'Invalid Content-Length'}, close=True)
+            return
+        body = self.rfile.read(length)
+        if self.path.rstrip('/') != '/annotate':
+            self.send_json(HTTPStatus.NOT_FOUND, {'error': 'Unknown path {}'.format(self.path)})
+            return
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+
+        start = time.time()
+        self.app.stats.request_started()
+        status = HTTPStatus.OK
+        try:
+            try:
+                body = body.decode('utf-8')
+            except UnicodeDecodeError as e:
+                raise BadRequest("Invalid UTF-8: {}".format(e))
+            if content_type in CONLLU_CONTENT_TYPES:
+                output = 'conllu'
+                sentences = self.app.annotate(conllu=body)
+            else:
+                try:
+                    request = json.loads(body)
+                except ValueError as e:
+                    raise BadRequest("Invalid JSON: {}".format(e))
+                if not isinstance(request, dict):
+                    raise BadRequest("The request must be a JSON object.")
+                output = request.get('output', 'json')
+                if output not in ['json', 'conllu']:
+                    raise BadRequest("Unknown output format {}".format(output))
+                sentences = self.app.annotate(text=request.get('text'), conllu=request.get('conllu'),
+                                              processors=request.get('processors'))
+        except BadRequest as e:
+            status, error = HTTPStatus.BAD_REQUEST, str(e)
+        except Exception as e:
+            status, error = HTTPStatus.INTERNAL_SERVER_ERROR, "{}: {}".format(type(e).__name__, e)
+        self.app.stats.request_finished(time.time() - start, error=status != HTTPStatus.OK)
+
+        if status != HTTPStatus.OK:
+            self.send_json(status, {'error': error})
+        elif output == 'conllu':
+            self.send_message(status, sentences_to_conllu(sentences).encode('utf-8'), 'text/x-conllu; charset=utf-8')
+        else:
+            self.send_json(status, {'sentences': sentences_to_json(sentences)})
+
+    def log_message(self, format, *args):
+        # one line per request is too much at high concurrency
+        pass
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lang', type=str, default='en')
+    parser.add_argument('--treebank', type=str, default=None)
+    parser.add_argument('--models_dir', type=str, default=DEFAULT_MODEL_DIR)
+    parser.add_argument('--processors', type=str, default=None, help='Comma-separated processors, by default all of them.')
+    parser.add_argument('--host', type=str, default='localhost')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=1, help='Batches processed at the same time.')
+    parser.add_argument('--max_batch_size', type=int, default=32, help='Maximum number of requests in a batch.')
+    parser.add_argument('--max_wait', type=float, default=0.01, help='Maximum time (in seconds) a request waits for its batch to fill.')
+    parser.add_argument('--cpu', action='store_true', help='Ignore CUDA.')
+    parser.add_argument('--quantize', action='store_true', help='Quantize the models for CPU inference.')
+    parser.add_argument('--profile_memory', action='store_true', help='Measure the peak memory of each stage in /metrics.')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    kwargs = {} if args.processors is None else {'processors': args.processors}
+    pipeline = Pipeline(lang=args.lang, treebank=args.treebank, models_dir=args.models_dir, use_gpu=not args.cpu,
+                        quantize=args.quantize, profile_memory=args.profile_memory, **kwargs)
+    server = PipelineServer(pipeline, host=args.host, port=args.port, num_workers=args.workers,
+                            max_batch_size=args.max_batch_size, max_wait=args.max_wait)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
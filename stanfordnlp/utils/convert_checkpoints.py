@@ -0,0 +1,78 @@
+"""
+Convert model and pretrain files saved with torch.save() to the fast checkpoint format.
+
+The converted files are loaded transparently by the trainers and by Pretrain, so by default the files are
+converted in place, which leaves the paths used by the pipeline unchanged. Files that are already
+converted, and exported TorchScript models, are skipped.
+
+Example:
+    python -m stanfordnlp.utils.convert_checkpoints ~/stanfordnlp_resources/en_ewt_models
+"""
+
+import argparse
+import os
+import time
+import torch
+
+from stanfordnlp.models.common.checkpoint import is_fast_checkpoint, load_checkpoint, save_checkpoint
+from stanfordnlp.models.common.export import is_torchscript
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='+', help='Model files, or directories to search for .pt files.')
+    parser.add_argument('--output_dir', type=str, default=None, help='Write the converted files here instead of in place.')
+    parser.add_argument('--check', action='store_true', help='Reload each converted file and compare its load time.')
+    return parser.parse_args()
+
+
+def find_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith('.pt'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def convert(filename, output_file, check=False):
+    if is_torchscript(filename) or is_fast_checkpoint(filename):
+        print("Skipping {}".format(filename))
+        return
+    start = time.time()
+    checkpoint = torch.load(filename, lambda storage, loc: storage)
+    torch_time = time.time() - start
+    # write next to the target first, so that a failed conversion does not leave a broken file behind
+    tmp_file = output_file + '.tmp'
+    try:
+        save_checkpoint(checkpoint, tmp_file)
+        os.replace(tmp_file, output_file)
+    except BaseException as e:
+        print("Cannot convert {} due to the following exception:".format(filename))
+        print("\t{}".format(e))
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return
+    if check:
+        start = time.time()
+        load_checkpoint(output_file)
+        print("Converted {} to {} (load time {:.3f}s -> {:.3f}s)".format(filename, output_file, torch_time, time.time() - start))
+    else:
+        print("Converted {} to {}".format(filename, output_file))
+
+
+def main():
+    args = parse_args()
+    for filename in find_files(args.paths):
+        if args.output_dir is not None:
+            os.makedirs(args.output_dir, exist_ok=True)
+            output_file = os.path.join(args.output_dir, os.path.basename(filename))
+        else:
+            output_file = filename
+        convert(filename, output_file, check=args.check)
+
+
+if __name__ == '__main__':
+    main()
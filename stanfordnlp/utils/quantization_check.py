@@ -0,0 +1,73 @@
+"""
+Compare a dynamically quantized pipeline against the float one on a gold CoNLL-U file.
+
+The pos, lemma and depparse processors are run on the gold tokenization with and without quantization,
+and the UPOS/UAS/LAS/lemma scores, the processing time and the model sizes are reported side by side.
+
+Example:
+    python -m stanfordnlp.utils.quantization_check --treebank en_ewt --dev_file en_ewt.dev.gold.conllu
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from stanfordnlp.models.common import conll
+from stanfordnlp.models.common.quantization import model_size
+from stanfordnlp.models.common.utils import ud_scores
+from stanfordnlp.pipeline.core import Pipeline
+from stanfordnlp.pipeline.doc import Document
+from stanfordnlp.utils.resources import DEFAULT_MODEL_DIR
+
+PROCESSORS = 'pos,lemma,depparse'
+METRICS = ['UPOS', 'UAS', 'LAS', 'Lemmas']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--treebank', type=str, required=True, help='Treebank shorthand, e.g. en_ewt')
+    parser.add_argument('--dev_file', type=str, required=True, help='Gold CoNLL-U file to evaluate on.')
+    parser.add_argument('--models_dir', type=str, default=DEFAULT_MODEL_DIR, help='Directory of downloaded models.')
+    parser.add_argument('--output_dir', type=str, default=None, help='Where to keep the predicted CoNLL-U files.')
+    return parser.parse_args()
+
+
+def run(args, quantize, output_file):
+    """ Annotate the gold tokenization, returning the scores, the processing time and the model size. """
+    nlp = Pipeline(processors=PROCESSORS, lang=args.treebank.split('_')[0], treebank=args.treebank,
+                   models_dir=args.models_dir, use_gpu=False, quantize=quantize)
+    size = sum(model_size(p.trainer.model) for p in nlp.processors.values()
+               if p is not None and getattr(p, 'trainer', None) is not None and p.trainer.model is not None)
+
+    doc = Document('')
+    doc.conll_file = conll.CoNLLFile(args.dev_file)
+    start = time.time()
+    nlp.process(doc)
+    elapsed = time.time() - start
+
+    doc.write_conll_to_file(output_file)
+    evaluation = ud_scores(args.dev_file, output_file)
+    scores = {m: evaluation[m].f1 * 100 for m in METRICS}
+    return scores, elapsed, size
+
+
+def main():
+    args = parse_args()
+    output_dir = args.output_dir if args.output_dir is not None else tempfile.mkdtemp()
+    results = {}
+    for quantize in [False, True]:
+        output_file = os.path.join(output_dir, '{}.{}.pred.conllu'.format(args.treebank, 'int8' if quantize else 'float'))
+        results[quantize] = run(args, quantize, output_file)
+
+    (float_scores, float_time, float_size), (int8_scores, int8_time, int8_size) = results[False], results[True]
+    print("{:<12}{:>10}{:>10}{:>10}".format('', 'float', 'int8', 'delta'))
+    for m in METRICS:
+        print("{:<12}{:>10.2f}{:>10.2f}{:>+10.2f}".format(m, float_scores[m], int8_scores[m], int8_scores[m] - float_scores[m]))
+    print("{:<12}{:>10.2f}{:>10.2f}{:>10.2f}x".format('Time (s)', float_time, int8_time, float_time / max(int8_time, 1e-8)))
+    print("{:<12}{:>10.1f}{:>10.1f}{:>10.2f}x".format('Size (MB)', float_size / 2**20, int8_size / 2**20, float_size / max(int8_size, 1)))
+    print("Predictions written to {}".format(output_dir))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Tests for the annotator server: concurrent and batched requests, errors, metrics and keep-alive connections.
+"""
+import http.client
+import io
+import json
+import socket
+import threading
+import pytest
+
+from stanfordnlp.protobuf import Document, parseFromDelimitedString, writeToDelimitedString
+from stanfordnlp.server.annotator import Annotator
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+NUM_CLIENTS = 8
+REQUESTS_PER_CLIENT = 5
+
+
+class UpperCaser(Annotator):
+    """ Upper-cases the text of documents, in batches, and fails on the text 'fail'. """
+
+    def __init__(self, **kwargs):
+        Annotator.__init__(self, **kwargs)
+        self.batch_sizes = []
+
+    def annotate_batch(self, anns):
+        self.batch_sizes.append(len(anns))
+        for ann in anns:
+            if ann.text == 'fail':
+                raise ValueError("Cannot annotate this document")
+            ann.text = ann.text.upper()
+
+
+@pytest.fixture
+def server():
+    annotator = UpperCaser(host='localhost', port=0, max_batch_size=4, max_wait=0.02)
+    httpd = annotator.make_server()
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield annotator, httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+    annotator.batcher.stop()
+    thread.join()
+
+
+def serialize(text):
+    with io.BytesIO() as stream:
+        writeToDelimitedString(Document(text=text), stream)
+        return stream.getvalue()
+
+
+def post(conn, path, body):
+    conn.request('POST', path, body=body)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def annotate(conn, text):
+    status, body = post(conn, '/annotate', serialize(text))
+    assert status == 200
+    doc = Document()
+    parseFromDelimitedString(doc, body)
+    return doc.text
+
+
+def test_concurrent_requests(server):
+    annotator, port = server
+    results, errors = {}, []
+    def client(i):
+        conn = http.client.HTTPConnection('localhost', port)
+        try:
+            for j in range(REQUESTS_PER_CLIENT):
+                text = 'client {} request {}'.format(i, j)
+                results[text] = annotate(conn, text)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(NUM_CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(results) == NUM_CLIENTS * REQUESTS_PER_CLIENT
+    assert all(result == text.upper() for text, result in results.items())
+    assert max(annotator.batch_sizes) <= 4
+    assert sum(annotator.batch_sizes) == NUM_CLIENTS * REQUESTS_PER_CLIENT
+
+    conn = http.client.HTTPConnection('localhost', port)
+    conn.request('GET', '/metrics')
+    metrics = json.loads(conn.getresponse().read().decode('utf-8'))
+    conn.close()
+    assert (metrics['requests'], metrics['errors'], metrics['in_flight']) == (NUM_CLIENTS * REQUESTS_PER_CLIENT, 0, 0)
+    assert metrics['batches'] == len(annotator.batch_sizes)
+
+
+def test_error(server):
+    annotator, port = server
+    conn = http.client.HTTPConnection('localhost', port)
+    status, body = post(conn, '/annotate', serialize('fail'))
+    assert status == 500
+    assert body == b"Cannot annotate this document"
+    # the connection and the server are still usable
+    assert annotate(conn, 'ok') == 'OK'
+    conn.close()
+    metrics = annotator.metrics()
+    assert (metrics['requests'], metrics['errors']) == (2, 1)
+
+
+def test_keep_alive_after_bad_request(server):
+    annotator, port = server
+    conn = http.client.HTTPConnection('localhost', port)
+    status, _ = post(conn, '/unknown', b'x' * 10000)
+    assert status == 400
+    sock = conn.sock
+    assert annotate(conn, 'same connection') == 'SAME CONNECTION'
+    assert conn.sock is sock
+    conn.close()
+
+
+def test_invalid_content_length(server):
+    annotator, port = server
+    with socket.create_connection(('localhost', port)) as sock:
+        sock.sendall(b"POST /annotate HTTP/1.1\r\nHost: localhost\r\nContent-Length: abc\r\n\r\nbody")
+        response = sock.makefile('rb').read()
+    assert response.startswith(b"HTTP/1.1 400")
+    assert b"Connection: close" in response
@@ -0,0 +1,175 @@
+"""
+Tests for AsyncCoreNLPClient, against a fake CoreNLP server that speaks the delimited-protobuf protocol.
+"""
+import asyncio
+import json
+import threading
+import pytest
+
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from stanfordnlp.protobuf import Document, parseFromDelimitedString, writeToDelimitedString, to_text
+from stanfordnlp.server.annotator import ThreadingHTTPServer
+from stanfordnlp.server.client import PermanentlyFailedException, TimeoutException
+
+aiohttp = pytest.importorskip("aiohttp")
+from stanfordnlp.server.async_client import AsyncCoreNLPClient
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+TEXT = "Chris wrote a simple sentence that he parsed with Stanford CoreNLP.\n"
+
+
+def tokenize(text):
+    """ One sentence with a token per space-separated word. """
+    doc = Document()
+    doc.text = text
+    sentence = doc.sentence.add()
+    for i, word in enumerate(text.split()):
+        token = sentence.token.add()
+        token.word = word
+        token.before = '' if i == 0 else ' '
+    sentence.tokenOffsetBegin = 0
+    sentence.tokenOffsetEnd = len(sentence.token)
+    return doc
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    log = None
+
+    def send_message(self, msg, content_type='application/x-protobuf', status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', len(msg))
+        self.end_headers()
+        self.wfile.write(msg)
+
+    def do_GET(self):
+        self.send_message(b'pong', 'text/plain')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.log.append((url.path, params))
+        if url.path in ['/tokensregex', '/semgrex']:
+            words = body.decode('utf-8').split()
+            match = {'text': params['pattern'][0], 'begin': 0, 'end': 1}
+            self.send_message(json.dumps({'sentences': [{'0': match, 'length': 1}], 'words': len(words)}).encode(),
+                              'application/json')
+        elif self.headers['Content-Type'].startswith('application/x-protobuf'):
+            # update: echo the document back with its tokens lemmatized
+            doc = Document()
+            parseFromDelimitedString(doc, body)
+            for token in doc.sentence[0].token:
+                token.lemma = token.word.lower()
+            self.send_message(writeToDelimitedString(doc).getvalue())
+        else:
+            text = body.decode('utf-8')
+            if len(text) > 1000:
+                self.send_message(b'CoreNLP request timed out. Your document may be too long.', 'text/plain', 500)
+            else:
+                self.send_message(writeToDelimitedString(tokenize(text)).getvalue())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    handler = type('Handler', (FakeHandler,), {'log': []})
+    httpd = ThreadingHTTPServer(('localhost', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def endpoint(server):
+    return "http://localhost:{}".format(server.server_address[1])
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_annotate(server):
+    async def annotate():
+        async with AsyncCoreNLPClient(start_server=False, endpoint=endpoint(server),
+                                      annotators="tokenize ssplit".split()) as client:
+            return await client.annotate(TEXT)
+    ann = run(annotate())
+    assert isinstance(ann, Document)
+    assert to_text(ann.sentence[0]) == TEXT[:-1]
+    path, params = server.RequestHandlerClass.log[0]
+    assert "'annotators': 'tokenize,ssplit'" in params['properties'][0]
+
+
+def test_annotate_concurrently(server):
+    texts = ["Sentence number {} .".format(i) for i in range(20)]
+
+    async def annotate():
+        async with AsyncCoreNLPClient(start_server=False, endpoint=endpoint(server), threads=3) as client:
+            return await asyncio.gather(*[client.annotate(text) for text in texts])
+    anns = run(annotate())
+    assert [to_text(ann.sentence[0]) for ann in anns] == [text for text in texts]
+
+
+def test_update(server):
+    async def update():
+        async with AsyncCoreNLPClient(start_server=False, endpoint=endpoint(server)) as client:
+            ann = await client.annotate(TEXT)
+            return await client.update(ann)
+    ann = run(update())
+    assert to_text(ann.sentence[0]) == TEXT[:-1]
+    assert ann.sentence[0].token[0].lemma == "chris"
+
+
+def test_default_properties_unchanged(server):
+    properties = {'tokenize.language': 'en'}
+
+    async def annotate():
+        async with AsyncCoreNLPClient(start_server=False, endpoint=endpoint(server), properties=properties) as client:
+            await client.annotate(TEXT)
+            await client.annotate(TEXT, output_format='serialized')
+    run(annotate())
+    assert properties == {'tokenize.language': 'en'}
+
+
+def test_tokensregex_warms_up_once(server):
+    async def tokensregex():
+        async with AsyncCoreNLPClient(start_server=False, endpoint=endpoint(server)) as client:
+            first = await client.tokensregex(TEXT, '/wrote/')
+            second = await client.tokensregex(TEXT, '/parsed/', to_words=True)
+            return first, second
+    first, second = run(tokensregex())
+    assert first['sentences'][0]['0']['text'] == '/wrote/'
+    assert second == [{'text': '/parsed/', 'begin': 0, 'end': 1, 'sentence': 0}]
+    paths = [path for path, _ in server.RequestHandlerClass.log]
+    # a single warm-up annotation for both queries
+    assert paths == ['/', '/tokensregex', '/tokensregex']
+
+
+def test_timeout(server):
+    async def annotate():
+        async with AsyncCoreNLPClient(start_server=False, endpoint=endpoint(server)) as client:
+            return await client.annotate("word " * 500)
+    with pytest.raises(TimeoutException):
+        run(annotate())
+
+
+def test_server_not_alive():
+    async def annotate():
+        client = AsyncCoreNLPClient(start_server=False, endpoint="http://localhost:1", backoff=0.01, max_backoff=0.05)
+        client.TIMEOUT = 0.2
+        try:
+            return await client.annotate(TEXT)
+        finally:
+            await client.close()
+    with pytest.raises(PermanentlyFailedException):
+        run(annotate())
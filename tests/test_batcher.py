@@ -0,0 +1,124 @@
+"""
+Tests for the micro-batching of concurrent requests shared by the annotation servers.
+"""
+import threading
+import time
+import pytest
+
+from stanfordnlp.server.batcher import MicroBatcher, Metrics
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+
+class Doubler:
+    """ A process_batch that doubles numbers, records its batches and fails on negative numbers. """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            if any(item < 0 for item in items):
+                raise ValueError("negative item")
+            return [item * 2 for item in items]
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def submit_all(batcher, items):
+    results, errors = {}, {}
+    def submit(item):
+        try:
+            results[item] = batcher.submit(item)
+        except Exception as e:
+            errors[item] = e
+    threads = [threading.Thread(target=submit, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_items():
+    process = Doubler(delay=0.01)
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait=0.05).start()
+    try:
+        results, errors = submit_all(batcher, range(40))
+    finally:
+        batcher.stop()
+    assert errors == {}
+    assert results == {i: 2 * i for i in range(40)}
+    assert sorted(item for batch in process.batches for item in batch) == list(range(40))
+    assert all(1 <= len(batch) <= 8 for batch in process.batches)
+    # the items are grouped
+    assert len(process.batches) < 40
+    metrics = batcher.metrics.snapshot()
+    assert metrics['batches'] == len(process.batches)
+    assert metrics['mean_batch_size'] == pytest.approx(40 / len(process.batches))
+
+
+def test_errors_reach_every_item_of_the_batch():
+    process = Doubler()
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait=1.0).start()
+    try:
+        results, errors = submit_all(batcher, [1, 2, 3, -1])
+        # a failed batch does not stop the worker
+        assert batcher.submit(5) == 10
+    finally:
+        batcher.stop()
+    assert sorted(process.batches[0]) == [-1, 1, 2, 3]
+    assert results == {}
+    assert sorted(errors) == [-1, 1, 2, 3]
+    assert all(isinstance(e, ValueError) for e in errors.values())
+
+
+def test_wrong_number_of_results():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=2, max_wait=0.0).start()
+    try:
+        with pytest.raises(AssertionError):
+            batcher.submit(1)
+    finally:
+        batcher.stop()
+
+
+@pytest.mark.parametrize('num_workers', [1, 3])
+def test_workers(num_workers):
+    process = Doubler(delay=0.02)
+    batcher = MicroBatcher(process, max_batch_size=1, max_wait=0.0, num_workers=num_workers).start()
+    try:
+        results, errors = submit_all(batcher, range(12))
+    finally:
+        batcher.stop()
+    assert errors == {} and len(results) == 12
+    # a single worker never runs process_batch concurrently
+    if num_workers == 1:
+        assert process.max_running == 1
+    else:
+        assert 1 < process.max_running <= num_workers
+    assert batcher.workers == []
+
+
+def test_metrics():
+    metrics = Metrics(window=3)
+    for latency, error in [(0.1, False), (0.2, True), (0.3, False), (0.4, False)]:
+        metrics.request_started()
+        metrics.request_finished(latency, error=error)
+    metrics.batch_finished(2, [0.01, 0.02], 0.5)
+    snapshot = metrics.snapshot(queue_depth=5)
+    assert (snapshot['requests'], snapshot['errors'], snapshot['in_flight']) == (4, 1, 0)
+    assert (snapshot['queue_depth'], snapshot['batches'], snapshot['mean_batch_size']) == (5, 1, 2.0)
+    # latencies are kept for the last 3 requests
+    assert snapshot['latency']['mean'] == pytest.approx(0.3)
+    assert snapshot['latency']['max'] == pytest.approx(0.4)
@@ -0,0 +1,148 @@
+"""
+Tests for the fast checkpoint format: round trips of the structures that model and pretrain files hold.
+"""
+import os
+import numpy as np
+import pytest
+import torch
+
+from collections import OrderedDict
+
+from stanfordnlp.models.common.checkpoint import is_fast_checkpoint, load_checkpoint, save_checkpoint
+from stanfordnlp.models.common.pretrain import Pretrain
+from stanfordnlp.models.pos.vocab import CharVocab, WordVocab, XPOSVocab, FeatureVocab, MultiVocab
+from stanfordnlp.utils.convert_checkpoints import convert
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+WORDS = ['w{}'.format(i) for i in range(40)] + ['été', 'naïve', 'Straße']
+
+# [word, upos, xpos, feats] entries, in the layout the pos data loader builds its vocabs from
+TAGGED = [[[w, ['NOUN', 'VERB', 'ADJ'][i % 3], ['NC', 'V', 'ADJ'][i % 3] + str(i % 4),
+            ['Gender=Masc|Number=Sing', 'Mood=Ind|Tense=Pres', '_'][i % 3]] for i, w in enumerate(WORDS)]]
+
+
+def round_trip(obj, tmp_path):
+    filename = str(tmp_path / 'checkpoint.pt')
+    save_checkpoint(obj, filename)
+    assert is_fast_checkpoint(filename)
+    return load_checkpoint(filename)
+
+
+def assert_tensor_equal(loaded, expected):
+    assert isinstance(loaded, torch.Tensor)
+    assert loaded.dtype == expected.dtype
+    assert loaded.shape == expected.shape
+    assert torch.equal(loaded, expected)
+
+
+def test_pretrain(tmp_path):
+    vec_file = str(tmp_path / 'vectors.vec')
+    rng = np.random.RandomState(0)
+    with open(vec_file, 'w') as f:
+        f.write("{} 8\n".format(len(WORDS)))
+        for word in WORDS:
+            f.write("{} {}\n".format(word, ' '.join('{:.6f}'.format(x) for x in rng.randn(8))))
+    torch_file = str(tmp_path / 'torch.pretrain.pt')
+    expected = Pretrain(torch_file, vec_file)
+    expected.emb # read the vectors and save them with torch.save
+    assert not is_fast_checkpoint(torch_file)
+
+    fast_file = str(tmp_path / 'fast.pretrain.pt')
+    save_checkpoint(load_checkpoint(torch_file), fast_file)
+    pretrain = Pretrain(fast_file)
+    assert type(pretrain.vocab) is type(expected.vocab)
+    assert pretrain.vocab._id2unit == expected.vocab._id2unit
+    assert pretrain.vocab._unit2id == expected.vocab._unit2id
+    assert pretrain.vocab.unit2id('ÉTÉ') == expected.vocab.unit2id('été')
+    assert pretrain.vocab.lower
+    assert isinstance(pretrain.emb, np.ndarray)
+    assert pretrain.emb.dtype == expected.emb.dtype
+    assert np.array_equal(pretrain.emb, expected.emb)
+
+
+def test_vocab(tmp_path):
+    vocab = MultiVocab({'char': CharVocab(TAGGED, 'fr'),
+                        'word': WordVocab(TAGGED, 'fr', cutoff=0, lower=True),
+                        'upos': WordVocab(TAGGED, 'fr', idx=1),
+                        'xpos': XPOSVocab(TAGGED, 'fr', idx=2),
+                        'feats': FeatureVocab(TAGGED, 'fr', idx=3)})
+    loaded = round_trip({'vocab': vocab.state_dict()}, tmp_path)
+    # compared before MultiVocab.load_state_dict, which pops the class mapping from the state dict
+    assert loaded['vocab'] == vocab.state_dict()
+    loaded = MultiVocab.load_state_dict(loaded['vocab'])
+    for key in ['char', 'word', 'upos', 'xpos', 'feats']:
+        assert type(loaded[key]) is type(vocab[key])
+        assert loaded[key].state_dict() == vocab[key].state_dict()
+    for word in TAGGED[0]:
+        assert loaded['word'].unit2id(word[0]) == vocab['word'].unit2id(word[0])
+        assert loaded['xpos'].unit2id(word[2]) == vocab['xpos'].unit2id(word[2])
+        assert loaded['feats'].unit2id(word[3]) == vocab['feats'].unit2id(word[3])
+    # vocab objects can also be stored as they are
+    loaded = round_trip({'vocab': vocab['word']}, tmp_path)
+    assert type(loaded['vocab']) is WordVocab
+    assert loaded['vocab'].state_dict() == vocab['word'].state_dict()
+
+
+def test_scalars_and_containers(tmp_path):
+    obj = OrderedDict([('int', 3), ('float', 0.25), ('str', 'fr_gsd'), ('none', None), ('bool', True),
+                       ('short_list', ['a', 'b']), ('long_list', WORDS), ('tuple', (1, 'x', 2.5)),
+                       ('nested', {'config': {'lr': 0.003, 'optim': 'adam', 'dims': [100, 200]}})])
+    loaded = round_trip(obj, tmp_path)
+    assert type(loaded) is OrderedDict
+    assert list(loaded.keys()) == list(obj.keys())
+    assert loaded == obj
+    assert type(loaded['tuple']) is tuple
+
+
+def test_tensors(tmp_path):
+    base = torch.arange(60, dtype=torch.float32).view(6, 10)
+    tensors = OrderedDict([
+        ('float', torch.randn(4, 5)),
+        ('half', torch.randn(3).half()),
+        ('long', torch.arange(7)),
+        ('bool', torch.tensor([True, False, True])),
+        ('scalar', torch.tensor(3.5)),
+        ('empty', torch.zeros(0, 5)),
+        ('transposed', base.t()),
+        ('strided', base[::2, 1::3]),
+    ])
+    assert not tensors['transposed'].is_contiguous() and not tensors['strided'].is_contiguous()
+    loaded = round_trip({'model': tensors, 'array': np.arange(10, dtype=np.int32).reshape(2, 5)[:, ::2]}, tmp_path)
+    for name, tensor in tensors.items():
+        assert_tensor_equal(loaded['model'][name], tensor)
+    assert isinstance(loaded['array'], np.ndarray)
+    assert np.array_equal(loaded['array'], np.array([[0, 2, 4], [5, 7, 9]], dtype=np.int32))
+
+    # loaded tensors are writable, without changing the file
+    loaded['model']['float'].zero_()
+    reloaded = load_checkpoint(str(tmp_path / 'checkpoint.pt'))
+    assert_tensor_equal(reloaded['model']['float'], tensors['float'])
+
+
+def test_empty_data_section(tmp_path):
+    assert round_trip({'config': {'lr': 0.1}}, tmp_path) == {'config': {'lr': 0.1}}
+
+
+def test_load_torch_file(tmp_path):
+    filename = str(tmp_path / 'model.pt')
+    obj = {'model': {'weight': torch.randn(3, 3)}, 'config': {'lr': 0.1}}
+    torch.save(obj, filename)
+    assert not is_fast_checkpoint(filename)
+    loaded = load_checkpoint(filename)
+    assert_tensor_equal(loaded['model']['weight'], obj['model']['weight'])
+    assert loaded['config'] == obj['config']
+
+
+def test_convert(tmp_path):
+    filename = str(tmp_path / 'model.pt')
+    obj = {'model': {'weight': torch.randn(3, 3), 'empty': torch.zeros(0)}, 'config': {'lr': 0.1}}
+    torch.save(obj, filename)
+    convert(filename, filename, check=True)
+    assert is_fast_checkpoint(filename)
+    assert not os.path.exists(filename + '.tmp')
+    loaded = load_checkpoint(filename)
+    assert_tensor_equal(loaded['model']['weight'], obj['model']['weight'])
+    assert_tensor_equal(loaded['model']['empty'], obj['model']['empty'])
+    assert loaded['config'] == obj['config']
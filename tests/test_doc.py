@@ -0,0 +1,183 @@
+"""
+Tests for pipeline Documents: lazy sentences, words backed by their CoNLL-U lines, and the columnar export.
+"""
+import pytest
+
+from stanfordnlp.models.common.conll import CoNLLFile
+from stanfordnlp.pipeline.doc import Document, Sentence
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+TEXT = "du pain.  Oui"
+
+CONLLU = """1-2\tdu\t_\t_\t_\t_\t_\t_\t_\t_
+1\tde\tde\tADP\t_\t_\t3\tcase\t_\t_
+2\tle\tle\tDET\t_\tDefinite=Def|Gender=Masc\t3\tdet\t_\t_
+3\tpain\tpain\tNOUN\t_\tGender=Masc\t0\troot\t_\tSpaceAfter=No
+4\t.\t.\tPUNCT\t_\t_\t3\tpunct\t_\t_
+
+1\tOui\toui\tINTJ\t_\t_\t_\t_\t_\t_
+
+"""
+
+
+def annotated(text=TEXT):
+    doc = Document(text)
+    doc.conll_file = CoNLLFile(input_str=CONLLU)
+    return doc
+
+
+def built(sentences):
+    return [list.__getitem__(sentences, i) is not None for i in range(len(sentences))]
+
+
+def test_lazy_sentences():
+    doc = annotated()
+    doc.load_annotations()
+    assert isinstance(doc.sentences, list)
+    assert len(doc.sentences) == 2
+    # sentences are only built when accessed, then kept
+    assert built(doc.sentences) == [False, False]
+    sentence = doc.sentences[1]
+    assert built(doc.sentences) == [False, True]
+    assert doc.sentences[1] is sentence
+    assert [s.words[0].text for s in doc.sentences] == ['de', 'Oui']
+    assert doc.sentences[-1] is sentence
+    assert doc.sentences[:1] == [doc.sentences[0]]
+    assert list(reversed(doc.sentences)) == [sentence, doc.sentences[0]]
+
+
+@pytest.mark.parametrize('operation', [
+    lambda sentences: sentences == list(sentences),
+    lambda sentences: list(sentences) == sentences,
+    lambda sentences: [sentences[1]] + sentences == [sentences[1], sentences[0], sentences[1]],
+    lambda sentences: sentences + [None] == [sentences[0], sentences[1], None],
+    lambda sentences: sentences[1] in sentences,
+    lambda sentences: sentences.index(sentences[1]) == 1,
+    lambda sentences: sentences.copy() == [sentences[0], sentences[1]],
+    lambda sentences: 'Sentence' in repr(sentences),
+])
+def test_lazy_sentences_list_operations(operation):
+    doc = annotated()
+    doc.load_annotations()
+    assert operation(doc.sentences)
+    assert all(isinstance(s, Sentence) for s in list.__iter__(doc.sentences))
+
+
+def test_lazy_sentences_changes():
+    doc = annotated()
+    doc.load_annotations()
+    sentences = doc.sentences
+    extra = Sentence(doc.conll_file.sents[0])
+    sentences.append(extra)
+    assert len(sentences) == 3 and sentences[2] is extra
+    assert built(sentences) == [False, False, True]
+    # sentences keep their lines when others are inserted before them
+    sentences.insert(0, extra)
+    assert [s.words[0].text for s in sentences] == ['de', 'de', 'Oui', 'de']
+    assert sentences.pop(1).words[0].text == 'de'
+    sentences[0] = None
+    del sentences[0]
+    assert [s.words[0].text for s in sentences] == ['Oui', 'de']
+    sentences += [extra]
+    assert sentences[-1] is extra
+
+
+def test_sentence_tokens_and_words():
+    doc = annotated()
+    doc.load_annotations()
+    sentence = doc.sentences[0]
+    assert sentence._tokens is None
+    assert [t.text for t in sentence.tokens] == ['du', 'pain', '.']
+    assert [w.text for w in sentence.tokens[0].words] == ['de', 'le']
+    assert all(w.parent_token is sentence.tokens[0] for w in sentence.tokens[0].words)
+    assert [w.text for w in sentence.words] == ['de', 'le', 'pain', '.']
+    assert [(gov.text, deprel, word.text) for gov, deprel, word in sentence.dependencies] == \
+        [('pain', 'case', 'de'), ('pain', 'det', 'le'), ('ROOT', 'root', 'pain'), ('pain', 'punct', '.')]
+    # the second sentence is not parsed
+    assert doc.sentences[1].dependencies == []
+    assert doc.sentences[1].words[0].governor is None
+
+
+def test_word_getters_and_setters():
+    doc = annotated()
+    doc.load_annotations()
+    word = doc.sentences[0].words[1]
+    assert (word.index, word.text, word.lemma, word.upos, word.xpos, word.feats, word.governor,
+            word.dependency_relation) == ('2', 'le', 'le', 'DET', '_', 'Definite=Def|Gender=Masc', 3, 'det')
+    word.lemma = 'la'
+    word.upos = 'PRON'
+    word.xpos = 'PRO'
+    word.feats = None
+    word.governor = 1
+    word.dependency_relation = 'obj'
+    assert (word.lemma, word.upos, word.xpos, word.feats, word.governor, word.dependency_relation) == \
+        ('la', 'PRON', 'PRO', '_', 1, 'obj')
+    # the annotations are written to the CoNLL-U lines
+    assert doc.conll_file.sents[0][2] == ['2', 'le', 'la', 'PRON', 'PRO', '_', '1', 'obj', '_', '_']
+
+    word.governor = None
+    assert word.governor is None
+    word.upos = None
+    assert (word.xpos, word.feats) == ('PRO', None)
+    word.xpos = 'X'
+    assert (word.upos, word.xpos) == (None, 'X')
+
+
+def test_slots():
+    doc = annotated()
+    doc.load_annotations()
+    sentence = doc.sentences[0]
+    objects = [doc, doc.sentences, sentence, sentence.tokens[0], sentence.words[0]]
+    for obj in objects:
+        assert not hasattr(obj, '__dict__')
+        with pytest.raises(AttributeError):
+            obj.annotation = 'x'
+
+
+def test_to_arrays():
+    arrays = annotated().to_arrays()
+    assert arrays['sentence_offsets'].tolist() == [0, 4, 5]
+    assert arrays['sentence_tokens'].tolist() == [0, 3, 4]
+    assert arrays['token_offsets'].tolist() == [0, 2, 3, 4, 5]
+    assert arrays['token_chars'].tolist() == [[0, 2], [3, 7], [7, 8], [10, 13]]
+    vocab = arrays['vocab']
+    assert [vocab['upos'][i] for i in arrays['upos']] == ['ADP', 'DET', 'NOUN', 'PUNCT', 'INTJ']
+    assert arrays['xpos'].tolist() == [-1] * 5
+    assert arrays['feats'].tolist() == [-1, 0, 1, -1, -1]
+    # the second sentence is not parsed
+    assert arrays['head'].tolist() == [3, 3, 0, 3, -1]
+    assert arrays['deprel'].tolist() == [0, 1, 2, 3, -1]
+
+
+def test_to_arrays_with_vocabs():
+    vocabs = {'upos': ['<PAD>', '<UNK>', 'NOUN', 'ADP']}
+    arrays = annotated().to_arrays(vocabs)
+    assert arrays['upos'].tolist() == [3, 4, 2, 5, 6]
+    assert arrays['vocab']['upos'] == ['<PAD>', '<UNK>', 'NOUN', 'ADP', 'DET', 'PUNCT', 'INTJ']
+    # the given tables are not changed
+    assert vocabs == {'upos': ['<PAD>', '<UNK>', 'NOUN', 'ADP']}
+
+
+def test_to_arrays_text_mismatch():
+    # only the tokens that differ from the text are not found
+    arrays = annotated("Du pain.").to_arrays()
+    assert arrays['token_chars'].tolist() == [[-1, -1], [3, 7], [7, 8], [-1, -1]]
+    arrays = annotated("du PAIN.  Oui").to_arrays()
+    assert arrays['token_chars'].tolist() == [[0, 2], [-1, -1], [7, 8], [10, 13]]
+    # the tokens after one of another length are found again
+    arrays = annotated("du bread. Oui").to_arrays()
+    assert arrays['token_chars'].tolist() == [[0, 2], [-1, -1], [8, 9], [10, 13]]
+    arrays = annotated("~du pain.  Oui").to_arrays()
+    assert arrays['token_chars'].tolist() == [[-1, -1], [4, 8], [8, 9], [11, 14]]
+    # a token past the end of the text
+    arrays = annotated("du pain.").to_arrays()
+    assert arrays['token_chars'].tolist() == [[0, 2], [3, 7], [7, 8], [-1, -1]]
+
+
+def test_to_arrays_empty():
+    arrays = Document("").to_arrays()
+    assert arrays['sentence_offsets'].tolist() == [0]
+    assert arrays['token_chars'].shape == (0, 2)
+    assert arrays['upos'].shape == (0,)
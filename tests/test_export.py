@@ -0,0 +1,89 @@
+"""
+Tests for the TorchScript export of the tagger and parser: a module traced on one batch gives the predictions
+of the eager model on batches of other shapes.
+"""
+import os
+import pytest
+import torch
+
+from stanfordnlp.models import exporter
+from stanfordnlp.models.common.export import TORCHSCRIPT_SUFFIX, is_scripted, load_torchscript, save_torchscript
+from stanfordnlp.models.common.pretrain import Pretrain
+from benchmarks import models, synthetic
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+
+@pytest.fixture(scope='module')
+def model_files(tmp_path_factory):
+    workdir = str(tmp_path_factory.mktemp('export_models'))
+    language = synthetic.SyntheticLanguage(500, seed=1)
+    files = {name: os.path.join(workdir, name) for name in
+             ['train.conllu', 'trace.conllu', 'eval.conllu', 'vectors.vec', 'pretrain.pt', 'tagger.pt', 'parser.pt']}
+    for name, tokens, seed in [('train.conllu', 3000, 1), ('trace.conllu', 200, 2), ('eval.conllu', 2000, 3)]:
+        with open(files[name], 'w') as f:
+            f.write(synthetic.to_conllu(language.document(tokens, seed=seed)))
+    synthetic.write_vectors(files['vectors.vec'], sorted(set(entry[0].lower() for entry in language.entries)), 32)
+    pretrain = Pretrain(files['pretrain.pt'], files['vectors.vec'])
+    models.build_tagger(files['tagger.pt'], pretrain, 'fr', 'fr_gsd', files['train.conllu'], 'small', 1234)
+    models.build_parser(files['parser.pt'], pretrain, 'fr', 'fr_gsd', files['train.conllu'], 'small', 1234)
+    # the scorers of untrained models start at zero, which would give the same prediction for every word
+    from stanfordnlp.models.pos.trainer import Trainer as TaggerTrainer
+    from stanfordnlp.models.depparse.trainer import Trainer as ParserTrainer
+    torch.manual_seed(0)
+    for trainer_class, name in [(TaggerTrainer, 'tagger.pt'), (ParserTrainer, 'parser.pt')]:
+        trainer = trainer_class(pretrain=pretrain, model_file=files[name])
+        for param in trainer.model.parameters():
+            if param.requires_grad:
+                param.data.normal_(0, 0.5)
+        trainer.save(files[name])
+    return files
+
+
+def export(files, processor, model_file):
+    """ Trace a model on a single batch of the trace file, and save it next to the model. """
+    args = {'model_file': model_file, 'pretrain_file': files['pretrain.pt'], 'eval_file': files['trace.conllu'],
+            'batch_size': 5000}
+    module, inputs, _, model_args, vocab = exporter.EXPORTERS[processor](args)
+    filename = os.path.splitext(model_file)[0] + TORCHSCRIPT_SUFFIX
+    save_torchscript(module, inputs, filename, model_args, vocab)
+    return filename
+
+
+def predict(data_loader, trainer_class, files, model_file, batch_size):
+    pretrain = Pretrain(files['pretrain.pt'])
+    trainer = trainer_class(pretrain=pretrain, model_file=model_file)
+    assert is_scripted(trainer.model) == model_file.endswith(TORCHSCRIPT_SUFFIX)
+    batches = data_loader(files['eval.conllu'], batch_size, trainer.args, pretrain, vocab=trainer.vocab,
+                          evaluation=True)
+    assert len(batches) > 1
+    return [pred for batch in batches for pred in trainer.predict(batch)]
+
+
+@pytest.mark.parametrize('batch_size', [300, 1000])
+def test_tagger_export(model_files, batch_size):
+    from stanfordnlp.models.pos.data import DataLoader
+    from stanfordnlp.models.pos.trainer import Trainer
+    traced_file = export(model_files, 'pos', model_files['tagger.pt'])
+    eager = predict(DataLoader, Trainer, model_files, model_files['tagger.pt'], batch_size)
+    traced = predict(DataLoader, Trainer, model_files, traced_file, batch_size)
+    assert traced == eager
+    assert len(set(tags[0] for sentence in eager for tags in sentence)) > 1
+
+
+@pytest.mark.parametrize('batch_size', [300, 1000])
+def test_parser_export(model_files, batch_size):
+    from stanfordnlp.models.depparse.data import DataLoader
+    from stanfordnlp.models.depparse.trainer import Trainer
+    traced_file = export(model_files, 'depparse', model_files['parser.pt'])
+    eager = predict(DataLoader, Trainer, model_files, model_files['parser.pt'], batch_size)
+    traced = predict(DataLoader, Trainer, model_files, traced_file, batch_size)
+    assert traced == eager
+    assert len(set(head for sentence in eager for head, _ in sentence)) > 1
+
+
+def test_load_torchscript_error(tmp_path):
+    filename = str(tmp_path / ('missing' + TORCHSCRIPT_SUFFIX))
+    with pytest.raises(Exception, match='Cannot load TorchScript model'):
+        load_torchscript(filename)
@@ -0,0 +1,73 @@
+"""
+Tests for the LRU cache shared by the lemma and MWT processors and the character model.
+"""
+import threading
+import time
+import pytest
+
+from collections import OrderedDict
+
+from stanfordnlp.models.common.lru_cache import LRUCache
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+
+def test_eviction():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    # b is the least recently used
+    assert 'b' not in cache
+    assert (cache.get('a'), cache.get('c'), cache.get('b', 0)) == (1, 3, 0)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_disabled():
+    cache = LRUCache(0)
+    cache.put('a', 1)
+    assert len(cache) == 0
+    assert cache.get('a') is None
+
+
+class SwitchingDict(OrderedDict):
+    """ An OrderedDict that lets other threads run between the steps of get and put. """
+
+    def __contains__(self, key):
+        found = super().__contains__(key)
+        time.sleep(0)
+        return found
+
+    def move_to_end(self, key, last=True):
+        time.sleep(0)
+        super().move_to_end(key, last)
+
+
+def test_concurrent_access():
+    cache = LRUCache(50)
+    cache._data = SwitchingDict()
+    errors = []
+    start = threading.Barrier(8)
+
+    def work(seed):
+        try:
+            start.wait()
+            for i in range(250):
+                key = (seed * 7 + i) % 120
+                if cache.get(key) is None:
+                    cache.put(key, key * 2)
+                if i % 100 == 99:
+                    cache.clear()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache) <= 50
+    assert all(cache.get(key) == key * 2 for key in list(cache._data))
@@ -0,0 +1,89 @@
+"""
+Tests for the sharing of processors and pretrained vectors by PipelineManager across threads.
+"""
+import threading
+import time
+import pytest
+
+from types import SimpleNamespace
+
+from stanfordnlp.pipeline import manager
+from stanfordnlp.pipeline.core import Pipeline
+from stanfordnlp.pipeline.manager import PipelineManager
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+NUM_THREADS = 8
+
+
+class FakeModel:
+    """ Stands for a loaded processor or pretrain, and records how many were built. """
+    builds = []
+
+    def __init__(self, name):
+        time.sleep(0.05) # a slow load, so that the threads overlap
+        self.name = name
+        FakeModel.builds.append(name)
+
+
+def run_threads(target):
+    barrier = threading.Barrier(NUM_THREADS)
+    results, errors = [None] * NUM_THREADS, []
+    def run(i):
+        try:
+            barrier.wait()
+            results[i] = target(i)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(NUM_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    return results
+
+
+@pytest.fixture
+def fake_builds(monkeypatch):
+    FakeModel.builds = []
+    monkeypatch.setattr(Pipeline, 'build_processor', lambda pipeline, name: FakeModel((pipeline.name, name)))
+    monkeypatch.setattr(manager, 'Pretrain', FakeModel)
+    return FakeModel.builds
+
+
+def fake_pipeline(name, config):
+    return SimpleNamespace(name=name, use_gpu=False, processor_configs={'pos': config})
+
+
+def test_concurrent_processor_builds(fake_builds):
+    pipeline_manager = PipelineManager(use_gpu=False)
+    # half of the threads ask for one config, and the other half for another one
+    pipelines = [fake_pipeline('p{}'.format(i), {'model_path': 'model{}.pt'.format(i % 2)}) for i in range(NUM_THREADS)]
+    processors = run_threads(lambda i: pipeline_manager.get_processor(pipelines[i], 'pos'))
+    assert len(fake_builds) == 2
+    assert all(processors[i] is processors[i % 2] for i in range(NUM_THREADS))
+    stats = pipeline_manager.stats()
+    assert (stats['processor_loads'], stats['processor_shares']) == (2, NUM_THREADS - 2)
+    assert pipeline_manager.build_locks == {}
+
+
+def test_concurrent_pretrain_loads(fake_builds):
+    pipeline_manager = PipelineManager(use_gpu=False)
+    pretrains = run_threads(lambda i: pipeline_manager.get_pretrain('vectors.pt'))
+    assert fake_builds == ['vectors.pt']
+    assert all(pretrain is pretrains[0] for pretrain in pretrains)
+
+
+def test_failed_build(fake_builds, monkeypatch):
+    pipeline_manager = PipelineManager(use_gpu=False)
+    def fail(filename):
+        raise IOError("Cannot read {}".format(filename))
+    monkeypatch.setattr(manager, 'Pretrain', fail)
+    with pytest.raises(IOError):
+        pipeline_manager.get_pretrain('vectors.pt')
+    # the next request tries again
+    monkeypatch.setattr(manager, 'Pretrain', FakeModel)
+    assert pipeline_manager.get_pretrain('vectors.pt').name == 'vectors.pt'
+    assert pipeline_manager.build_locks == {}
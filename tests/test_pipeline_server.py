@@ -0,0 +1,157 @@
+"""
+Tests for the pipeline server, on a pipeline of fake processors: concurrent and batched requests, errors,
+metrics and keep-alive connections.
+"""
+import http.client
+import json
+import socket
+import threading
+import pytest
+
+from stanfordnlp.models.common.conll import CoNLLFile
+from stanfordnlp.pipeline.profile import PipelineProfile
+from stanfordnlp.server.pipeline_server import PipelineServer
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+NUM_CLIENTS = 8
+REQUESTS_PER_CLIENT = 5
+
+
+class FakeTokenizer:
+    """ One sentence per line, and one word per space-separated token. """
+
+    def process(self, doc):
+        lines = []
+        for sentence in doc.text.strip().split('\n'):
+            for i, word in enumerate(sentence.split()):
+                lines.append('\t'.join([str(i + 1), word] + ['_'] * 8) + '\n')
+            lines.append('\n')
+        doc.conll_file = CoNLLFile(input_str=''.join(lines))
+
+
+class FakeTagger:
+    """ Tags each word with its upper-cased form, records its batches and fails on the word 'crash'. """
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def process(self, doc):
+        with self.lock:
+            self.batch_sizes.append(len(doc.conll_file.sents))
+        words = doc.conll_file.get(['word'])
+        if 'crash' in words:
+            raise RuntimeError("The tagger crashed")
+        doc.conll_file.set(['upos'], [word.upper() for word in words])
+
+
+class FakePipeline:
+    def __init__(self):
+        self.processors = {'tokenize': FakeTokenizer(), 'pos': FakeTagger()}
+        self.processor_names = ['tokenize', 'pos']
+        self.use_gpu = False
+        self.profile_memory = False
+        self.profile = PipelineProfile()
+
+    def load(self, name):
+        return self.processors[name]
+
+
+@pytest.fixture
+def server():
+    server = PipelineServer(FakePipeline(), port=0, max_batch_size=4, max_wait=0.02).start()
+    yield server
+    server.shutdown()
+
+
+def post(conn, path, body, content_type='application/json'):
+    conn.request('POST', path, body=body, headers={'Content-Type': content_type})
+    response = conn.getresponse()
+    return response.status, response.read().decode('utf-8')
+
+
+def annotate(conn, **request):
+    status, body = post(conn, '/annotate', json.dumps(request))
+    return status, json.loads(body)
+
+
+def test_concurrent_requests(server):
+    results, errors = {}, []
+    def client(i):
+        conn = http.client.HTTPConnection(*server.address)
+        try:
+            for j in range(REQUESTS_PER_CLIENT):
+                text = 'client {}\nrequest {}'.format(i, j)
+                results[text] = annotate(conn, text=text)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(NUM_CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(results) == NUM_CLIENTS * REQUESTS_PER_CLIENT
+    for text, (status, result) in results.items():
+        assert status == 200
+        expected = [[{'id': str(i + 1), 'word': word, 'upos': word.upper()} for i, word in enumerate(line.split())]
+                    for line in text.split('\n')]
+        assert result['sentences'] == expected
+
+    # the tagger runs once per batch of requests, on the sentences of all of them
+    batch_sizes = server.pipeline.processors['pos'].batch_sizes
+    assert sum(batch_sizes) == 2 * NUM_CLIENTS * REQUESTS_PER_CLIENT
+    assert max(batch_sizes) <= 2 * 4
+    metrics = server.metrics()
+    assert (metrics['requests'], metrics['errors'], metrics['in_flight']) == (NUM_CLIENTS * REQUESTS_PER_CLIENT, 0, 0)
+    assert metrics['batches'] == len(batch_sizes)
+    assert metrics['pipeline']['pos']['calls'] == len(batch_sizes)
+    assert metrics['pipeline']['pos']['sentences'] == 2 * NUM_CLIENTS * REQUESTS_PER_CLIENT
+
+
+def test_conllu(server):
+    conn = http.client.HTTPConnection(*server.address)
+    conllu = '1\tle\t_\t_\t_\t_\t_\t_\t_\t_\n2\tchat\t_\t_\t_\t_\t_\t_\t_\t_\n\n'
+    status, body = post(conn, '/annotate', conllu, content_type='text/x-conllu')
+    assert status == 200
+    assert body == conllu.replace('le\t_\t_', 'le\t_\tLE').replace('chat\t_\t_', 'chat\t_\tCHAT')
+    assert post(conn, '/annotate', json.dumps({'text': 'le chat', 'output': 'conllu'})) == (200, body)
+    conn.close()
+
+
+def test_errors(server):
+    conn = http.client.HTTPConnection(*server.address)
+    assert annotate(conn, text='a', processors='ner') == (400, {'error': 'Processors not in the pipeline: ner'})
+    assert annotate(conn, conllu=None)[0] == 400
+    assert post(conn, '/annotate', 'not json')[0] == 400
+    status, result = annotate(conn, text='it will crash')
+    assert (status, result) == (500, {'error': 'RuntimeError: The tagger crashed'})
+    # the connection and the server are still usable
+    status, result = annotate(conn, text='fine')
+    assert status == 200 and result['sentences'][0][0]['upos'] == 'FINE'
+    conn.close()
+    metrics = server.metrics()
+    assert (metrics['requests'], metrics['errors']) == (5, 4)
+
+
+def test_keep_alive_after_unknown_path(server):
+    conn = http.client.HTTPConnection(*server.address)
+    status, _ = post(conn, '/unknown', json.dumps({'text': 'x' * 10000}))
+    assert status == 404
+    sock = conn.sock
+    status, result = annotate(conn, text='same connection')
+    assert status == 200 and len(result['sentences'][0]) == 2
+    assert conn.sock is sock
+    conn.close()
+
+
+def test_invalid_content_length(server):
+    with socket.create_connection(server.address) as sock:
+        sock.sendall(b"POST /annotate HTTP/1.1\r\nHost: localhost\r\nContent-Length: -5\r\n\r\n{}")
+        response = sock.makefile('rb').read()
+    assert response.startswith(b"HTTP/1.1 400")
+    assert b"Connection: close" in response
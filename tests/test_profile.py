@@ -0,0 +1,38 @@
+"""
+Tests for the per-stage profiles of pipeline runs.
+"""
+import pytest
+
+from stanfordnlp.pipeline import profile
+from stanfordnlp.pipeline.profile import StageTimer
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+
+def allocate(size):
+    return len(bytearray(size))
+
+
+def test_timing_only(monkeypatch):
+    def fail(*args):
+        raise AssertionError("memory counters touched without profile_memory")
+    monkeypatch.setattr(profile, 'reset_peak_memory', fail)
+    monkeypatch.setattr(profile, 'stage_peak_memory', fail)
+    timer = StageTimer()
+    assert timer.time('tokenize', allocate, 1000) == 1000
+    stats = timer.finish(10, 2).stages['tokenize']
+    assert (stats.calls, stats.tokens, stats.sentences, stats.peak_memory) == (1, 10, 2, 0)
+    assert stats.time > 0
+
+
+@pytest.mark.skipif(profile._current_peak_rss() is None, reason="peak RSS is only measured on Linux")
+def test_profile_memory():
+    timer = StageTimer(profile_memory=True)
+    timer.time('small', allocate, 1000)
+    timer.time('large', allocate, 200 * 2**20)
+    stages = timer.finish(10, 2).stages
+    assert stages['large'].peak_memory >= 200 * 2**20
+    assert 0 < stages['small'].peak_memory < stages['large'].peak_memory
+    # the lifetime peak is kept across the resets
+    assert profile.peak_memory() >= stages['large'].peak_memory
@@ -6,6 +6,7 @@ ner, dependencies and mentions.
 The test corresponds to annotations for the following sentence:
     Chris wrote a simple sentence that he parsed with Stanford CoreNLP.
 """
+import io
 import os
 import pytest
 
@@ -13,6 +14,11 @@ from pytest import fixture
 from stanfordnlp.protobuf import Document, Sentence, Token, DependencyGraph,\
                              CorefChain
 from stanfordnlp.protobuf import parseFromDelimitedString, writeToDelimitedString, to_text
+from stanfordnlp.protobuf import iter_delimited, write_delimited_many
+from stanfordnlp.protobuf.convert import to_protobuf, from_protobuf
+from stanfordnlp.models.common.conll import CoNLLFile
+from stanfordnlp.pipeline.doc import Document as PipelineDocument
+from google.protobuf.message import DecodeError
 
 # set the marker for this module
 pytestmark = pytest.mark.travis
@@ -20,6 +26,17 @@ pytestmark = pytest.mark.travis
 # Text that was annotated
 TEXT = "Chris wrote a simple sentence that he parsed with Stanford CoreNLP.\n"
 
+# A pipeline annotation with a multi-word token
+CONLLU = """1-2\tdu\t_\t_\t_\t_\t_\t_\t_\t_
+1\tde\tde\tADP\t_\t_\t3\tcase\t_\t_
+2\tle\tle\tDET\t_\tDefinite=Def|Gender=Masc\t3\tdet\t_\t_
+3\tpain\tpain\tNOUN\t_\tGender=Masc\t0\troot\t_\tSpaceAfter=No
+4\t.\t.\tPUNCT\t_\t_\t3\tpunct\t_\t_
+
+1\tOui\toui\tINTJ\t_\t_\t0\troot\t_\t_
+
+"""
+
 
 @fixture
 def doc_pb():
@@ -46,6 +63,36 @@ def test_write_protobuf(doc_pb):
     assert doc_pb == doc_pb_
 
 
+def test_write_delimited_many(doc_pb):
+    stream = io.BytesIO()
+    written = write_delimited_many(stream, [doc_pb] * 3)
+    buf = stream.getvalue()
+    assert written == len(buf)
+    assert buf == writeToDelimitedString(doc_pb).getvalue() * 3
+
+
+@pytest.mark.parametrize("buffer_size", [1, 100, 1 << 16])
+def test_iter_delimited(doc_pb, buffer_size):
+    stream = io.BytesIO()
+    write_delimited_many(stream, [doc_pb] * 5)
+    stream.seek(0)
+    docs = list(iter_delimited(stream, Document, buffer_size=buffer_size))
+    assert docs == [doc_pb] * 5
+
+
+def test_iter_delimited_file(doc_pb):
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(test_dir, 'data', 'test.dat'), 'rb') as f:
+        assert list(iter_delimited(f, Document)) == [doc_pb]
+
+
+def test_iter_delimited_truncated(doc_pb):
+    buf = writeToDelimitedString(doc_pb).getvalue() * 2
+    assert list(iter_delimited(io.BytesIO(b''), Document)) == []
+    with pytest.raises(DecodeError):
+        list(iter_delimited(io.BytesIO(buf[:-1]), Document))
+
+
 def test_document_text(doc_pb):
     assert doc_pb.text == TEXT
 
@@ -149,3 +196,35 @@ def test_coref_chain(doc_pb):
     assert chain.mention[1].gender == "MALE"
 
     assert chain.representative == 0  # Head of the chain is 'Chris'
+
+
+def test_from_protobuf(doc_pb):
+    doc = from_protobuf(doc_pb)
+    assert doc.text == TEXT
+    assert len(doc.sentences) == 1
+    words = doc.sentences[0].words
+    assert [w.text for w in words] == [t.word for t in doc_pb.sentence[0].token]
+    assert [w.lemma for w in words][:2] == ["Chris", "write"]
+    assert doc.conll_file.get(['xpos'])[:2] == ["NNP", "VBD"]
+    assert (words[0].governor, words[0].dependency_relation) == (2, "nsubj")
+    assert (words[1].governor, words[1].dependency_relation) == (0, "root")
+
+
+def test_to_protobuf():
+    doc = PipelineDocument("du pain. Oui")
+    doc.conll_file = CoNLLFile(input_str=CONLLU)
+    doc_pb = to_protobuf(doc)
+    assert [(s.tokenOffsetBegin, s.tokenOffsetEnd) for s in doc_pb.sentence] == [(0, 4), (4, 5)]
+    tokens = doc_pb.sentence[0].token
+    assert [t.word for t in tokens] == ["de", "le", "pain", "."]
+    assert [t.originalText for t in tokens] == ["du", "du", "pain", "."]
+    assert [t.coarseTag for t in tokens] == ["ADP", "DET", "NOUN", "PUNCT"]
+    assert list(tokens[1].conllUFeatures.key) == ["Definite", "Gender"]
+    graph = doc_pb.sentence[0].basicDependencies
+    assert list(graph.root) == [3]
+    assert [(e.source, e.target, e.dep) for e in graph.edge] == [(3, 1, "case"), (3, 2, "det"), (3, 4, "punct")]
+
+    # the conversion is lossless, and the protobuf can be serialized
+    doc_pb_ = Document()
+    parseFromDelimitedString(doc_pb_, writeToDelimitedString(doc_pb).getvalue())
+    assert from_protobuf(doc_pb_).conll_file.conll_as_string() == CONLLU
@@ -0,0 +1,57 @@
+"""
+Run pipelines with quantize=True end to end, on tiny randomly initialized models built for the test.
+"""
+import pytest
+
+from stanfordnlp import Pipeline
+from benchmarks import models, synthetic
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+PROCESSORS = 'tokenize,mwt,pos,lemma,depparse'
+
+
+@pytest.fixture(scope='module')
+def models_dir(tmp_path_factory):
+    models_dir = str(tmp_path_factory.mktemp('quantize_models'))
+    models.build_models(models_dir, synthetic.SyntheticLanguage(500, seed=1), train_tokens=3000, tokenizer_steps=100)
+    return models_dir
+
+
+@pytest.fixture(scope='module')
+def text():
+    language = synthetic.SyntheticLanguage(500, seed=1)
+    return synthetic.to_text(language.document(500, seed=2))
+
+
+def is_quantized(model):
+    return any('.quantized' in type(module).__module__ for module in model.modules())
+
+
+def test_quantized_pipeline(models_dir, text):
+    nlp = Pipeline(processors=PROCESSORS, lang='fr', treebank='fr_gsd', models_dir=models_dir, use_gpu=False,
+                   quantize=True)
+    doc = nlp(text)
+    for name in PROCESSORS.split(','):
+        assert is_quantized(nlp.processors[name].trainer.model), name
+
+    # the tokens cover the text (a barely trained tokenizer can keep a space within a token), and every word
+    # is annotated by each processor
+    tokens = ''.join(t.text for s in doc.sentences for t in s.tokens)
+    assert ''.join(tokens.split()) == ''.join(text.split())
+    upos_vocab = nlp.processors['pos'].vocab['upos']
+    for sentence in doc.sentences:
+        assert len(sentence.words) > 0
+        for word in sentence.words:
+            assert word.upos in upos_vocab
+            assert word.lemma is not None
+            assert 0 <= word.governor <= len(sentence.words)
+
+
+def test_processor_quantize_setting(models_dir, text):
+    nlp = Pipeline(processors=PROCESSORS, lang='fr', treebank='fr_gsd', models_dir=models_dir, use_gpu=False,
+                   quantize=True, pos_quantize=False)
+    nlp(text)
+    assert not is_quantized(nlp.processors['pos'].trainer.model)
+    assert is_quantized(nlp.processors['lemma'].trainer.model)
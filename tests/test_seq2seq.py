@@ -0,0 +1,99 @@
+"""
+Tests that the batched decoding of Seq2SeqModel.predict matches the per-example Beam search it replaced.
+"""
+import pytest
+import torch
+
+import stanfordnlp.models.common.seq2seq_constant as constant
+from stanfordnlp.models.common import utils
+from stanfordnlp.models.common.beam import Beam
+from stanfordnlp.models.common.seq2seq_model import Seq2SeqModel
+
+# set the marker for this module
+pytestmark = pytest.mark.travis
+
+VOCAB_SIZE = 12
+POS_VOCAB_SIZE = 6
+
+
+def build_model(attn_type, use_pos, seed, eos_bias):
+    torch.manual_seed(seed)
+    args = {'vocab_size': VOCAB_SIZE, 'emb_dim': 16, 'hidden_dim': 20, 'num_layers': 1, 'dropout': 0.0,
+            'max_dec_len': 12, 'attn_type': attn_type, 'pos': use_pos, 'pos_dim': 16 if use_pos else 0,
+            'pos_vocab_size': POS_VOCAB_SIZE}
+    model = Seq2SeqModel(args)
+    # sharpen the output distributions, and shift EOS so that examples finish at different steps
+    model.dec2vocab.weight.data *= 4
+    model.dec2vocab.bias.data[constant.EOS_ID] += eos_bias
+    model.eval()
+    return model
+
+
+def random_batch(batch_size, seed):
+    gen = torch.Generator().manual_seed(seed)
+    lens = sorted(torch.randint(2, 8, (batch_size,), generator=gen).tolist(), reverse=True)
+    src = torch.full((batch_size, lens[0]), constant.PAD_ID, dtype=torch.long)
+    for i, l in enumerate(lens):
+        src[i, :l] = torch.randint(4, VOCAB_SIZE, (l,), generator=gen)
+    pos = torch.randint(1, POS_VOCAB_SIZE, (batch_size,), generator=gen)
+    return src, src.eq(constant.PAD_ID), pos
+
+
+def beam_predict(model, src, src_mask, pos=None, beam_size=5):
+    """ Beam search with one Beam per example, as Seq2SeqModel.predict used to decode. """
+    enc_inputs = model.embedding(src)
+    batch_size = enc_inputs.size(0)
+    src_lens = list(src_mask.data.eq(constant.PAD_ID).long().sum(1))
+    if model.use_pos:
+        pos_inputs = model.pos_drop(model.pos_embedding(pos))
+        enc_inputs = torch.cat([enc_inputs, pos_inputs.unsqueeze(1)], dim=1)
+    h_in, (hn, cn) = model.encode(enc_inputs, src_lens)
+
+    h_in = h_in.data.repeat(beam_size, 1, 1)
+    src_mask = src_mask.repeat(beam_size, 1)
+    hn = hn.data.repeat(beam_size, 1)
+    cn = cn.data.repeat(beam_size, 1)
+    beam = [Beam(beam_size) for _ in range(batch_size)]
+
+    def update_state(states, idx, positions):
+        for e in states:
+            br, d = e.size()
+            s = e.contiguous().view(beam_size, br // beam_size, d)[:,idx]
+            s.data.copy_(s.data.index_select(0, positions))
+
+    for i in range(model.max_dec_len):
+        dec_inputs = torch.stack([b.get_current_state() for b in beam]).t().contiguous().view(-1, 1)
+        dec_inputs = model.embedding(dec_inputs)
+        log_probs, (hn, cn) = model.decode(dec_inputs, hn, cn, h_in, src_mask)
+        log_probs = log_probs.view(beam_size, batch_size, -1).transpose(0,1).contiguous()
+        done = []
+        for b in range(batch_size):
+            if beam[b].advance(log_probs.data[b]):
+                done += [b]
+            update_state((hn, cn), b, beam[b].get_current_origin())
+        if len(done) == batch_size:
+            break
+
+    all_hyp = []
+    for b in range(batch_size):
+        scores, ks = beam[b].sort_best()
+        all_hyp += [utils.prune_hyp(beam[b].get_hyp(ks[0]))]
+    return all_hyp
+
+
+@pytest.mark.parametrize('attn_type', ['soft', 'mlp', 'linear', 'deep'])
+@pytest.mark.parametrize('use_pos', [False, True])
+def test_predict_matches_beam(attn_type, use_pos):
+    mixed = False
+    for seed in range(2):
+        for eos_bias in [0.1, 0.2, 0.3, 0.4]:
+            model = build_model(attn_type, use_pos, seed, eos_bias)
+            src, src_mask, pos = random_batch(9, seed)
+            with torch.no_grad():
+                for beam_size in [1, 2, 5]:
+                    expected = beam_predict(model, src, src_mask, pos, beam_size)
+                    hyps, _ = model.predict(src, src_mask, pos=pos, beam_size=beam_size)
+                    assert hyps == expected
+                    mixed = mixed or len(set(len(hyp) for hyp in hyps)) > 1
+    # some batches have examples that end at different steps
+    assert mixed